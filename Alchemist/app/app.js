@@ -20,6 +20,13 @@ let prefType           = 0;
 let prefLocation       = "/opt/local/bin/";
 let prefLocation2      = "/opt/homebrew/bin/";
 let prefLocation3      = "/opt/homebrew/bin/";
+let prefScratch        = "";
+let prefSinglePass     = false;
+let prefCrf            = 20;
+let prefVerify         = false;
+let prefWorkers        = 0;
+let prefListen         = "";
+let prefToken          = "";   // no control; set in the prefs file, kept on save
 let prefSpacer         = "_";
 let prefDateSpacer     = "-";
 let prefPrefix         = "prefix";
@@ -30,7 +37,8 @@ let prefDateBox        = false;
 let prefDateReverseBox = true;
 
 // ── DOM refs ──────────────────────────────────────────────────────────────────
-let typeEl, loc1El, loc2El, loc3El;
+let typeEl, loc1El, loc2El, loc3El, scratchEl, singlePassEl, crfEl, verifyEl;
+let workersEl, listenEl;
 let spacerEl, dateSpacerEl, prefixEl, preBoxEl;
 let suffixEl, sufBoxEl, dateBoxEl, dateRevEl;
 let dropZone, feedbackEl;
@@ -56,6 +64,13 @@ async function savePrefs() {
     location:       prefLocation,
     location2:      prefLocation2,
     location3:      prefLocation3,
+    scratch:        prefScratch,
+    singlePass:     prefSinglePass,
+    crf:            prefCrf,
+    verify:         prefVerify,
+    workers:        prefWorkers,
+    listen:         prefListen,
+    token:          prefToken,
     spacer:         prefSpacer,
     dateSpacer:     prefDateSpacer,
     prefix:         prefPrefix,
@@ -89,6 +104,12 @@ async function init() {
   loc1El       = document.getElementById("location");
   loc2El       = document.getElementById("location2");
   loc3El       = document.getElementById("location3");
+  scratchEl    = document.getElementById("scratch");
+  singlePassEl = document.getElementById("singlePass");
+  crfEl        = document.getElementById("crf");
+  verifyEl     = document.getElementById("verify");
+  workersEl    = document.getElementById("workers");
+  listenEl     = document.getElementById("listen");
   spacerEl     = document.getElementById("spacer");
   dateSpacerEl = document.getElementById("dateSpacer");
   prefixEl     = document.getElementById("prefix");
@@ -112,6 +133,13 @@ function applyPrefs(prefs) {
   prefLocation       = prefs.location       ?? prefLocation;
   prefLocation2      = prefs.location2      ?? prefLocation2;
   prefLocation3      = prefs.location3      ?? prefLocation3;
+  prefScratch        = prefs.scratch        ?? prefScratch;
+  prefSinglePass     = prefs.singlePass     ?? prefSinglePass;
+  prefCrf            = parseInt(prefs.crf   ?? prefCrf);
+  prefVerify         = prefs.verify         ?? prefVerify;
+  prefWorkers        = parseInt(prefs.workers ?? prefWorkers);
+  prefListen         = prefs.listen         ?? prefListen;
+  prefToken          = prefs.token          ?? prefToken;
   prefSpacer         = prefs.spacer         ?? prefSpacer;
   prefDateSpacer     = prefs.dateSpacer     ?? prefDateSpacer;
   prefPrefix         = prefs.prefix         ?? prefPrefix;
@@ -125,6 +153,12 @@ function applyPrefs(prefs) {
   loc1El.value       = prefLocation;
   loc2El.value       = prefLocation2;
   loc3El.value       = prefLocation3;
+  scratchEl.value    = prefScratch;
+  singlePassEl.checked = prefSinglePass;
+  crfEl.value        = prefCrf;
+  verifyEl.checked   = prefVerify;
+  workersEl.value    = prefWorkers;
+  listenEl.value     = prefListen;
   spacerEl.value     = prefSpacer;
   dateSpacerEl.value = prefDateSpacer;
   prefixEl.value     = prefPrefix;
@@ -148,6 +182,26 @@ function updateType() {
 function updateLocation()  { prefLocation  = loc1El.value;         savePrefs(); }
 function updateLocation2() { prefLocation2 = loc2El.value;         savePrefs(); }
 function updateLocation3() { prefLocation3 = loc3El.value;         savePrefs(); }
+function updateScratch()   { prefScratch   = scratchEl.value;       savePrefs(); }
+function updateSinglePass() { prefSinglePass = singlePassEl.checked; savePrefs(); }
+function updateVerify()    { prefVerify    = verifyEl.checked;      savePrefs(); }
+function updateListen()    { prefListen    = listenEl.value.trim();  savePrefs(); }
+
+function updateWorkers() {
+  const v = parseInt(workersEl.value);
+  if (!isNaN(v) && v >= 0) {
+    prefWorkers = v;
+    savePrefs();
+  }
+}
+
+function updateCrf() {
+  const v = parseInt(crfEl.value);
+  if (!isNaN(v) && v >= 0 && v <= 51) {
+    prefCrf = v;
+    savePrefs();
+  }
+}
 function updateSpacer()    { prefSpacer    = spacerEl.value;        }
 function updatePrefix()    { prefPrefix    = prefixEl.value;        }
 function updatePreBox()    { prefPreBox    = preBoxEl.checked;      }
@@ -207,7 +261,8 @@ async function checkTool(name, statusId) {
   if (window.pywebview) {
     const result = await window.pywebview.api.check_tool(loc, name);
     if (result.ok) {
-      statusEl.textContent = "✓ " + result.path;
+      statusEl.textContent = "✓ " + result.path
+        + (result.version ? " (" + result.version + ")" : "");
       statusEl.className   = "setting-hint ok";
     } else {
       statusEl.textContent = "✕ Not found at " + result.path;
@@ -275,6 +330,13 @@ async function dragDrop(event) {
     location:  prefLocation,
     location2: prefLocation2,
     location3: prefLocation3,
+    scratch:   prefScratch,
+    singlePass: prefSinglePass,
+    crf:       prefCrf,
+    verify:    prefVerify,
+    workers:   prefWorkers,
+    listen:    prefListen,
+    token:     prefToken,
   };
 
   try {
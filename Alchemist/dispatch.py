@@ -0,0 +1,234 @@
+"""
+Job queue for an Alchemist batch, and the coordinator serving it to workers.
+
+The app itself takes jobs from the same queue when it encodes in-process.
+With serve(), the queue is offered over a small JSON-over-HTTP protocol;
+workers (worker.py, on this machine or on others that see the same files)
+lease one job at a time:
+
+    POST /lease      {"worker"}                → {"job": {…}, "heartbeat": s}
+                                                 | {"wait": s} | {"done": true}
+    POST /heartbeat  {"worker", "id"}          → {"ok": true} while the lease holds
+    POST /result     {"worker", "id", "done", "errors", "times", "published",
+                      "spans", "machine"}
+
+A lease that misses heartbeats for `lease_timeout` seconds is taken back
+and the job goes to the front of the queue for another worker; after
+`attempts` tries the job fails.  Only the worker holding a job's lease may
+send heartbeats or a result for it; a late result from a worker whose
+lease was taken back is ignored.
+Jobs keep the planner's order (longest first).
+
+With a `check` function, each result is verified on a small thread pool
+while other jobs keep encoding; check(i, result) returns a list of
+problems, and a job with problems is queued again (within `attempts`).
+
+When a token is set, every request must carry it in X-Alchemist-Token.
+Alchemist insists on one whenever it listens for remote workers, and
+binds localhost unless a host is given.  Workers run the commands they
+are given, so only listen beyond localhost on a network you trust.
+"""
+
+import collections
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Tools a worker may be asked to run (resolved on the worker)
+TOOLS = {"ffmpeg", "ffmpeg2theora", "qt_export"}
+
+
+def portable(j: dict, app_dir: str) -> dict:
+    """
+    The wire form of a planned job: tools by name, and the coordinator's
+    scratch and app directories as {scratch} / {app} placeholders.
+    """
+    scratch = j["scratch"]
+
+    def port(arg: str) -> str:
+        return arg.replace(scratch, "{scratch}").replace(app_dir, "{app}")
+
+    return {
+        "cmds":    [[os.path.basename(c[0])] + [port(a) for a in c[1:]] for c in j["cmds"]],
+        "src":     j["src"],
+        "outputs": [{**o, "tmp": port(o["tmp"])} for o in j["outputs"]],
+        "note":    j.get("note", ""),
+    }
+
+
+class Coordinator:
+    def __init__(self, jobs: list, token: str = "", lease_timeout: float | None = 30.0,
+                 attempts: int = 3, check=None):
+        self.jobs          = jobs
+        self.token         = token or ""
+        self.lease_timeout = lease_timeout     # None: leases never expire (in-process)
+        self.attempts      = attempts
+        self.check         = check
+
+        self._cond     = threading.Condition()
+        self._pending  = collections.deque(range(len(jobs)))
+        self._leases   = {}                          # id → (worker, deadline)
+        self._tries    = collections.Counter()       # id → leases handed out
+        self._checking = set()                       # ids whose result is being verified
+        self._results  = {}                          # id → result
+        self._pool     = ThreadPoolExecutor(max_workers=2) if check else None
+        self._server   = None
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0):
+        """Accept workers on host:port (0: any free port).  Raises OSError."""
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.coordinator    = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        if host in ("0.0.0.0", "::", ""):
+            host = "127.0.0.1"
+        return f"http://{host}:{port}"
+
+    def close(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._pool:
+            self._pool.shutdown(wait=True)
+
+    # ── Protocol ──────────────────────────────────────────────────────────────
+
+    def lease(self, worker: str) -> dict:
+        with self._cond:
+            self._reap()
+            if self._pending:
+                i = self._pending.popleft()
+                self._leases[i] = (worker, self._deadline())
+                self._tries[i] += 1
+                return {"job": {"id": i, **self.jobs[i]},
+                        "heartbeat": (self.lease_timeout or 30.0) / 3}
+            if len(self._results) == len(self.jobs):
+                return {"done": True}
+            return {"wait": 1.0}
+
+    def heartbeat(self, worker: str, i: int) -> dict:
+        with self._cond:
+            held = self._leases.get(i)
+            if held and held[0] == worker:
+                self._leases[i] = (worker, self._deadline())
+                return {"ok": True}
+        return {"ok": False}
+
+    def result(self, worker: str, i: int, result: dict) -> dict:
+        with self._cond:
+            # Only the worker holding the lease may report on a job
+            held = self._leases.get(i)
+            if not held or held[0] != worker:
+                return {"ok": False}
+            del self._leases[i]
+            result = {**result, "worker": worker}
+            if not self.check or not result.get("published"):
+                self._results[i] = result
+                self._cond.notify_all()
+                return {"ok": True}
+            self._checking.add(i)
+        self._pool.submit(self._verify, i, result)
+        return {"ok": True}
+
+    # ── Bookkeeping ───────────────────────────────────────────────────────────
+
+    def _deadline(self) -> float:
+        return time.monotonic() + self.lease_timeout if self.lease_timeout else float("inf")
+
+    def _verify(self, i: int, result: dict):
+        try:
+            problems = self.check(i, result)
+        except Exception as ex:
+            problems = [f"verification failed: {ex}"]
+        with self._cond:
+            self._checking.discard(i)
+            if problems and self._tries[i] < self.attempts:
+                self._pending.appendleft(i)   # encode it again
+            else:
+                self._results[i] = {**result,
+                                    "done":   result["done"] - len(problems),
+                                    "errors": result["errors"] + problems}
+            self._cond.notify_all()
+
+    def _fail(self, i: int, reason: str):
+        names = ", ".join(os.path.basename(o["out"]) for o in self.jobs[i]["outputs"])
+        self._results[i] = {"done": 0, "errors": [f"{names}: {reason}"], "times": []}
+        self._cond.notify_all()
+
+    def _reap(self):
+        """Requeue jobs whose worker stopped sending heartbeats."""
+        now = time.monotonic()
+        for i, (worker, deadline) in list(self._leases.items()):
+            if deadline < now:
+                del self._leases[i]
+                if self._tries[i] >= self.attempts:
+                    self._fail(i, f"worker lost {self._tries[i]} times, giving up")
+                else:
+                    self._pending.appendleft(i)
+
+    def abandon(self, reason: str):
+        """Fail every job that has not finished (or is not being verified)."""
+        with self._cond:
+            for i in range(len(self.jobs)):
+                if i not in self._results and i not in self._checking:
+                    self._leases.pop(i, None)
+                    self._fail(i, reason)
+            self._pending.clear()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """True once every job has a result."""
+        with self._cond:
+            self._reap()
+            if len(self._results) < len(self.jobs):
+                self._cond.wait(timeout)
+                self._reap()
+            return len(self._results) == len(self.jobs)
+
+    def results(self) -> list:
+        with self._cond:
+            return [self._results.get(i, {"done": 0, "errors": [], "times": []})
+                    for i in range(len(self.jobs))]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        coordinator = self.server.coordinator
+        if coordinator.token and self.headers.get("X-Alchemist-Token") != coordinator.token:
+            return self._reply(403, {"error": "bad token"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body   = json.loads(self.rfile.read(length) or b"{}")
+            worker = str(body.get("worker", "?"))
+            if self.path == "/lease":
+                return self._reply(200, coordinator.lease(worker))
+            if self.path == "/heartbeat":
+                return self._reply(200, coordinator.heartbeat(worker, int(body["id"])))
+            if self.path == "/result":
+                result = {k: body.get(k) for k in
+                          ("done", "errors", "times", "published", "spans", "machine")}
+                result["done"]      = int(result["done"] or 0)
+                result["errors"]    = list(result["errors"] or [])
+                result["times"]     = list(result["times"] or [])
+                result["published"] = list(result["published"] or [])
+                return self._reply(200, coordinator.result(worker, int(body["id"]), result))
+        except (ValueError, KeyError, TypeError) as ex:
+            return self._reply(400, {"error": str(ex)})
+        self._reply(404, {"error": "unknown endpoint"})
@@ -0,0 +1,121 @@
+"""
+Encode throughput history, for ETA prediction and job ordering.
+
+Every finished encode command records the frames per second it achieved,
+keyed by (command spec, source width × height, source codec, machine).  The
+spec names the command and hashes its flags, so a changed preset starts a
+fresh history.  Predictions use the median of the newest samples for the
+exact key, or failing that the same spec on this machine at other source
+sizes, scaled by pixel count.
+
+The store is a small SQLite file next to the prefs; it is opened on first
+use and any error simply means "no prediction".
+"""
+
+import hashlib
+import os
+import platform
+import sqlite3
+import statistics
+import threading
+import time
+
+_KEEP = 20   # samples kept per key
+
+
+def machine() -> str:
+    return f"{platform.node() or 'localhost'}/{os.cpu_count() or 1}"
+
+
+def spec(kind: str, flags: list) -> str:
+    """e.g. spec("pass2.720p.mp4", flags) → "pass2.720p.mp4#1f3a9c0b2d"."""
+    return f"{kind}#{hashlib.sha1(' '.join(flags).encode()).hexdigest()[:10]}"
+
+
+class History:
+    def __init__(self, path: str):
+        self.path     = path
+        self.machine  = machine()
+        self._lock    = threading.Lock()
+        self._db      = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS samples ("
+                " spec TEXT, width INTEGER, height INTEGER, codec TEXT,"
+                " machine TEXT, fps REAL, at REAL)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS samples_key"
+                " ON samples (spec, machine, codec, width, height)"
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    # ── Recording ─────────────────────────────────────────────────────────────
+
+    def record(self, spec: str, source: dict, fps: float, machine: str | None = None):
+        """`machine` is the worker's (see worker.py); this machine by default."""
+        key = (spec, source["width"], source["height"], source["codec"], machine or self.machine)
+        try:
+            with self._lock:
+                db = self._connect()
+                db.execute("INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           key + (fps, time.time()))
+                db.execute(
+                    "DELETE FROM samples WHERE spec = ? AND width = ? AND height = ?"
+                    " AND codec = ? AND machine = ? AND rowid NOT IN ("
+                    "  SELECT rowid FROM samples WHERE spec = ? AND width = ? AND height = ?"
+                    "  AND codec = ? AND machine = ? ORDER BY at DESC LIMIT ?)",
+                    key + key + (_KEEP,),
+                )
+                db.commit()
+        except sqlite3.Error:
+            pass
+
+    # ── Prediction ────────────────────────────────────────────────────────────
+
+    def fps(self, spec: str, source: dict) -> float | None:
+        """Expected frames per second for `spec` on `source`, or None."""
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT width, height, fps FROM samples"
+                    " WHERE spec = ? AND codec = ? AND machine = ?"
+                    " ORDER BY at DESC LIMIT 200",
+                    (spec, source["codec"], self.machine),
+                ).fetchall()
+        except sqlite3.Error:
+            return None
+
+        exact = [f for w, h, f in rows if (w, h) == (source["width"], source["height"])]
+        if exact:
+            return statistics.median(exact[:_KEEP])
+        pixels = source["width"] * source["height"]
+        scaled = [f * w * h / pixels for w, h, f in rows if w * h and pixels]
+        return statistics.median(scaled[:_KEEP]) if scaled else None
+
+    def estimate(self, specs: list, source: dict | None) -> float | None:
+        """Seconds for a job's commands on `source`, or None if any is unknown."""
+        if not source or not source["frames"]:
+            return None
+        total = 0.0
+        for s in specs:
+            rate = self.fps(s, source)
+            if not rate:
+                return None
+            total += source["frames"] / rate
+        return total
+
+
+_shared = {}
+
+
+def open_history(path: str) -> History:
+    """One History per file for the whole process."""
+    if path not in _shared:
+        _shared[path] = History(path)
+    return _shared[path]
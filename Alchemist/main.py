@@ -7,22 +7,35 @@ Requires:  pip install pywebview
 Optional:  FFmpeg (brew install ffmpeg), ffmpeg2theora (brew install ffmpeg2theora)
            qt_export + QuickTime (legacy macOS only, for ProRes/HDV/AIC modes)
 Run:       python main.py
+Headless:  python main.py [--prefs JSON] [--set KEY=VALUE] PATH|GLOB|DIR …
 """
 
+import errno
 import json
 import os
 import re
 import shutil
 import subprocess
+import sys
+import tempfile
 import threading
-import webbrowser
-
-import webview
+import time
 
 # ── Preferences ───────────────────────────────────────────────────────────────
 PREFS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alchemist_prefs.json")
 APP_DIR    = os.path.dirname(os.path.abspath(__file__))
 
+# Measured encode speeds, for ETAs (see history.py)
+HISTORY_PATH = os.path.join(APP_DIR, "alchemist_history.sqlite")
+
+# Repository root, for the shared `common` package
+sys.path.insert(0, os.path.dirname(APP_DIR))
+
+from common import governor, tools  # noqa: E402
+from common.atomic import atomic_copy  # noqa: E402
+from common.metrics import Metrics  # noqa: E402
+from common.prefs import PrefsStore  # noqa: E402
+
 DEFAULT_PREFS = {
     # Conversion mode index (matches original prefType)
     "type":            0,
@@ -32,6 +45,18 @@ DEFAULT_PREFS = {
     "location2":       "/opt/homebrew/bin/",
     # ffmpeg2theora binary directory
     "location3":       "/opt/homebrew/bin/",
+    # Scratch directory for pass logs and in-progress outputs (blank: system temp)
+    "scratch":         "",
+    # Encode two-pass H.264 outputs in one CRF pass (VBV-capped) instead
+    "singlePass":      False,
+    "crf":             20,
+    # Check each output with ffprobe against its source; re-encode failures
+    "verify":          False,
+    # Encode on worker processes: this many local ones (0: in this process) …
+    "workers":         0,
+    # … and/or remote ones connecting to HOST:PORT (see worker.py)
+    "listen":          "",
+    "token":           "",
     # Rename settings (UI hidden in original, kept for completeness)
     "spacer":          "_",
     "dateSpacer":      "-",
@@ -43,193 +68,28 @@ DEFAULT_PREFS = {
     "dateReverseBox":  True,
 }
 
+_prefs   = PrefsStore(PREFS_PATH, DEFAULT_PREFS)
+_metrics = Metrics("Alchemist")
+
 # ── Conversion mode table ─────────────────────────────────────────────────────
-# Each entry: (label, tool, [output_spec, ...])
-# output_spec: (flags_list, output_extension, multipass?)
-#
-# tool values:
-#   "qt_tools"    → qt_export --loadsettings (legacy)
-#   "ffmpeg"      → single-pass ffmpeg
-#   "ffmpegMulti" → two-pass ffmpeg
-#   "ffmpeg2theora"
-#
-# Note: qt_export uses the bundled binary .st preset files shipped in app/qt_tools/
-# FFmpeg equivalents are provided for all modes so the app works on modern macOS.
-
-CONVERSION_MODES = [
-    # 0 – ProRes 422
-    {
-        "label": "QuickTime ProRes 422",
-        "outputs": [
-            {
-                "tool":    "qt_tools",
-                "preset":  "qt_export_prores422.st",
-                "ext":     ".prores422.mov",
-                # Modern ffmpeg fallback
-                "ffmpeg_flags": ["-c:v", "prores_ks", "-profile:v", "2",
-                                 "-c:a", "pcm_s16le"],
-            },
-        ],
-    },
-    # 1 – HDV 1080p
-    {
-        "label": "QuickTime HDV 1080p",
-        "outputs": [
-            {
-                "tool":    "qt_tools",
-                "preset":  "qt_export_hdv_1080p.st",
-                "ext":     ".hdv1080.mov",
-                "ffmpeg_flags": ["-c:v", "mpeg2video", "-b:v", "25M",
-                                 "-vf", "scale=1440:1080", "-c:a", "ac3", "-b:a", "192k"],
-            },
-        ],
-    },
-    # 2 – HDV 720p
-    {
-        "label": "QuickTime HDV 720p",
-        "outputs": [
-            {
-                "tool":    "qt_tools",
-                "preset":  "qt_export_hdv_720p.st",
-                "ext":     ".hdv720.mov",
-                "ffmpeg_flags": ["-c:v", "mpeg2video", "-b:v", "19.7M",
-                                 "-vf", "scale=1280:720", "-c:a", "ac3", "-b:a", "192k"],
-            },
-        ],
-    },
-    # 3 – Apple Intermediate Codec (AIC) — no modern ffmpeg equivalent
-    {
-        "label": "QuickTime AIC",
-        "outputs": [
-            {
-                "tool":    "qt_tools",
-                "preset":  "qt_export_aic.st",
-                "ext":     ".aic.mov",
-                # AIC has no open codec; best alternative is ProRes LT
-                "ffmpeg_flags": ["-c:v", "prores_ks", "-profile:v", "1",
-                                 "-c:a", "pcm_s16le"],
-                "ffmpeg_note": "AIC has no open FFmpeg codec; using ProRes LT as fallback",
-            },
-        ],
-    },
-    # 4 – HTML5 (MP4 + OGG + WebM at 720p and 540p)
-    {
-        "label": "MP4, OGG, WebM  720p / 540p",
-        "outputs": [
-            {
-                "tool":       "ffmpegMulti",
-                "ffmpeg_flags": ["-c:v", "libx264", "-b:v", "1536k",
-                                  "-minrate", "128k", "-maxrate", "3072k", "-bufsize", "224k",
-                                  "-vf", "lutyuv=y=gammaval(1.2),scale=1280:720",
-                                  "-c:a", "aac", "-b:a", "160k"],
-                "ext":        ".720p.mp4",
-            },
-            {
-                "tool":       "ffmpegMulti",
-                "ffmpeg_flags": ["-c:v", "libx264", "-b:v", "1024k",
-                                  "-minrate", "128k", "-maxrate", "2560k", "-bufsize", "224k",
-                                  "-vf", "lutyuv=y=gammaval(1.2),scale=960:540",
-                                  "-c:a", "aac", "-b:a", "128k"],
-                "ext":        ".540p.mp4",
-            },
-            {
-                "tool":       "ffmpeg",
-                "ffmpeg_flags": ["-c:v", "libx264", "-crf", "18",
-                                  "-trellis", "1", "-me_range", "32",
-                                  "-i_qfactor", "0.71", "-g", "60",
-                                  "-sc_threshold", "20", "-qmin", "4", "-qmax", "48",
-                                  "-qdiff", "8",
-                                  "-vf", "lutyuv=y=gammaval(1.2),scale=1280:720",
-                                  "-c:a", "aac", "-b:a", "160k"],
-                "ext":        ".720p.Q.mp4",
-            },
-            {
-                "tool":       "ffmpeg",
-                "ffmpeg_flags": ["-c:v", "libx264", "-crf", "18",
-                                  "-trellis", "1", "-me_range", "32",
-                                  "-i_qfactor", "0.71", "-g", "60",
-                                  "-sc_threshold", "20", "-qmin", "4", "-qmax", "48",
-                                  "-qdiff", "8",
-                                  "-vf", "lutyuv=y=gammaval(1.2),scale=960:540",
-                                  "-c:a", "aac", "-b:a", "128k"],
-                "ext":        ".540p.Q.mp4",
-            },
-            {
-                "tool":       "ffmpeg2theora",
-                "ffmpeg_flags": ["-V", "2560k", "-A", "160k",
-                                  "--two-pass", "--speedlevel", "0",
-                                  "--max_size", "1280x720"],
-                "ext":        ".720p.ogg",
-            },
-            {
-                "tool":       "ffmpeg2theora",
-                "ffmpeg_flags": ["-V", "1920k", "-A", "128k",
-                                  "--two-pass", "--speedlevel", "0",
-                                  "--max_size", "960x540"],
-                "ext":        ".540p.ogg",
-            },
-            {
-                "tool":       "ffmpeg",
-                "ffmpeg_flags": ["-c:v", "libvpx", "-b:v", "1280k",
-                                  "-minrate", "0k", "-maxrate", "2048k", "-bufsize", "224k",
-                                  "-vf", "lutyuv=y=gammaval(1.1),scale=1280:720",
-                                  "-f", "webm", "-c:a", "libvorbis", "-b:a", "160k"],
-                "ext":        ".720p.webm",
-            },
-            {
-                "tool":       "ffmpeg",
-                "ffmpeg_flags": ["-c:v", "libvpx", "-b:v", "1024k",
-                                  "-minrate", "0k", "-maxrate", "1536k", "-bufsize", "224k",
-                                  "-vf", "lutyuv=y=gammaval(1.1),scale=960:540",
-                                  "-f", "webm", "-c:a", "libvorbis", "-b:a", "128k"],
-                "ext":        ".540p.webm",
-            },
-        ],
-    },
-    # 5 – Desktop (MP4 + WMV 720p)
-    {
-        "label": "MP4, WMV  720p",
-        "outputs": [
-            {
-                "tool":       "ffmpegMulti",
-                "ffmpeg_flags": ["-c:v", "libx264", "-b:v", "2048k",
-                                  "-minrate", "128k", "-maxrate", "4096k", "-bufsize", "224k",
-                                  "-vf", "lutyuv=y=gammaval(1.2),scale=1280:720",
-                                  "-c:a", "aac", "-b:a", "160k"],
-                "ext":        ".720p.mp4",
-            },
-            {
-                "tool":       "ffmpegMulti",
-                "ffmpeg_flags": ["-c:v", "wmv2", "-b:v", "3072k",
-                                  "-vf", "lutyuv=y=gammaval(1.2),scale=1280:720",
-                                  "-c:a", "wmav2", "-b:a", "160k"],
-                "ext":        ".720p.wmv",
-            },
-        ],
-    },
-    # 6 – Mobile (MP4 480p + 360p)
-    {
-        "label": "MP4  480p / 360p",
-        "outputs": [
-            {
-                "tool":       "ffmpegMulti",
-                "ffmpeg_flags": ["-c:v", "libx264", "-b:v", "1024k",
-                                  "-minrate", "128k", "-maxrate", "1536k", "-bufsize", "224k",
-                                  "-vf", "scale=854:480",
-                                  "-c:a", "aac", "-b:a", "128k"],
-                "ext":        ".480p.mp4",
-            },
-            {
-                "tool":       "ffmpegMulti",
-                "ffmpeg_flags": ["-c:v", "libx264", "-b:v", "768k",
-                                  "-minrate", "128k", "-maxrate", "1280k", "-bufsize", "224k",
-                                  "-vf", "scale=640:360",
-                                  "-c:a", "aac", "-b:a", "128k"],
-                "ext":        ".360p.mp4",
-            },
-        ],
-    },
-]
+# The table itself lives in modes.py and is loaded on first use.
+
+def _conversion_modes() -> list:
+    from modes import CONVERSION_MODES
+    return CONVERSION_MODES
+
+
+def _history():
+    from history import open_history
+    return open_history(HISTORY_PATH)
+
+
+def __getattr__(name: str):
+    # main.CONVERSION_MODES still resolves, loading the table on demand
+    if name == "CONVERSION_MODES":
+        return _conversion_modes()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 VIDEO_EXTENSIONS = {
     ".mov", ".mp4", ".m4v", ".avi", ".mkv", ".wmv", ".flv",
@@ -237,6 +97,15 @@ VIDEO_EXTENSIONS = {
     ".3gp", ".mxf",
 }
 
+# Memory reserved with the governor for each encode (x264 at 720p stays well below)
+ENCODE_MEM_MB = 512
+
+# Verification: an output may be this much shorter or longer than its source
+# (fraction of the duration, but at least VERIFY_SLACK_S seconds), and have
+# this fraction fewer frames than the duration calls for
+VERIFY_SLACK   = 0.02
+VERIFY_SLACK_S = 0.5
+
 
 class AlchemistAPI:
     """Python-side API exposed to JS via window.pywebview.api.*"""
@@ -247,58 +116,56 @@ class AlchemistAPI:
     # ── Prefs ─────────────────────────────────────────────────────────────────
 
     def load_prefs(self) -> dict:
-        if os.path.exists(PREFS_PATH):
-            try:
-                with open(PREFS_PATH) as f:
-                    saved = json.load(f)
-                return {**DEFAULT_PREFS, **saved}
-            except Exception:
-                pass
-        return dict(DEFAULT_PREFS)
+        return _prefs.load()
 
     def save_prefs(self, prefs: dict) -> bool:
-        try:
-            with open(PREFS_PATH, "w") as f:
-                json.dump(prefs, f, indent=2)
-            return True
-        except Exception as e:
-            return str(e)
+        return _prefs.save(prefs)
 
     def erase_prefs(self) -> bool:
-        if os.path.exists(PREFS_PATH):
-            os.remove(PREFS_PATH)
-        return True
+        return _prefs.erase()
 
     # ── Tool checks ───────────────────────────────────────────────────────────
 
     def check_tool(self, loc: str, name: str) -> dict:
-        binary = os.path.join(loc.rstrip("/"), name)
-        if os.path.isfile(binary) and os.access(binary, os.X_OK):
-            return {"ok": True, "path": binary}
-        found = shutil.which(name)
-        if found:
-            return {"ok": True, "path": found}
-        return {"ok": False, "path": binary}
+        """{ ok, path, version, features } for `name` in `loc` or on PATH."""
+        return tools.info(name, loc)
 
     def open_url(self, url: str) -> bool:
+        import webbrowser
         webbrowser.open(url)
         return True
 
+    def get_metrics(self, limit: int = 50) -> dict:
+        """Timing spans of the recent process_files calls (see common/metrics.py)."""
+        return _metrics.snapshot(limit)
+
     # ── Core processing ───────────────────────────────────────────────────────
 
-    def process_files(self, file_paths: list, prefs: dict) -> dict:
+    def process_files(self, file_paths: list, prefs: dict, wait: bool = False) -> dict:
         """
-        Run the selected conversion on each dropped video file.
+        Run the selected conversion on each dropped video file.  Jobs run in
+        a background thread unless `wait` is set (headless use), in which
+        case the call returns once every job has finished.
         Returns { ok, message, commands, jobs_total }
         """
+        job = _metrics.start(files=len(file_paths), type=prefs.get("type", 0))
+        result = self._process_files(file_paths, prefs, wait, job)
+        # Once encoding is under way in the background, _run_jobs ends the job
+        if wait or not result.get("ok"):
+            job.end(result)
+        return result
+
+    def _process_files(self, file_paths: list, prefs: dict, wait: bool, job) -> dict:
         try:
             # ── Normalise paths ───────────────────────────────────────────────
+            job.stage("decode")
             paths = _decode_paths(file_paths)
 
             if not paths:
                 return {"ok": False, "message": "No files received.", "commands": []}
 
             # ── Validate: video files only ────────────────────────────────────
+            job.stage("validate")
             for p in paths:
                 ext = os.path.splitext(p)[1].lower()
                 if ext not in VIDEO_EXTENSIONS:
@@ -324,20 +191,23 @@ class AlchemistAPI:
 
             # ── Select mode ───────────────────────────────────────────────────
             ptype = int(prefs.get("type", 0))
-            if ptype < 0 or ptype >= len(CONVERSION_MODES):
+            modes = _conversion_modes()
+            if ptype < 0 or ptype >= len(modes):
                 return {"ok": False, "message": "Invalid conversion mode.", "commands": []}
 
-            mode    = CONVERSION_MODES[ptype]
+            mode    = modes[ptype]
             outputs = mode["outputs"]
 
             # ── Resolve tool binaries ─────────────────────────────────────────
+            job.stage("lookup")
             loc1  = prefs.get("location",  "/opt/local/bin/").rstrip("/") + "/"
             loc2  = prefs.get("location2", "/opt/homebrew/bin/").rstrip("/") + "/"
             loc3  = prefs.get("location3", "/opt/homebrew/bin/").rstrip("/") + "/"
 
-            ffmpeg_bin       = _resolve_bin(loc2, "ffmpeg")
-            ffmpeg2theora_bin = _resolve_bin(loc3, "ffmpeg2theora")
-            qt_export_bin    = _resolve_bin(loc1, "qt_export")
+            ffmpeg_bin        = tools.find("ffmpeg", loc2)
+            ffmpeg2theora_bin = tools.find("ffmpeg2theora", loc3)
+            qt_export_bin     = tools.find("qt_export", loc1)
+            ffprobe_bin       = tools.find("ffprobe", loc2)
 
             # Check FFmpeg availability for modes that need it
             needs_ffmpeg = any(o["tool"] in ("ffmpeg", "ffmpegMulti") for o in outputs)
@@ -367,125 +237,441 @@ class AlchemistAPI:
             if needs_qt and not qt_export_bin:
                 # Fall through to FFmpeg fallback — noted in output
                 qt_export_bin = None
+            verify = ffprobe_bin if prefs.get("verify", False) else None
+            if prefs.get("verify", False) and not ffprobe_bin:
+                return {
+                    "ok": False,
+                    "message": (
+                        "ffprobe not found (needed to verify outputs).\n"
+                        f"Configured path: {loc2}\n\n"
+                        "It is installed with FFmpeg: brew install ffmpeg"
+                    ),
+                    "commands": [],
+                }
+            if (prefs.get("listen") or "").strip() and not prefs.get("token"):
+                return {
+                    "ok": False,
+                    "message": (
+                        "Set a token before listening for remote workers.\n"
+                        "Workers run the commands they are sent; start them "
+                        "with the same --token."
+                    ),
+                    "commands": [],
+                }
+
+            # ── Scratch space (blank: the system temp folder) ─────────────────
+            scratch_dir = os.path.expanduser(prefs.get("scratch", "").strip()) or None
+            if scratch_dir and not os.path.isdir(scratch_dir):
+                return {
+                    "ok": False,
+                    "message": f"Scratch folder not found:\n{scratch_dir}",
+                    "commands": [],
+                }
 
             # ── Build and launch jobs in a background thread ──────────────────
+            # Each job works in its own scratch directory: pass logs and the
+            # output being written stay there until the output is published.
+            job.stage("build")
+            from history import spec
+            single_pass = bool(prefs.get("singlePass", False))
+            crf         = str(prefs.get("crf", 20))
+
             jobs = []
-            for path in paths:
-                d     = os.path.dirname(path)
-                stem  = os.path.splitext(os.path.basename(path))[0]
-                ext_i = os.path.splitext(path)[1]
-
-                for out in outputs:
-                    tool    = out["tool"]
-                    out_ext = out["ext"]
-                    out_path = os.path.join(d, stem + out_ext)
-                    note     = out.get("ffmpeg_note", "")
-
-                    if tool == "qt_tools":
-                        if qt_export_bin:
-                            preset_path = os.path.join(APP_DIR, "app", "qt_tools", out["preset"])
-                            cmd = [qt_export_bin,
-                                   f"--loadsettings={preset_path}",
-                                   path, out_path]
-                            jobs.append({"cmd": cmd, "out": out_path, "note": note, "multipass": False})
-                        else:
-                            # FFmpeg fallback
-                            ff_flags = out.get("ffmpeg_flags", [])
-                            cmd = [ffmpeg_bin, "-i", path] + ff_flags + [out_path, "-y"]
-                            jobs.append({
-                                "cmd": cmd, "out": out_path,
-                                "note": note or "qt_export not found — using FFmpeg fallback",
-                                "multipass": False
-                            })
-                    elif tool == "ffmpegMulti":
-                        log = os.path.join(os.path.expanduser("~/.Trash"), stem + out_ext)
-                        pass1 = ([ffmpeg_bin, "-i", path, "-pass", "1",
-                                  "-passlogfile", log] + out["ffmpeg_flags"] + [out_path, "-y"])
-                        pass2 = ([ffmpeg_bin, "-i", path, "-pass", "2",
-                                  "-passlogfile", log] + out["ffmpeg_flags"] + [out_path, "-y"])
-                        jobs.append({"cmd": pass1, "cmd2": pass2,
-                                     "out": out_path, "note": note, "multipass": True})
-                    elif tool == "ffmpeg2theora":
-                        flags = out["ffmpeg_flags"]
-                        cmd = [ffmpeg2theora_bin] + flags + ["-o", out_path, path]
-                        jobs.append({"cmd": cmd, "out": out_path, "note": note, "multipass": False})
-                    else:  # plain ffmpeg
-                        cmd = [ffmpeg_bin, "-i", path] + out["ffmpeg_flags"] + [out_path, "-y"]
-                        jobs.append({"cmd": cmd, "out": out_path, "note": note, "multipass": False})
+            try:
+                for path in paths:
+                    d    = os.path.dirname(path)
+                    stem = os.path.splitext(os.path.basename(path))[0]
+
+                    for out in outputs:
+                        tool     = out["tool"]
+                        out_ext  = out["ext"]
+                        out_path = os.path.join(d, stem + out_ext)
+                        note     = out.get("ffmpeg_note", "")
+                        flags    = out.get("ffmpeg_flags", [])
+
+                        if tool == "ffmpegMulti" and single_pass and _flag(flags, "-c:v") == "libx264":
+                            # Fast path: one CRF pass, capped by the same VBV settings
+                            tool, flags = "ffmpeg", _crf_flags(flags, crf)
+
+                        scratch = tempfile.mkdtemp(prefix="alchemist-", dir=scratch_dir)
+                        tmp     = os.path.join(scratch, stem + out_ext)
+
+                        if tool == "qt_tools":
+                            if qt_export_bin:
+                                preset_path = os.path.join(APP_DIR, "app", "qt_tools", out["preset"])
+                                cmds = [[qt_export_bin,
+                                         f"--loadsettings={preset_path}",
+                                         path, tmp]]
+                                kinds = [spec("qt_export" + out_ext, [out["preset"]])]
+                            else:
+                                # FFmpeg fallback
+                                cmds = [[ffmpeg_bin, "-i", path] + flags + [tmp, "-y"]]
+                                kinds = [spec("ffmpeg" + out_ext, flags)]
+                                note  = note or "qt_export not found — using FFmpeg fallback"
+                        elif tool == "ffmpegMulti":
+                            # Pass 1 only analyses the video: no audio, nothing written
+                            log   = os.path.join(scratch, "pass")
+                            video = _drop_flags(flags, _AUDIO_FLAGS)
+                            cmds  = [[ffmpeg_bin, "-i", path, "-pass", "1", "-passlogfile", log]
+                                     + video + ["-an", "-f", "null", os.devnull, "-y"],
+                                     [ffmpeg_bin, "-i", path, "-pass", "2", "-passlogfile", log]
+                                     + flags + [tmp, "-y"]]
+                            kinds = [spec("pass1", video), spec("pass2" + out_ext, flags)]
+                        elif tool == "ffmpeg2theora":
+                            cmds  = [[ffmpeg2theora_bin] + flags + ["-o", tmp, path]]
+                            kinds = [spec("ffmpeg2theora" + out_ext, flags)]
+                        else:  # plain ffmpeg
+                            cmds  = [[ffmpeg_bin, "-i", path] + flags + [tmp, "-y"]]
+                            kinds = [spec("ffmpeg" + out_ext, flags)]
+
+                        # The last command writes the output
+                        jobs.append({
+                            "cmds":    cmds,
+                            "specs":   kinds,
+                            "src":     path,
+                            "outputs": [{"tmp": tmp, "out": out_path, "cmd": len(cmds) - 1}],
+                            "note":    note,
+                            "scratch": scratch,
+                        })
+            except OSError as ex:
+                _discard(jobs)
+                return {"ok": False, "message": f"Could not create scratch space:\n{ex}",
+                        "commands": []}
 
             if not jobs:
                 return {"ok": False, "message": "No jobs were generated.", "commands": []}
 
+            # ── Estimate from past encode speeds; longest jobs first ──────────
+            job.stage("estimate")
+            from probe import probe_all
+            sources = probe_all(ffprobe_bin, paths) if ffprobe_bin else {}
+            history = _history()
+            for j in jobs:
+                j["source"] = sources.get(j["src"])
+                j["eta"]    = history.estimate(j["specs"], j["source"])
+            jobs.sort(key=_longest_first)
+            known = [j["eta"] for j in jobs if j["eta"] is not None]
+            eta   = sum(known) if len(known) == len(jobs) else None
+
+            cmd_strings = [" ".join(c) for j in jobs for c in j["cmds"]]
+            n = len(paths)
+            summary = (
+                f"{n} file{'s' if n != 1 else ''} × "
+                f"{len(outputs)} output{'s' if len(outputs) != 1 else ''} = "
+                f"{len(jobs)} job{'s' if len(jobs) != 1 else ''}"
+            )
+            if known:
+                summary += f"\nEstimated time: {_duration(sum(known))}"
+                if eta is None:
+                    summary += f" for {len(known)} of {len(jobs)} jobs"
+
+            job.stage("run")
+            if wait:
+                done = self._run_jobs(jobs, job, prefs, verify)
+                return {
+                    "ok": done["ok"],
+                    "message": f"{summary}\n{done['message']}",
+                    "label": mode["label"],
+                    "commands": cmd_strings,
+                    "jobs_total": len(jobs),
+                    "eta_seconds": eta,
+                }
+
             # Launch jobs in background thread so the UI stays responsive
-            cmd_strings = [" ".join(j["cmd"]) for j in jobs]
             threading.Thread(
                 target=self._run_jobs,
-                args=(jobs,),
+                args=(jobs, job, prefs, verify),
                 daemon=True,
             ).start()
 
-            n = len(paths)
             return {
                 "ok": True,
-                "message": (
-                    f"Encoding started:\n"
-                    f"{n} file{'s' if n != 1 else ''} × "
-                    f"{len(outputs)} output{'s' if len(outputs) != 1 else ''} = "
-                    f"{len(jobs)} job{'s' if len(jobs) != 1 else ''}"
-                ),
+                "message": f"Encoding started:\n{summary}",
                 "label": mode["label"],
                 "commands": cmd_strings,
                 "jobs_total": len(jobs),
+                "eta_seconds": eta,
             }
 
         except Exception as ex:
             return {"ok": False, "message": f"Unexpected error:\n{ex}", "commands": []}
 
-    def _run_jobs(self, jobs: list):
-        """Background worker — runs all encode jobs sequentially."""
+    def _run_jobs(self, jobs: list, job, prefs: dict, verify: str | None = None) -> dict:
+        """
+        Runs all encode jobs (here, one after another, or on worker processes
+        when the workers / listen prefs are set), then notifies the front-end
+        (if any) once and closes the metrics job.  With `verify` (the ffprobe
+        binary) each job's outputs are checked while later jobs encode, and
+        a job that fails the check is encoded again.  Returns { ok, message }.
+        """
+        from dispatch import Coordinator
+
+        def check(i, result):
+            return _verify(jobs[i], result["published"], verify)
+
         errors = []
         done   = 0
-        for j in jobs:
+        if int(prefs.get("workers", 0) or 0) > 0 or prefs.get("listen"):
+            results = _dispatch(jobs, job, prefs, check if verify else None)
+        else:
+            # In-process jobs come off the same queue the workers use
+            threads     = max(1, governor.cpu_slots() // 2)
+            coordinator = Coordinator(jobs, lease_timeout=None, check=check if verify else None)
             try:
-                cmds = [j["cmd"]]
-                if j.get("multipass"):
-                    cmds.append(j["cmd2"])
-                for cmd in cmds:
-                    result = subprocess.run(
-                        cmd,
-                        capture_output=True,
-                        text=True,
-                        timeout=3600,
-                    )
-                    if result.returncode != 0:
-                        err = (result.stderr or "").strip().split("\n")[-1]
-                        errors.append(f"{os.path.basename(j['out'])}: {err}")
-                done += 1
-            except subprocess.TimeoutExpired:
-                errors.append(f"{os.path.basename(j['out'])}: timed out")
-            except Exception as ex:
-                errors.append(f"{os.path.basename(j['out'])}: {ex}")
+                while True:
+                    reply = coordinator.lease("local")
+                    if reply.get("job"):
+                        i = reply["job"]["id"]
+                        coordinator.result("local", i, _execute(jobs[i], job, threads))
+                    elif reply.get("done"):
+                        break
+                    else:
+                        coordinator.wait(reply["wait"])
+            finally:
+                coordinator.close()
+            results = coordinator.results()
+        for j, r in zip(jobs, results):
+            _learn(j, r["times"], r.get("machine"))
+            errors += r["errors"]
+            done   += r["done"]
+
+        if errors:
+            message = "Encoding completed with errors:\n" + "\n".join(errors)
+        else:
+            message = f"Encoding complete – {done} file{'s' if done != 1 else ''} written."
+        ok = len(errors) == 0
+        job.end({"ok": ok})
 
         # Signal the front-end via evaluate_js
         if self._window:
-            if errors:
-                msg = json.dumps("Encoding completed with errors:\n" + "\n".join(errors))
-            else:
-                msg = json.dumps(f"Encoding complete – {done} file{'s' if done != 1 else ''} written.")
-            ok  = json.dumps(len(errors) == 0)
             try:
-                self._window.evaluate_js(f"onEncodingComplete({ok}, {msg})")
+                self._window.evaluate_js(
+                    f"onEncodingComplete({json.dumps(ok)}, {json.dumps(message)})"
+                )
             except Exception:
                 pass
+        return {"ok": ok, "message": message}
+
+
+# ── Job execution (here or on a worker, see worker.py) ────────────────────────
+
+def _execute(j: dict, job, threads: int) -> dict:
+    """
+    Run one job's commands, publishing each output as soon as the command
+    that writes it succeeds, and remove its scratch directory.  Returns
+    { done, errors, times: [[command index, seconds], …], published: [path, …] }.
+    """
+    errors    = []
+    done      = 0
+    times     = []
+    published = []
+    names     = ", ".join(os.path.basename(o["out"]) for o in j["outputs"])
+    try:
+        os.makedirs(j["scratch"], exist_ok=True)   # gone again if this is a retry
+        for i, cmd in enumerate(j["cmds"]):
+            # Outputs finished by this command; none for a first pass
+            made = [o for o in j["outputs"] if o["cmd"] == i]
+            with governor.acquire(cpu=threads, mem_mb=ENCODE_MEM_MB) as lease:
+                start  = time.perf_counter()
+                result = job.run(_with_threads(cmd, lease.threads),
+                                 inputs=[j["src"]], outputs=[o["tmp"] for o in made],
+                                 timeout=3600, lease=lease)
+                elapsed = time.perf_counter() - start
+            if result.returncode != 0:
+                err = (result.stderr or "").strip().split("\n")[-1]
+                if not made:
+                    # Every later command needs this one
+                    errors.append(f"{names}: {err}")
+                    break
+                errors.append(", ".join(os.path.basename(o["out"]) for o in made) + f": {err}")
+                continue
+            times.append([i, elapsed])
+            for o in made:
+                _publish(o["tmp"], o["out"])
+                published.append(o["out"])
+                done += 1
+    except subprocess.TimeoutExpired:
+        errors.append(f"{names}: timed out")
+    except Exception as ex:
+        errors.append(f"{names}: {ex}")
+    finally:
+        shutil.rmtree(j["scratch"], ignore_errors=True)
+    return {"done": done, "errors": errors, "times": times, "published": published}
+
+
+def _verify(j: dict, published: list, ffprobe_bin: str) -> list:
+    """
+    Problems with a job's published outputs, probed and compared with the
+    source.  An output that fails is removed, so nothing truncated is left
+    looking finished.  Only the job's own planned outputs are looked at,
+    whatever a worker reports.
+    """
+    from probe import probe
+    source   = j.get("source") or probe(ffprobe_bin, j["src"])
+    reported = set(published)
+    problems = []
+    for out in (o["out"] for o in j["outputs"] if o["out"] in reported):
+        problem = _mismatch(out, probe(ffprobe_bin, out), source)
+        if problem:
+            problems.append(f"{os.path.basename(out)}: {problem}")
+            try:
+                os.remove(out)
+            except OSError:
+                pass
+    return problems
+
+
+def _mismatch(path: str, info: dict | None, source: dict | None) -> str | None:
+    try:
+        if os.path.getsize(path) == 0:
+            return "empty file"
+    except OSError:
+        return "missing"
+    if info is None:
+        return "no readable video stream"
+    if not source:
+        return None
+    if source["audio"] and not info["audio"]:
+        return "audio stream missing"
+    if source["duration"]:
+        slack = max(VERIFY_SLACK_S, source["duration"] * VERIFY_SLACK)
+        if abs(info["duration"] - source["duration"]) > slack:
+            return f"duration {info['duration']:.2f} s, source {source['duration']:.2f} s"
+    expected = source["duration"] * info["fps"]
+    if expected and info["frames"] < expected * (1 - VERIFY_SLACK) - 1:
+        return f"{info['frames']} frames, expected about {round(expected)}"
+    return None
+
+
+def _learn(j: dict, times: list, machine: str | None = None):
+    """Record the speed of each finished command for future ETAs."""
+    source = j.get("source")
+    if not source or not source["frames"]:
+        return
+    for i, elapsed in times:
+        if elapsed > 0:
+            _history().record(j["specs"][i], source, source["frames"] / elapsed, machine)
+
+
+def _dispatch(jobs: list, job, prefs: dict, check=None) -> list:
+    """
+    Serve the jobs to worker processes: `workers` local ones started here,
+    plus any remote workers pointed at `listen` (host:port).  Results are
+    verified here with `check` (see dispatch.Coordinator).  Returns one
+    result per job, as _execute would.
+    """
+    from dispatch import Coordinator, portable
+
+    listen = (prefs.get("listen") or "").strip()
+    host, _, port = listen.rpartition(":") if listen else ("127.0.0.1", "", "0")
+    coordinator = Coordinator([portable(j, APP_DIR) for j in jobs],
+                              token=prefs.get("token", ""), check=check)
+    try:
+        coordinator.serve(host or "127.0.0.1", int(port or 0))
+    except (OSError, ValueError) as ex:
+        _discard(jobs)
+        return [{"done": 0, "errors": [f"Cannot listen on {listen or host}: {ex}"], "times": []}]
+
+    locs = [prefs.get(k, "") for k in ("location2", "location3", "location")]
+    cmd  = [sys.executable, os.path.join(APP_DIR, "worker.py"), coordinator.url, "--once"]
+    for loc in filter(None, locs):
+        cmd += ["--loc", loc]
+    if prefs.get("scratch"):
+        cmd += ["--scratch", os.path.expanduser(prefs["scratch"])]
+    if prefs.get("token"):
+        cmd += ["--token", prefs["token"]]
+    local = [subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+             for _ in range(int(prefs.get("workers", 0) or 0))]
+    try:
+        while not coordinator.wait(1.0):
+            # Without remote workers, stop once every local worker has gone
+            if not listen and all(p.poll() is not None for p in local):
+                coordinator.abandon("no workers left")
+    finally:
+        coordinator.close()
+        for p in local:
+            try:
+                p.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        _discard(jobs)   # the workers use scratch space of their own
+
+    results = coordinator.results()
+    for r in results:
+        job.extend(r.get("spans", []), worker=r.get("worker"))
+    return results
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
-def _resolve_bin(loc: str, name: str) -> str | None:
-    binary = os.path.join(loc.rstrip("/"), name)
-    if os.path.isfile(binary) and os.access(binary, os.X_OK):
-        return binary
-    return shutil.which(name)
+def _with_threads(cmd: list, threads: int) -> list:
+    """Cap an ffmpeg encode at the governor's thread grant (-threads after the input)."""
+    if os.path.basename(cmd[0]) != "ffmpeg" or "-i" not in cmd:
+        return cmd
+    i = cmd.index("-i") + 2
+    return cmd[:i] + ["-threads", str(threads)] + cmd[i:]
+
+
+# Audio options, left out of a first pass
+_AUDIO_FLAGS = {"-c:a", "-acodec", "-b:a", "-ab", "-ar", "-ac"}
+
+
+def _flag(flags: list, name: str):
+    return flags[flags.index(name) + 1] if name in flags[:-1] else None
+
+
+def _drop_flags(flags: list, names: set) -> list:
+    out = []
+    it  = iter(flags)
+    for f in it:
+        if f in names:
+            next(it, None)
+        else:
+            out.append(f)
+    return out
+
+
+def _crf_flags(flags: list, crf: str) -> list:
+    """Two-pass x264 flags as one CRF pass; -maxrate/-bufsize stay as the VBV cap."""
+    out = _drop_flags(flags, {"-b:v", "-minrate"})
+    i   = out.index("-c:v") + 2
+    return out[:i] + ["-crf", crf] + out[i:]
+
+
+def _longest_first(j: dict) -> tuple:
+    # Jobs without an estimate go first (biggest source first), then the rest by ETA
+    if j["eta"] is None:
+        return (0, -((j["source"] or {}).get("frames") or 0))
+    return (1, -j["eta"])
+
+
+def _duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"about {max(1, round(seconds))} s"
+    minutes = round(seconds / 60)
+    if minutes < 60:
+        return f"about {minutes} min"
+    return f"about {minutes // 60} h {minutes % 60:02d} min"
+
+
+def _publish(tmp: str, out: str):
+    """
+    Move a finished output from scratch into place in one step, so readers
+    never see it half-written.  Across filesystems it is copied next to the
+    destination first (as a hidden .partial file) and renamed from there.
+    """
+    try:
+        os.replace(tmp, out)
+        return
+    except OSError as ex:
+        if ex.errno != errno.EXDEV:
+            raise
+    atomic_copy(tmp, out)
+
+
+def _discard(jobs: list):
+    for j in jobs:
+        shutil.rmtree(j["scratch"], ignore_errors=True)
 
 
 def _decode_paths(raw: list) -> list:
@@ -498,6 +684,16 @@ def _decode_paths(raw: list) -> list:
     return out
 
 
+def is_output(path: str, prefs: dict | None = None) -> bool:
+    """True for a file named like any mode's output (clip.720p.mp4, clip.prores422.mov …)."""
+    name = os.path.basename(path).lower()
+    return any(
+        name.endswith(out["ext"].lower())
+        for mode in _conversion_modes()
+        for out in mode["outputs"]
+    )
+
+
 def _alphanum_key(path: str):
     basename = os.path.basename(path)
     parts = re.split(r"(\d+)", basename)
@@ -507,6 +703,9 @@ def _alphanum_key(path: str):
 # ── Window ────────────────────────────────────────────────────────────────────
 
 def main():
+    import webview
+    from common.startup import probe
+
     api = AlchemistAPI()
     html_path = os.path.join(APP_DIR, "app", "index.html")
 
@@ -522,8 +721,28 @@ def main():
     )
 
     api._window = window
+    probe(window)
     webview.start(debug=False)
+    _prefs.flush()
+
+
+# ── Headless ──────────────────────────────────────────────────────────────────
+
+def cli(argv: list) -> int:
+    from common.cli import run_cli
+    api = AlchemistAPI()
+    return run_cli(
+        api, argv,
+        tool="Alchemist",
+        extensions=VIDEO_EXTENSIONS,
+        process=lambda paths, prefs: api.process_files(paths, prefs, wait=True),
+        ignore=is_output,
+        description="Convert video files with the selected mode (pref 'type'), "
+                    "one JSON line per file.",
+    )
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(cli(sys.argv[1:]))
     main()
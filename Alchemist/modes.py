@@ -0,0 +1,194 @@
+"""
+Alchemist – conversion mode table.
+
+Kept out of main.py and imported on first use, so importing the API (tests,
+the headless CLI, the startup benchmark) does not build it.
+"""
+
+# ── Conversion mode table ─────────────────────────────────────────────────────
+# Each entry: (label, tool, [output_spec, ...])
+# output_spec: (flags_list, output_extension, multipass?)
+#
+# tool values:
+#   "qt_tools"    → qt_export --loadsettings (legacy)
+#   "ffmpeg"      → single-pass ffmpeg
+#   "ffmpegMulti" → two-pass ffmpeg
+#   "ffmpeg2theora"
+#
+# Note: qt_export uses the bundled binary .st preset files shipped in app/qt_tools/
+# FFmpeg equivalents are provided for all modes so the app works on modern macOS.
+
+CONVERSION_MODES = [
+    # 0 – ProRes 422
+    {
+        "label": "QuickTime ProRes 422",
+        "outputs": [
+            {
+                "tool":    "qt_tools",
+                "preset":  "qt_export_prores422.st",
+                "ext":     ".prores422.mov",
+                # Modern ffmpeg fallback
+                "ffmpeg_flags": ["-c:v", "prores_ks", "-profile:v", "2",
+                                 "-c:a", "pcm_s16le"],
+            },
+        ],
+    },
+    # 1 – HDV 1080p
+    {
+        "label": "QuickTime HDV 1080p",
+        "outputs": [
+            {
+                "tool":    "qt_tools",
+                "preset":  "qt_export_hdv_1080p.st",
+                "ext":     ".hdv1080.mov",
+                "ffmpeg_flags": ["-c:v", "mpeg2video", "-b:v", "25M",
+                                 "-vf", "scale=1440:1080", "-c:a", "ac3", "-b:a", "192k"],
+            },
+        ],
+    },
+    # 2 – HDV 720p
+    {
+        "label": "QuickTime HDV 720p",
+        "outputs": [
+            {
+                "tool":    "qt_tools",
+                "preset":  "qt_export_hdv_720p.st",
+                "ext":     ".hdv720.mov",
+                "ffmpeg_flags": ["-c:v", "mpeg2video", "-b:v", "19.7M",
+                                 "-vf", "scale=1280:720", "-c:a", "ac3", "-b:a", "192k"],
+            },
+        ],
+    },
+    # 3 – Apple Intermediate Codec (AIC) — no modern ffmpeg equivalent
+    {
+        "label": "QuickTime AIC",
+        "outputs": [
+            {
+                "tool":    "qt_tools",
+                "preset":  "qt_export_aic.st",
+                "ext":     ".aic.mov",
+                # AIC has no open codec; best alternative is ProRes LT
+                "ffmpeg_flags": ["-c:v", "prores_ks", "-profile:v", "1",
+                                 "-c:a", "pcm_s16le"],
+                "ffmpeg_note": "AIC has no open FFmpeg codec; using ProRes LT as fallback",
+            },
+        ],
+    },
+    # 4 – HTML5 (MP4 + OGG + WebM at 720p and 540p)
+    {
+        "label": "MP4, OGG, WebM  720p / 540p",
+        "outputs": [
+            {
+                "tool":       "ffmpegMulti",
+                "ffmpeg_flags": ["-c:v", "libx264", "-b:v", "1536k",
+                                  "-minrate", "128k", "-maxrate", "3072k", "-bufsize", "224k",
+                                  "-vf", "lutyuv=y=gammaval(1.2),scale=1280:720",
+                                  "-c:a", "aac", "-b:a", "160k"],
+                "ext":        ".720p.mp4",
+            },
+            {
+                "tool":       "ffmpegMulti",
+                "ffmpeg_flags": ["-c:v", "libx264", "-b:v", "1024k",
+                                  "-minrate", "128k", "-maxrate", "2560k", "-bufsize", "224k",
+                                  "-vf", "lutyuv=y=gammaval(1.2),scale=960:540",
+                                  "-c:a", "aac", "-b:a", "128k"],
+                "ext":        ".540p.mp4",
+            },
+            {
+                "tool":       "ffmpeg",
+                "ffmpeg_flags": ["-c:v", "libx264", "-crf", "18",
+                                  "-trellis", "1", "-me_range", "32",
+                                  "-i_qfactor", "0.71", "-g", "60",
+                                  "-sc_threshold", "20", "-qmin", "4", "-qmax", "48",
+                                  "-qdiff", "8",
+                                  "-vf", "lutyuv=y=gammaval(1.2),scale=1280:720",
+                                  "-c:a", "aac", "-b:a", "160k"],
+                "ext":        ".720p.Q.mp4",
+            },
+            {
+                "tool":       "ffmpeg",
+                "ffmpeg_flags": ["-c:v", "libx264", "-crf", "18",
+                                  "-trellis", "1", "-me_range", "32",
+                                  "-i_qfactor", "0.71", "-g", "60",
+                                  "-sc_threshold", "20", "-qmin", "4", "-qmax", "48",
+                                  "-qdiff", "8",
+                                  "-vf", "lutyuv=y=gammaval(1.2),scale=960:540",
+                                  "-c:a", "aac", "-b:a", "128k"],
+                "ext":        ".540p.Q.mp4",
+            },
+            {
+                "tool":       "ffmpeg2theora",
+                "ffmpeg_flags": ["-V", "2560k", "-A", "160k",
+                                  "--two-pass", "--speedlevel", "0",
+                                  "--max_size", "1280x720"],
+                "ext":        ".720p.ogg",
+            },
+            {
+                "tool":       "ffmpeg2theora",
+                "ffmpeg_flags": ["-V", "1920k", "-A", "128k",
+                                  "--two-pass", "--speedlevel", "0",
+                                  "--max_size", "960x540"],
+                "ext":        ".540p.ogg",
+            },
+            {
+                "tool":       "ffmpeg",
+                "ffmpeg_flags": ["-c:v", "libvpx", "-b:v", "1280k",
+                                  "-minrate", "0k", "-maxrate", "2048k", "-bufsize", "224k",
+                                  "-vf", "lutyuv=y=gammaval(1.1),scale=1280:720",
+                                  "-f", "webm", "-c:a", "libvorbis", "-b:a", "160k"],
+                "ext":        ".720p.webm",
+            },
+            {
+                "tool":       "ffmpeg",
+                "ffmpeg_flags": ["-c:v", "libvpx", "-b:v", "1024k",
+                                  "-minrate", "0k", "-maxrate", "1536k", "-bufsize", "224k",
+                                  "-vf", "lutyuv=y=gammaval(1.1),scale=960:540",
+                                  "-f", "webm", "-c:a", "libvorbis", "-b:a", "128k"],
+                "ext":        ".540p.webm",
+            },
+        ],
+    },
+    # 5 – Desktop (MP4 + WMV 720p)
+    {
+        "label": "MP4, WMV  720p",
+        "outputs": [
+            {
+                "tool":       "ffmpegMulti",
+                "ffmpeg_flags": ["-c:v", "libx264", "-b:v", "2048k",
+                                  "-minrate", "128k", "-maxrate", "4096k", "-bufsize", "224k",
+                                  "-vf", "lutyuv=y=gammaval(1.2),scale=1280:720",
+                                  "-c:a", "aac", "-b:a", "160k"],
+                "ext":        ".720p.mp4",
+            },
+            {
+                "tool":       "ffmpegMulti",
+                "ffmpeg_flags": ["-c:v", "wmv2", "-b:v", "3072k",
+                                  "-vf", "lutyuv=y=gammaval(1.2),scale=1280:720",
+                                  "-c:a", "wmav2", "-b:a", "160k"],
+                "ext":        ".720p.wmv",
+            },
+        ],
+    },
+    # 6 – Mobile (MP4 480p + 360p)
+    {
+        "label": "MP4  480p / 360p",
+        "outputs": [
+            {
+                "tool":       "ffmpegMulti",
+                "ffmpeg_flags": ["-c:v", "libx264", "-b:v", "1024k",
+                                  "-minrate", "128k", "-maxrate", "1536k", "-bufsize", "224k",
+                                  "-vf", "scale=854:480",
+                                  "-c:a", "aac", "-b:a", "128k"],
+                "ext":        ".480p.mp4",
+            },
+            {
+                "tool":       "ffmpegMulti",
+                "ffmpeg_flags": ["-c:v", "libx264", "-b:v", "768k",
+                                  "-minrate", "128k", "-maxrate", "1280k", "-bufsize", "224k",
+                                  "-vf", "scale=640:360",
+                                  "-c:a", "aac", "-b:a", "128k"],
+                "ext":        ".360p.mp4",
+            },
+        ],
+    },
+]
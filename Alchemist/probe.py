@@ -0,0 +1,69 @@
+"""
+Source inspection with ffprobe (installed alongside ffmpeg).
+
+probe(ffprobe_bin, path) → { width, height, codec, fps, duration, frames,
+audio } for the first video stream (audio is the number of audio streams),
+or None when the file has no readable video.  The frame count comes from
+the container when it records one, otherwise from duration × frame rate.
+"""
+
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _rate(text: str) -> float:
+    try:
+        num, _, den = (text or "0/1").partition("/")
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def _number(value, cast=float):
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def probe(ffprobe_bin: str, path: str, timeout: float = 30) -> dict | None:
+    try:
+        p = subprocess.run(
+            [ffprobe_bin, "-v", "error", "-of", "json",
+             "-show_entries",
+             "stream=codec_type,codec_name,width,height,avg_frame_rate,r_frame_rate,"
+             "nb_frames,duration:format=duration",
+             path],
+            capture_output=True, text=True, timeout=timeout,
+        )
+        data = json.loads(p.stdout or "{}")
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+    streams = data.get("streams") or []
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    if video is None:
+        return None
+
+    fps = _rate(video.get("avg_frame_rate")) or _rate(video.get("r_frame_rate"))
+    duration = (_number(video.get("duration"))
+                or _number((data.get("format") or {}).get("duration")) or 0.0)
+    frames = _number(video.get("nb_frames"), int) or int(round(duration * fps))
+    return {
+        "width":    _number(video.get("width"), int) or 0,
+        "height":   _number(video.get("height"), int) or 0,
+        "codec":    video.get("codec_name") or "",
+        "fps":      round(fps, 3),
+        "duration": round(duration, 3),
+        "frames":   frames,
+        "audio":    sum(1 for s in streams if s.get("codec_type") == "audio"),
+    }
+
+
+def probe_all(ffprobe_bin: str, paths: list, workers: int = 8) -> dict:
+    """{path: probe(...)} for every path, probed concurrently."""
+    if not paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        return dict(zip(paths, pool.map(lambda p: probe(ffprobe_bin, p), paths)))
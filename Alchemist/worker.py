@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Alchemist encode worker.
+
+Leases jobs from an Alchemist coordinator (see dispatch.py) and encodes
+them with this machine's FFmpeg / ffmpeg2theora / qt_export:
+
+    python worker.py http://HOST:PORT [--loc DIR …] [--scratch DIR] [--token T] [--once]
+
+Alchemist starts local workers itself (the workers pref).  On another
+machine, start one per node and set Alchemist's listen pref to HOST:PORT;
+the worker keeps polling, so it picks up every batch sent to that address.
+Sources and output folders must be reachable under the same paths as on
+the coordinating machine (a shared volume).  Each worker prints one JSON
+line per finished job.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+import main as alchemist  # noqa: E402
+from common import governor, tools  # noqa: E402
+from common.metrics import Metrics  # noqa: E402
+from dispatch import TOOLS  # noqa: E402
+from history import machine  # noqa: E402
+
+_metrics = Metrics("Alchemist worker")
+
+
+def _post(url: str, path: str, body: dict, token: str, timeout: float = 30) -> dict:
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["X-Alchemist-Token"] = token
+    request = urllib.request.Request(url + path, data=json.dumps(body).encode(), headers=headers)
+    with urllib.request.urlopen(request, timeout=timeout) as reply:
+        return json.loads(reply.read() or b"{}")
+
+
+def _find(name: str, locs: list) -> str | None:
+    """`name` in the first of `locs` that has it, else on PATH."""
+    for loc in locs:
+        path = tools.find(name, loc)
+        if path and os.path.dirname(path) == loc.rstrip("/"):
+            return path
+    return tools.find(name)
+
+
+def localise(job: dict, scratch: str, locs: list) -> dict | str:
+    """The wire job with local tool paths and scratch, or an error message."""
+    cmds = []
+    for cmd in job["cmds"]:
+        if cmd[0] not in TOOLS:
+            return f"{cmd[0]} is not an Alchemist tool"
+        path = _find(cmd[0], locs)
+        if not path:
+            return f"{cmd[0]} not found on this worker"
+        cmds.append([path] + [a.replace("{scratch}", scratch).replace("{app}", APP_DIR)
+                              for a in cmd[1:]])
+    outputs = [{**o, "tmp": o["tmp"].replace("{scratch}", scratch)} for o in job["outputs"]]
+    return {**job, "cmds": cmds, "outputs": outputs, "scratch": scratch}
+
+
+def run_one(url: str, name: str, job: dict, interval: float, args) -> dict:
+    scratch = tempfile.mkdtemp(prefix="alchemist-", dir=args.scratch or None)
+    local   = localise(job, scratch, args.loc)
+    if isinstance(local, str):
+        shutil.rmtree(scratch, ignore_errors=True)
+        names  = ", ".join(os.path.basename(o["out"]) for o in job["outputs"])
+        result = {"done": 0, "errors": [f"{names}: {local}"], "times": []}
+    else:
+        # Heartbeats keep the lease while the encode runs
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(interval):
+                try:
+                    _post(url, "/heartbeat", {"worker": name, "id": job["id"]}, args.token)
+                except OSError:
+                    pass
+
+        threading.Thread(target=beat, daemon=True).start()
+        metrics = _metrics.start("job", id=job["id"])
+        try:
+            result = alchemist._execute(local, metrics, max(1, governor.cpu_slots() // 2))
+        finally:
+            stop.set()
+        metrics.end({"ok": not result["errors"]})
+        result["spans"] = metrics.record["spans"]
+
+    result["machine"] = machine()
+    try:
+        _post(url, "/result", {"worker": name, "id": job["id"], **result}, args.token)
+    except OSError:
+        pass
+    return result
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(prog="worker.py", description="Alchemist encode worker")
+    parser.add_argument("coordinator", metavar="URL", help="coordinator address, http://HOST:PORT")
+    parser.add_argument("--loc", action="append", default=[], metavar="DIR",
+                        help="directory to look for the tools in before PATH (repeatable)")
+    parser.add_argument("--scratch", metavar="DIR", help="scratch directory (default: temp)")
+    parser.add_argument("--token", default="", help="shared token, if the coordinator has one")
+    parser.add_argument("--name", help="worker name (default: host:pid)")
+    parser.add_argument("--once", action="store_true",
+                        help="exit when the batch is done or the coordinator goes away")
+    parser.add_argument("--poll", type=float, default=2.0, metavar="SECONDS",
+                        help="retry interval while idle or unreachable (default 2)")
+    args = parser.parse_args(argv)
+
+    url  = args.coordinator.rstrip("/")
+    name = args.name or f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        try:
+            reply = _post(url, "/lease", {"worker": name}, args.token)
+        except (OSError, ValueError):
+            if args.once:
+                return 0
+            time.sleep(args.poll)
+            continue
+
+        if reply.get("job"):
+            result = run_one(url, name, reply["job"], reply.get("heartbeat", 10.0), args)
+            print(json.dumps({"worker": name, "id": reply["job"]["id"],
+                              "ok": not result["errors"], "errors": result["errors"]}),
+                  flush=True)
+        elif reply.get("done") and args.once:
+            return 0
+        else:
+            time.sleep(reply.get("wait", args.poll))
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -36,9 +36,13 @@ let prefAccuracy  = 1;
 let prefGroup     = "group";
 let prefName      = "name";
 let prefScroll    = 0;
+let prefPaletteCount  = 6;
+let prefPaletteMethod = 0;
 
 // ── Clipboard import staging area ─────────────────────────────────────────────
 let clipboardImport = null;
+// Palette file awaiting Replace / Add (parsed by Python when confirmed)
+let fileImport = null;
 
 
 // ─────────────────────────────────────────────────────────────────────────────
@@ -82,6 +86,8 @@ async function savePrefs() {
     group:        prefGroup,
     name:         prefName,
     scroll:       prefScroll,
+    paletteCount:  prefPaletteCount,
+    paletteMethod: prefPaletteMethod,
   };
   if (window.pywebview) {
     await window.pywebview.api.save_prefs(prefs);
@@ -123,6 +129,8 @@ async function init() {
     prefGroup     = saved.group ?? "group";
     prefName      = saved.name  ?? "name";
     prefScroll    = parseInt(saved.scroll    ?? 0);
+    prefPaletteCount  = parseInt(saved.paletteCount  ?? 6);
+    prefPaletteMethod = parseInt(saved.paletteMethod ?? 0);
   }
 
   // Apply settings dropdowns
@@ -131,6 +139,13 @@ async function init() {
   el("formatHSV").value = prefFormatHSV;
   el("formatRGB").value = prefFormatRGB;
   el("accuracy").value  = prefAccuracy;
+  el("paletteCount").value  = prefPaletteCount;
+  el("paletteMethod").value = prefPaletteMethod;
+
+  // Dropped images become a new library group (see extractPalettes)
+  const front = el("front");
+  front.addEventListener("dragover", event => event.preventDefault());
+  front.addEventListener("drop", extractPalettes);
 
   updateAll();
   processLibrary();
@@ -210,6 +225,12 @@ function updateAccuracy() {
   savePrefs();
 }
 
+function updatePalette() {
+  prefPaletteCount  = parseInt(el("paletteCount").value);
+  prefPaletteMethod = parseInt(el("paletteMethod").value);
+  savePrefs();
+}
+
 function updateGroup() { prefGroup = el("groupTitle").value; }
 function updateName()  { prefName  = el("nameTitle").value; }
 
@@ -654,6 +675,7 @@ async function exportLibrary() {
   const clean = arrayClean(prefLibrary);
   const csv   = clean.map(row => row.join(",")).join("\n");
   await clipWrite(csv);
+  el("lib-export-msg").textContent = "Library copied to clipboard.";
   showLibraryExportOk();
 }
 
@@ -663,6 +685,7 @@ async function exportLibrary() {
  */
 async function importLibrary() {
   const raw = await clipRead();
+  el("lib-import-fail-msg").textContent = "Clipboard does not contain valid Chroma CSV data.";
   if (!raw || raw.length < 24) return showLibraryImportFail();
 
   let rows = raw.trim().split("\n").map(line => line.split(","));
@@ -679,7 +702,56 @@ async function importLibrary() {
   showLibraryImportConfirm();
 }
 
+/**
+ * Export the library to a CSV / ASE / GPL file chosen in a save dialog.
+ * Python streams the stored library straight to disk.
+ */
+async function exportLibraryFile() {
+  if (!window.pywebview) return exportLibrary();
+  const path = await window.pywebview.api.choose_library_file(true);
+  if (!path) return;
+  await savePrefs();
+  const result = await window.pywebview.api.export_library_file(path);
+  if (!result.ok) {
+    el("lib-export-fail-msg").textContent = result.message;
+    return showLibraryExportFail();
+  }
+  el("lib-export-msg").textContent = result.message;
+  showLibraryExportOk();
+}
+
+/**
+ * Pick a CSV / ASE / GPL palette file and ask whether to replace or add.
+ */
+async function importLibraryFile() {
+  if (!window.pywebview) return importLibrary();
+  const path = await window.pywebview.api.choose_library_file(false);
+  if (!path) return;
+  const result = await window.pywebview.api.scan_library_file(path);
+  if (!result.ok) {
+    el("lib-import-fail-msg").textContent = result.message;
+    return showLibraryImportFail();
+  }
+  fileImport = path;
+  el("lib-import-count").textContent = `${result.message} Replace or add?`;
+  showLibraryImportConfirm();
+}
+
+async function importFile(replace) {
+  const path = fileImport;
+  fileImport = null;
+  await savePrefs();
+  const result = await window.pywebview.api.import_library_file(path, replace);
+  if (!result.ok) {
+    el("lib-import-fail-msg").textContent = result.message;
+    return showLibraryImportFail();
+  }
+  await reloadLibrary();
+  showLibraryImportSuccess();
+}
+
 function importLibraryReplace() {
+  if (fileImport) return importFile(true);
   prefLibrary = clipboardImport;
   clipboardImport = null;
   processLibrary();
@@ -687,14 +759,69 @@ function importLibraryReplace() {
 }
 
 function importLibraryAdd() {
+  if (fileImport) return importFile(false);
   prefLibrary = prefLibrary.concat(clipboardImport);
   clipboardImport = null;
   processLibrary();
   showLibraryImportSuccess();
 }
 
+/**
+ * Reload the library from stored prefs after Python has written to it
+ * (palette extraction, file import).
+ */
+async function reloadLibrary() {
+  const saved = await loadPrefsFromStorage();
+  if (saved) prefLibrary = unpackLibrary(saved.library ?? "");
+  processLibrary();
+}
+
+
+// ─────────────────────────────────────────────────────────────────────────────
+// Palette extraction  (drop images or folders onto the front panel)
+// ─────────────────────────────────────────────────────────────────────────────
+
+async function extractPalettes(event) {
+  event.stopPropagation();
+  event.preventDefault();
+  if (!window.pywebview) return;
+
+  let filePaths = [];
+  if (event.dataTransfer.items && event.dataTransfer.items.length > 0) {
+    for (const item of event.dataTransfer.items) {
+      if (item.kind === "file") {
+        const f = item.getAsFile();
+        if (f) {
+          const p = f.path || f.name;
+          filePaths.push(p.startsWith("/") ? "file://" + p : p);
+        }
+      }
+    }
+  }
+  if (filePaths.length === 0) {
+    const raw = event.dataTransfer.getData("text/uri-list");
+    if (raw) {
+      filePaths = raw.trim().split(/\r?\n/).filter(u => u && !u.startsWith("#"));
+    }
+  }
+  if (filePaths.length === 0) return;
+
+  updateScroll();
+  const result = await window.pywebview.api.extract_palettes(filePaths, {
+    paletteCount:  prefPaletteCount,
+    paletteMethod: prefPaletteMethod,
+  });
+  if (!result.ok) {
+    el("lib-import-fail-msg").textContent = result.message;
+    showBack();
+    return showLibraryImportFail();
+  }
+  await reloadLibrary();
+}
+
 function importLibraryCancel() {
   clipboardImport = null;
+  fileImport = null;
   showLibraryMenu();
 }
 
@@ -924,6 +1051,7 @@ function showAlert() {
 function showLibraryMenu() {
   el("panel-lib-menu").classList.remove("hidden");
   el("panel-lib-export-ok").classList.add("hidden");
+  el("panel-lib-export-fail").classList.add("hidden");
   el("panel-lib-import-confirm").classList.add("hidden");
   el("panel-lib-import-fail").classList.add("hidden");
   el("panel-lib-import-success").classList.add("hidden");
@@ -934,6 +1062,11 @@ function showLibraryExportOk() {
   el("panel-lib-export-ok").classList.remove("hidden");
 }
 
+function showLibraryExportFail() {
+  el("panel-lib-menu").classList.add("hidden");
+  el("panel-lib-export-fail").classList.remove("hidden");
+}
+
 function showLibraryImportConfirm() {
   el("panel-lib-menu").classList.add("hidden");
   el("panel-lib-import-confirm").classList.remove("hidden");
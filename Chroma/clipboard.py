@@ -0,0 +1,256 @@
+"""
+Chroma – cached, asynchronous system clipboard.
+
+The backend is detected once, in the background, when the Clipboard is
+created:
+    appkit   NSPasteboard via PyObjC (macOS; PyObjC ships with pywebview there)
+    tk       one long-lived Tk helper process that owns the X11 selection
+             while Chroma runs; on quit the last copy is handed once to
+             xclip / xsel when installed, which keep serving it (the
+             helper's copy would go with it)
+    command  pbcopy/pbpaste, wl-copy/wl-paste, xclip or xsel, resolved once
+
+Writes return immediately and are applied by a single worker thread.  While a
+write is in flight only the newest pending text is kept, so a burst of copies
+costs one clipboard update rather than one per click.  Reads wait for pending
+writes so a paste always sees the last copy.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+
+# Runs in a child interpreter for as long as Chroma runs and answers one JSON
+# request per line on stdin.  Whatever it writes is owned by the helper and
+# lost when it exits.
+_TK_HELPER = r"""
+import json, sys, tkinter
+root = tkinter.Tk()
+root.withdraw()
+
+def handle(*_):
+    line = sys.stdin.readline()
+    if not line:
+        root.destroy()
+        return
+    msg = json.loads(line)
+    if msg["op"] == "write":
+        root.clipboard_clear()
+        root.clipboard_append(msg["text"])
+        root.update()
+        reply = {"ok": True}
+    else:
+        try:
+            reply = {"ok": True, "text": root.clipboard_get()}
+        except tkinter.TclError:
+            reply = {"ok": False, "text": None}
+    sys.stdout.write(json.dumps(reply) + "\n")
+    sys.stdout.flush()
+
+root.tk.createfilehandler(sys.stdin, tkinter.READABLE, handle)
+print("ready", flush=True)
+root.mainloop()
+"""
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+
+class _AppKitBackend:
+    name = "appkit"
+
+    def __init__(self):
+        from AppKit import NSPasteboard, NSPasteboardTypeString
+        self._board = NSPasteboard.generalPasteboard()
+        self._type  = NSPasteboardTypeString
+
+    def write(self, text: str) -> bool:
+        self._board.clearContents()
+        return bool(self._board.setString_forType_(text, self._type))
+
+    def read(self) -> str | None:
+        text = self._board.stringForType_(self._type)
+        return str(text) if text is not None else None
+
+    def close(self):
+        pass
+
+
+class _TkBackend:
+    name = "tk"
+
+    def __init__(self, writer=None):
+        self._writer = writer    # a _CommandBackend that outlives Chroma, if any
+        self._last   = None      # last text written, handed to the writer on close
+        self._lock   = threading.Lock()
+        self._proc   = subprocess.Popen(
+            [sys.executable, "-c", _TK_HELPER],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+        )
+        if self._proc.stdout.readline().strip() != "ready":
+            self._proc.kill()
+            raise OSError("clipboard helper failed to start")
+
+    def _request(self, msg: dict) -> dict:
+        # One request in flight at a time; the helper reads line by line
+        with self._lock:
+            self._proc.stdin.write(json.dumps(msg) + "\n")
+            self._proc.stdin.flush()
+            line = self._proc.stdout.readline()
+        if not line:
+            raise OSError("clipboard helper exited")
+        return json.loads(line)
+
+    def write(self, text: str) -> bool:
+        ok = bool(self._request({"op": "write", "text": text}).get("ok"))
+        if ok:
+            self._last = text
+        return ok
+
+    def read(self) -> str | None:
+        return self._request({"op": "read"}).get("text")
+
+    def close(self):
+        if self._writer and self._last is not None:
+            try:
+                self._writer.write(self._last)
+            except Exception:
+                pass
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=2)
+        except Exception:
+            self._proc.kill()
+
+
+class _CommandBackend:
+    name = "command"
+
+    def __init__(self, copy_cmd: list, paste_cmd: list):
+        self.copy_cmd  = copy_cmd
+        self.paste_cmd = paste_cmd
+
+    def write(self, text: str) -> bool:
+        p = subprocess.run(self.copy_cmd, input=text.encode(), timeout=5)
+        return p.returncode == 0
+
+    def read(self) -> str | None:
+        result = subprocess.run(self.paste_cmd, capture_output=True, timeout=5)
+        if result.returncode == 0:
+            return result.stdout.decode("utf-8", errors="replace")
+        return None
+
+    def close(self):
+        pass
+
+
+def _command_backend():
+    """First available clipboard command pair, looked up once on PATH."""
+    candidates = [
+        (["pbcopy"], ["pbpaste"]),
+        (["xclip", "-selection", "clipboard"], ["xclip", "-selection", "clipboard", "-o"]),
+        (["xsel", "--clipboard", "--input"], ["xsel", "--clipboard", "--output"]),
+    ]
+    if os.environ.get("WAYLAND_DISPLAY"):
+        candidates.insert(0, (["wl-copy"], ["wl-paste", "--no-newline"]))
+    for copy_cmd, paste_cmd in candidates:
+        copy_bin, paste_bin = shutil.which(copy_cmd[0]), shutil.which(paste_cmd[0])
+        if copy_bin and paste_bin:
+            return _CommandBackend([copy_bin] + copy_cmd[1:], [paste_bin] + paste_cmd[1:])
+    return None
+
+
+def detect_backend():
+    """Pick the cheapest working clipboard backend for this machine."""
+    if sys.platform == "darwin":
+        try:
+            return _AppKitBackend()
+        except Exception:
+            pass
+    elif os.environ.get("DISPLAY"):
+        command = _command_backend()
+        try:
+            return _TkBackend(writer=command)
+        except Exception:
+            return command
+    return _command_backend()
+
+
+# ── Clipboard ─────────────────────────────────────────────────────────────────
+
+class Clipboard:
+    def __init__(self):
+        self._backend  = None
+        self._detected = threading.Event()
+        self._cond     = threading.Condition()
+        self._pending  = None    # newest text not yet written
+        self._busy     = False
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    @property
+    def backend(self) -> str | None:
+        self._detected.wait()
+        return self._backend.name if self._backend else None
+
+    def write(self, text: str) -> bool:
+        """Queue `text` for the clipboard; returns False only if none exists."""
+        if self._detected.is_set() and self._backend is None:
+            return False
+        with self._cond:
+            self._pending = text
+            self._cond.notify_all()
+        return True
+
+    def read(self) -> str | None:
+        self._detected.wait()
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending is None and not self._busy)
+        if self._backend is None:
+            return None
+        try:
+            return self._backend.read()
+        except Exception:
+            self._fall_back()
+            return self._backend.read() if self._backend else None
+
+    def close(self):
+        """Apply a pending write, then release the backend."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout=5)
+        if self._backend:
+            self._backend.close()
+
+    def _fall_back(self):
+        """The helper died – switch to the command backend for good."""
+        if self._backend and self._backend.name != "command":
+            self._backend.close()
+            self._backend = _command_backend()
+
+    def _worker(self):
+        self._backend = detect_backend()
+        self._detected.set()
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                text, self._pending = self._pending, None
+                self._busy = True
+            try:
+                if self._backend:
+                    try:
+                        self._backend.write(text)
+                    except Exception:
+                        self._fall_back()
+                        if self._backend:
+                            self._backend.write(text)
+            except Exception:
+                pass
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
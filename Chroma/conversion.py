@@ -0,0 +1,264 @@
+"""
+Chroma – vectorised colour conversion.
+
+NumPy ports of the single-colour converters in app/app.js (RGBtoHSV, HSVtoRGB,
+RGBtoHEX, HEXtoRGB, libraryConvert), extended with linear RGB, CIE Lab and
+OKLab.  Every function takes and returns whole arrays so large libraries can
+be converted in one pass.
+
+Value ranges follow the library format:
+    hsv     H=0–360, S/V=0–1
+    rgb     gamma-encoded sRGB, 0–1
+    hex     6-char uppercase strings (a leading "#" is accepted on input)
+    linear  linear-light sRGB, 0–1
+    lab     CIE L*a*b* (D65), L=0–100
+    oklab   OKLab, L=0–1
+
+Requires:  pip install numpy
+"""
+
+import numpy as np
+
+SPACES = ("hsv", "rgb", "hex", "linear", "lab", "oklab")
+
+# ── Lookup tables ─────────────────────────────────────────────────────────────
+_HEX_PAIRS = np.array([f"{i:02X}".encode() for i in range(256)], dtype="S2")
+
+_HEX_NIBBLES = np.zeros(256, dtype=np.uint8)
+_HEX_DIGIT   = np.zeros(256, dtype=bool)
+for _i, _c in enumerate(b"0123456789ABCDEF"):
+    _HEX_NIBBLES[_c] = _i
+    _HEX_DIGIT[_c]   = True
+for _i, _c in enumerate(b"abcdef"):
+    _HEX_NIBBLES[_c] = 10 + _i
+    _HEX_DIGIT[_c]   = True
+
+# sRGB (D65) ↔ CIE XYZ
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_XYZ_TO_RGB = np.linalg.inv(_RGB_TO_XYZ)
+_D65_WHITE  = np.array([0.95047, 1.0, 1.08883])
+
+# OKLab (Björn Ottosson), linear sRGB → LMS → OKLab
+_RGB_TO_LMS = np.array([
+    [0.4122214708, 0.5363325363, 0.0514459929],
+    [0.2119034982, 0.6806995451, 0.1073969566],
+    [0.0883024619, 0.2817188376, 0.6299787005],
+])
+_LMS_TO_OKLAB = np.array([
+    [0.2104542553,  0.7936177850, -0.0040720468],
+    [1.9779984951, -2.4285922050,  0.4505937099],
+    [0.0259040371,  0.7827717662, -0.8086757660],
+])
+_LMS_TO_RGB   = np.linalg.inv(_RGB_TO_LMS)
+_OKLAB_TO_LMS = np.linalg.inv(_LMS_TO_OKLAB)
+
+
+def _triples(values) -> np.ndarray:
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim == 1:
+        arr = arr.reshape(-1, 3)
+    if arr.shape[-1] != 3:
+        raise ValueError(f"Expected colour triples, got shape {arr.shape}")
+    return arr
+
+
+# ── HSV ───────────────────────────────────────────────────────────────────────
+
+def rgb_to_hsv(rgb) -> np.ndarray:
+    """RGB (0–1) → HSV (H=0–360, S/V=0–1).  Mirrors RGBtoHSV."""
+    rgb = _triples(rgb)
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    mx = rgb.max(axis=1)
+    mn = rgb.min(axis=1)
+    d  = mx - mn
+
+    s = np.divide(d, mx, out=np.zeros_like(mx), where=mx > 0)
+
+    safe = np.where(d == 0, 1.0, d)
+    h = np.where(mx == r, (g - b) / safe + np.where(g < b, 6.0, 0.0),
+        np.where(mx == g, (b - r) / safe + 2.0,
+                          (r - g) / safe + 4.0))
+    h = np.where((d == 0) | (s == 0), 0.0, h * 60.0)
+    return np.stack([h, s, mx], axis=1)
+
+
+def hsv_to_rgb(hsv) -> np.ndarray:
+    """HSV (H=0–360, S/V=0–1) → RGB (0–1).  Mirrors HSVtoRGB."""
+    hsv = _triples(hsv)
+    h6 = hsv[:, 0] / 60.0
+    s  = hsv[:, 1]
+    v  = hsv[:, 2]
+
+    i = np.floor(h6)
+    f = h6 - i
+    i = i.astype(np.int64) % 6
+    p = v * (1 - s)
+    q = v * (1 - f * s)
+    t = v * (1 - (1 - f) * s)
+
+    r = np.choose(i, [v, q, p, p, t, v])
+    g = np.choose(i, [t, v, v, q, p, p])
+    b = np.choose(i, [p, p, t, v, v, q])
+    return np.stack([r, g, b], axis=1)
+
+
+# ── HEX ───────────────────────────────────────────────────────────────────────
+
+def rgb_to_hex(rgb) -> np.ndarray:
+    """RGB (0–1) → array of 6-char uppercase HEX strings.  Mirrors RGBtoHEX."""
+    rgb = _triples(rgb)
+    # floor(x + 0.5) matches JS Math.round rather than banker's rounding
+    idx = np.clip(np.floor(rgb * 255 + 0.5), 0, 255).astype(np.uint8)
+    return _HEX_PAIRS[idx].view("S6").ravel().astype("U6")
+
+
+def hex_to_rgb(hexes) -> np.ndarray:
+    """
+    HEX strings (RRGGBB or RGB, with or without "#") → RGB (0–1).  Mirrors
+    HEXtoRGB.  Raises ValueError on anything else.
+    """
+    raw = np.asarray(hexes, dtype=str).reshape(-1)
+    if raw.size == 0:
+        return np.empty((0, 3))
+    arr = np.char.strip(raw)
+    arr = np.where(np.char.startswith(arr, "#"), np.char.replace(arr, "#", "", count=1), arr)
+    length = np.char.str_len(arr)
+    bad = (length != 6) & (length != 3)
+    if bad.any():
+        raise ValueError(f"Invalid HEX colour: {str(raw[bad.argmax()])!r}")
+
+    # Work on the UTF-32 code points directly; str → bytes per element is slow
+    codes = np.ascontiguousarray(arr.astype("U6")).view(np.uint32).reshape(len(arr), 6)
+    short = length == 3
+    codes[short] = np.repeat(codes[short, :3], 2, axis=1)   # #F80 → #FF8800
+    bad = ~(_HEX_DIGIT[np.minimum(codes, 255)] & (codes < 256)).all(axis=1)
+    if bad.any():
+        raise ValueError(f"Invalid HEX colour: {str(raw[bad.argmax()])!r}")
+    digits = _HEX_NIBBLES[codes].astype(np.float64)
+    return (digits[:, 0::2] * 16 + digits[:, 1::2]) / 255.0
+
+
+# ── Linear light ──────────────────────────────────────────────────────────────
+
+def rgb_to_linear(rgb) -> np.ndarray:
+    """Gamma-encoded sRGB → linear-light sRGB."""
+    rgb = _triples(rgb)
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_rgb(lin) -> np.ndarray:
+    """Linear-light sRGB → gamma-encoded sRGB."""
+    lin = _triples(lin)
+    enc = np.where(lin <= 0.0031308,
+                   lin * 12.92,
+                   1.055 * np.power(np.maximum(lin, 0.0031308), 1 / 2.4) - 0.055)
+    return enc
+
+
+# ── CIE Lab ───────────────────────────────────────────────────────────────────
+
+def linear_to_lab(lin) -> np.ndarray:
+    xyz = _triples(lin) @ _RGB_TO_XYZ.T / _D65_WHITE
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([
+        116 * f[:, 1] - 16,
+        500 * (f[:, 0] - f[:, 1]),
+        200 * (f[:, 1] - f[:, 2]),
+    ], axis=1)
+
+
+def lab_to_linear(lab) -> np.ndarray:
+    lab = _triples(lab)
+    fy = (lab[:, 0] + 16) / 116
+    f  = np.stack([fy + lab[:, 1] / 500, fy, fy - lab[:, 2] / 200], axis=1)
+    xyz = np.where(f > 6 / 29, f ** 3, 3 * (6 / 29) ** 2 * (f - 4 / 29))
+    return (xyz * _D65_WHITE) @ _XYZ_TO_RGB.T
+
+
+# ── OKLab ─────────────────────────────────────────────────────────────────────
+
+def linear_to_oklab(lin) -> np.ndarray:
+    lms = _triples(lin) @ _RGB_TO_LMS.T
+    return np.cbrt(lms) @ _LMS_TO_OKLAB.T
+
+
+def oklab_to_linear(oklab) -> np.ndarray:
+    lms = (_triples(oklab) @ _OKLAB_TO_LMS.T) ** 3
+    return lms @ _LMS_TO_RGB.T
+
+
+# ── Dispatch ──────────────────────────────────────────────────────────────────
+
+_TO_RGB = {
+    "rgb":    lambda v: _triples(v),
+    "hsv":    hsv_to_rgb,
+    "hex":    hex_to_rgb,
+    "linear": linear_to_rgb,
+    "lab":    lambda v: linear_to_rgb(lab_to_linear(v)),
+    "oklab":  lambda v: linear_to_rgb(oklab_to_linear(v)),
+}
+
+_FROM_RGB = {
+    "rgb":    lambda v: v,
+    "hsv":    rgb_to_hsv,
+    "hex":    rgb_to_hex,
+    "linear": rgb_to_linear,
+    "lab":    lambda v: linear_to_lab(rgb_to_linear(v)),
+    "oklab":  lambda v: linear_to_oklab(rgb_to_linear(v)),
+}
+
+
+def convert(values, source: str, target: str) -> np.ndarray:
+    """
+    Convert an array of colours from `source` to `target` (see SPACES).
+    HEX values are 1-D string arrays; every other space is an (N, 3) array.
+    Conversions route through gamma-encoded RGB, except linear ↔ Lab/OKLab
+    which skip the sRGB transfer curve.
+    """
+    source, target = source.lower(), target.lower()
+    for space in (source, target):
+        if space not in _TO_RGB:
+            raise ValueError(f"Unknown colour space: {space}")
+
+    if np.size(values) == 0:
+        return np.empty(0, dtype="U6") if target == "hex" else np.empty((0, 3))
+    if source == target:
+        return np.asarray(values) if source == "hex" else _triples(values)
+    if source == "linear" and target == "lab":
+        return linear_to_lab(values)
+    if source == "linear" and target == "oklab":
+        return linear_to_oklab(values)
+    if source == "lab" and target == "linear":
+        return lab_to_linear(values)
+    if source == "oklab" and target == "linear":
+        return oklab_to_linear(values)
+
+    rgb = _TO_RGB[source](values)
+    if target == "hsv":
+        # Out-of-gamut Lab/OKLab colours have no meaningful HSV
+        rgb = np.clip(rgb, 0.0, 1.0)
+    return _FROM_RGB[target](rgb)
+
+
+# ── Legacy library migration ──────────────────────────────────────────────────
+
+def library_version(values) -> bool:
+    """
+    True if any S/V/R/G/B value exceeds 1.0, i.e. the rows come from the old
+    widget format (S/V 0–100, RGB 0–255).  Mirrors libraryVersion.
+    `values` is an (N, 6) array of the H, S, V, R, G, B library columns.
+    """
+    arr = np.asarray(values, dtype=np.float64).reshape(-1, 6)
+    return bool((arr[:, 1:] > 1.0).any())
+
+
+def library_convert(values) -> np.ndarray:
+    """Scale old-format H, S, V, R, G, B columns to 0–1.  Mirrors libraryConvert."""
+    arr = np.array(values, dtype=np.float64).reshape(-1, 6)
+    arr[:, 1:3] /= 100.0
+    arr[:, 3:6] /= 255.0
+    return arr
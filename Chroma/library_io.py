@@ -0,0 +1,262 @@
+"""
+Chroma – streaming palette file import / export.
+
+Readers are generators yielding library rows one at a time
+([group, name, H, S, V, R, G, B, HEX], timestamp added by the caller);
+writers consume any iterable of library rows.  Nothing holds a whole file
+in memory, so very large palettes stream straight to and from disk.
+
+Formats:
+    .csv   Chroma's own export format: group,name,H,S,V,R,G,B,HEX,timestamp
+    .gpl   GIMP palette
+    .ase   Adobe Swatch Exchange (RGB, CMYK, LAB and Gray swatches)
+"""
+
+import colorsys
+import csv
+import os
+import struct
+
+FORMATS = (".csv", ".ase", ".gpl")
+
+
+# ── Colour helpers (stdlib only, one colour at a time) ───────────────────────
+
+def _row(group: str, name: str, r: float, g: float, b: float) -> list:
+    r, g, b = (min(1.0, max(0.0, float(c))) for c in (r, g, b))
+    h, s, v = colorsys.rgb_to_hsv(r, g, b)
+    hexstr = "".join(f"{int(c * 255 + 0.5):02X}" for c in (r, g, b))
+    return [group, name, round(h * 360, 4), round(s, 4), round(v, 4),
+            round(r, 4), round(g, 4), round(b, 4), hexstr]
+
+
+def _lab_to_rgb(l: float, a: float, b: float) -> tuple:
+    """CIE Lab (D65) → gamma-encoded sRGB."""
+    fy = (l + 16) / 116
+    f = (fy + a / 500, fy, fy - b / 200)
+    x, y, z = (
+        (t ** 3 if t > 6 / 29 else 3 * (6 / 29) ** 2 * (t - 4 / 29)) * w
+        for t, w in zip(f, (0.95047, 1.0, 1.08883))
+    )
+    lin = (
+         3.2404542 * x - 1.5371385 * y - 0.4985314 * z,
+        -0.9692660 * x + 1.8760108 * y + 0.0415560 * z,
+         0.0556434 * x - 0.2040259 * y + 1.0572252 * z,
+    )
+    return tuple(
+        12.92 * c if c <= 0.0031308 else 1.055 * max(c, 0) ** (1 / 2.4) - 0.055
+        for c in lin
+    )
+
+
+def _clean(text: str) -> str:
+    """Strip the packed (":") and CSV (",") separators from a group/name."""
+    return " ".join(str(text).replace(":", " ").replace(",", " ").split())
+
+
+# ── CSV ───────────────────────────────────────────────────────────────────────
+
+def read_csv(path: str):
+    """
+    Yield rows from a Chroma CSV export.  Old-format files (S/V 0–100,
+    RGB 0–255) are detected with a first streaming pass and converted, the
+    same as libraryVersion / libraryConvert in app.js.
+    """
+    legacy = False
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        for rec in csv.reader(f):
+            if len(rec) >= 10 and rec[9]:
+                try:
+                    if any(float(v) > 1.0 for v in rec[3:8]):
+                        legacy = True
+                        break
+                except ValueError:
+                    continue
+
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        for rec in csv.reader(f):
+            if len(rec) < 10 or not rec[9]:
+                continue
+            try:
+                h, s, v, r, g, b = (float(x) for x in rec[2:8])
+            except ValueError:
+                continue
+            if legacy:
+                s, v = s / 100, v / 100
+                r, g, b = r / 255, g / 255, b / 255
+            yield [_clean(rec[0]), _clean(rec[1]), h, s, v, r, g, b,
+                   rec[8].replace("#", "").upper()]
+
+
+def write_csv(path: str, rows) -> int:
+    n = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        for row in rows:
+            writer.writerow(row)
+            n += 1
+    return n
+
+
+# ── GIMP palette ──────────────────────────────────────────────────────────────
+
+def read_gpl(path: str):
+    group = _clean(os.path.splitext(os.path.basename(path))[0])
+    with open(path, encoding="utf-8", errors="replace") as f:
+        first = f.readline()
+        if not first.startswith("GIMP Palette"):
+            raise ValueError("Not a GIMP palette")
+        n = 0
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("Name:"):
+                group = _clean(line[5:]) or group
+                continue
+            if line.startswith("Columns:"):
+                continue
+            parts = line.split(None, 3)
+            try:
+                r, g, b = (int(p) / 255 for p in parts[:3])
+            except (ValueError, IndexError):
+                continue
+            n += 1
+            name = parts[3] if len(parts) > 3 else ""
+            # write_gpl stores "group / name" since GPL has no per-colour groups
+            row_group, sep, row_name = name.partition(" / ")
+            if not sep:
+                row_group, row_name = group, name
+            yield _row(_clean(row_group), _clean(row_name) or f"colour {n}", r, g, b)
+
+
+def write_gpl(path: str, rows, name: str = "Chroma") -> int:
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"GIMP Palette\nName: {name}\nColumns: 0\n#\n")
+        for row in rows:
+            r, g, b = (int(float(c) * 255 + 0.5) for c in row[5:8])
+            f.write(f"{r:3d} {g:3d} {b:3d}\t{row[0]} / {row[1]}\n")
+            n += 1
+    return n
+
+
+# ── Adobe Swatch Exchange ─────────────────────────────────────────────────────
+# Big-endian: "ASEF", version 1.0, block count; then blocks of
+# (type u16, length u32, payload).  0xC001 group start, 0xC002 group end,
+# 0x0001 colour entry.  Names are UTF-16BE, length-prefixed, NUL-terminated.
+
+_ASE_GROUP_START = 0xC001
+_ASE_GROUP_END   = 0xC002
+_ASE_COLOUR      = 0x0001
+
+
+def _ase_name(payload: bytes) -> tuple:
+    (n,) = struct.unpack_from(">H", payload, 0)
+    name = payload[2:2 + n * 2].decode("utf-16-be", errors="replace").rstrip("\x00")
+    return name, 2 + n * 2
+
+
+def read_ase(path: str):
+    default = _clean(os.path.splitext(os.path.basename(path))[0])
+    group = default
+    n = 0
+    with open(path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"ASEF":
+            raise ValueError("Not an Adobe Swatch Exchange file")
+        (blocks,) = struct.unpack(">I", header[8:12])
+        for _ in range(blocks):
+            head = f.read(6)
+            if len(head) < 6:
+                break
+            btype, length = struct.unpack(">HI", head)
+            payload = f.read(length)
+            if btype == _ASE_GROUP_START:
+                group = _clean(_ase_name(payload)[0]) or default
+            elif btype == _ASE_GROUP_END:
+                group = default
+            elif btype == _ASE_COLOUR:
+                name, off = _ase_name(payload)
+                model = payload[off:off + 4]
+                off += 4
+                if model == b"RGB ":
+                    r, g, b = struct.unpack_from(">3f", payload, off)
+                elif model == b"CMYK":
+                    c, m, y, k = struct.unpack_from(">4f", payload, off)
+                    r, g, b = ((1 - c) * (1 - k), (1 - m) * (1 - k), (1 - y) * (1 - k))
+                elif model == b"Gray":
+                    (r,) = struct.unpack_from(">f", payload, off)
+                    g = b = r
+                elif model == b"LAB ":
+                    l, a, bb = struct.unpack_from(">3f", payload, off)
+                    r, g, b = _lab_to_rgb(l * 100, a, bb)
+                else:
+                    continue
+                n += 1
+                yield _row(group, _clean(name) or f"colour {n}", r, g, b)
+
+
+def _ase_name_bytes(name: str) -> bytes:
+    data = (name + "\x00").encode("utf-16-be")
+    return struct.pack(">H", len(data) // 2) + data
+
+
+def write_ase(path: str, rows) -> int:
+    """
+    Write rows grouped by their group column (a new ASE group starts each
+    time the group changes).  The block count is patched in at the end, so
+    rows are never buffered.
+    """
+    blocks = 0
+    n = 0
+    current = None
+    with open(path, "wb") as f:
+        f.write(b"ASEF" + struct.pack(">HHI", 1, 0, 0))
+        for row in rows:
+            if row[0] != current:
+                if current is not None:
+                    f.write(struct.pack(">HI", _ASE_GROUP_END, 0))
+                    blocks += 1
+                current = row[0]
+                payload = _ase_name_bytes(str(current))
+                f.write(struct.pack(">HI", _ASE_GROUP_START, len(payload)) + payload)
+                blocks += 1
+            payload = (
+                _ase_name_bytes(str(row[1]))
+                + b"RGB "
+                + struct.pack(">3fH", *(float(c) for c in row[5:8]), 2)
+            )
+            f.write(struct.pack(">HI", _ASE_COLOUR, len(payload)) + payload)
+            blocks += 1
+            n += 1
+        if current is not None:
+            f.write(struct.pack(">HI", _ASE_GROUP_END, 0))
+            blocks += 1
+        f.seek(8)
+        f.write(struct.pack(">I", blocks))
+    return n
+
+
+# ── Dispatch ──────────────────────────────────────────────────────────────────
+
+def read_file(path: str):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return read_csv(path)
+    if ext == ".gpl":
+        return read_gpl(path)
+    if ext == ".ase":
+        return read_ase(path)
+    raise ValueError(f"Unsupported palette format: {ext or path}")
+
+
+def write_file(path: str, rows) -> int:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return write_csv(path, rows)
+    if ext == ".gpl":
+        return write_gpl(path, rows, _clean(os.path.splitext(os.path.basename(path))[0]))
+    if ext == ".ase":
+        return write_ase(path, rows)
+    raise ValueError(f"Unsupported palette format: {ext or path}")
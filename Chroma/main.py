@@ -4,19 +4,27 @@ Chroma – PyWebView port of the original Dashcode Dashboard widget by iaian7.co
 HSV/RGB/HEX colour picker with a persistent, grouped colour library.
 
 Requires:  pip install pywebview
+Optional:  pip install numpy (batch colour conversion)
+           pip install pillow (palette extraction from images)
 Run:       python main.py
 """
 
-import json
 import os
-import subprocess
+import re
+import sys
+import time
 
-import webview
+from clipboard import Clipboard
 
 # ── Paths ─────────────────────────────────────────────────────────────────────
 APP_DIR    = os.path.dirname(os.path.abspath(__file__))
 PREFS_PATH = os.path.join(APP_DIR, "chroma_prefs.json")
 
+# Repository root, for the shared `common` package
+sys.path.insert(0, os.path.dirname(APP_DIR))
+
+from common.prefs import PrefsStore  # noqa: E402
+
 DEFAULT_PREFS = {
     # Current colour (HSV stored as H=0–360, S/V=0–1 float; RGB=0–1 float)
     "H": 70,
@@ -42,77 +50,279 @@ DEFAULT_PREFS = {
     "group":      "group",
     "name":       "name",
     "scroll":     0,
+    # Palette extraction from dropped images
+    "paletteCount":  6,
+    # 0=k-means  1=median cut
+    "paletteMethod": 0,
 }
 
+_prefs = PrefsStore(PREFS_PATH, DEFAULT_PREFS, merge_defaults=True)
+
+PALETTE_METHODS = ["kmeans", "mediancut"]
+
+NUMPY_MISSING = "NumPy not found.\n\nInstall via: pip install numpy"
+PILLOW_MISSING = "NumPy and Pillow are required.\n\nInstall via: pip install numpy pillow"
+
 
 class ChromaAPI:
     """Python-side API exposed to JS via window.pywebview.api.*"""
 
+    def __init__(self):
+        self._window    = None   # set after window creation
+        self._clipboard = Clipboard()
+
     # ── Prefs ─────────────────────────────────────────────────────────────────
 
     def load_prefs(self) -> dict:
-        if os.path.exists(PREFS_PATH):
-            try:
-                with open(PREFS_PATH) as f:
-                    saved = json.load(f)
-                return {**DEFAULT_PREFS, **saved}
-            except Exception:
-                pass
-        return dict(DEFAULT_PREFS)
+        return _prefs.load()
 
     def save_prefs(self, prefs: dict) -> bool:
-        try:
-            merged = {**DEFAULT_PREFS, **prefs}
-            with open(PREFS_PATH, "w") as f:
-                json.dump(merged, f, indent=2)
-            return True
-        except Exception as e:
-            return str(e)
+        return _prefs.save(prefs)
 
     def erase_prefs(self) -> bool:
-        if os.path.exists(PREFS_PATH):
-            os.remove(PREFS_PATH)
-        return True
+        return _prefs.erase()
 
     # ── Clipboard ─────────────────────────────────────────────────────────────
 
     def clipboard_write(self, text: str) -> bool:
-        """Write text to the system clipboard via pbcopy (macOS) or xclip/xsel (Linux)."""
-        try:
-            # macOS
-            p = subprocess.run(["pbcopy"], input=text.encode(), timeout=5)
-            return p.returncode == 0
-        except FileNotFoundError:
-            pass
-        # Linux
-        for cmd in (["xclip", "-selection", "clipboard"],
-                    ["xsel", "--clipboard", "--input"]):
-            try:
-                p = subprocess.run(cmd, input=text.encode(), timeout=5)
-                return p.returncode == 0
-            except FileNotFoundError:
-                continue
-        return False
+        """
+        Queue text for the system clipboard.  The backend (NSPasteboard, a Tk
+        helper process, or pbcopy/xclip/xsel) is detected once at startup and
+        writes are applied off the calling thread – see clipboard.py.
+        """
+        return self._clipboard.write(text)
 
     def clipboard_read(self) -> str | None:
-        """Read text from the system clipboard via pbpaste (macOS) or xclip/xsel (Linux)."""
+        """Read text from the system clipboard (after any queued writes)."""
+        return self._clipboard.read()
+
+    # ── Colour conversion ─────────────────────────────────────────────────────
+
+    def convert_colours(self, values: list, source: str, target: str) -> dict:
+        """
+        Convert a whole list of colours between hsv / rgb / hex / linear / lab /
+        oklab in one vectorised pass (see conversion.py).
+        Returns { ok, message, values }
+        """
+        conversion = _load_conversion()
+        if conversion is None:
+            return {"ok": False, "message": NUMPY_MISSING, "values": []}
         try:
-            result = subprocess.run(
-                ["pbpaste"], capture_output=True, timeout=5
+            out = conversion.convert(values, source, target)
+            return {
+                "ok": True,
+                "message": f"{len(out)} colour{'s' if len(out) != 1 else ''} converted.",
+                "values": out.tolist(),
+            }
+        except ValueError as ex:
+            return {"ok": False, "message": str(ex), "values": []}
+        except Exception as ex:
+            return {"ok": False, "message": f"Unexpected error:\n{ex}", "values": []}
+
+    def migrate_library(self, library: str) -> dict:
+        """
+        Convert an old-format packed library (S/V 0–100, RGB 0–255) to 0–1
+        floats.  Vectorised equivalent of libraryVersion + libraryConvert.
+        Returns { ok, message, library, converted }
+        """
+        conversion = _load_conversion()
+        if conversion is None:
+            return {"ok": False, "message": NUMPY_MISSING, "library": library, "converted": False}
+        try:
+            rows = _unpack_library(library)
+            if not rows:
+                return {"ok": True, "message": "Library is empty.", "library": "", "converted": False}
+            values = [row[2:8] for row in rows]
+            if not conversion.library_version(values):
+                return {"ok": True, "message": "Library is current.", "library": library, "converted": False}
+            for row, new in zip(rows, conversion.library_convert(values).tolist()):
+                row[2:8] = new
+            return {
+                "ok": True,
+                "message": f"{len(rows)} colour{'s' if len(rows) != 1 else ''} converted.",
+                "library": _pack_library(rows),
+                "converted": True,
+            }
+        except Exception as ex:
+            return {"ok": False, "message": f"Unexpected error:\n{ex}", "library": library, "converted": False}
+
+    # ── Palette extraction ────────────────────────────────────────────────────
+
+    def extract_palettes(self, file_paths: list, prefs: dict) -> dict:
+        """
+        Extract dominant colours from dropped images (or folders of images)
+        and add them to the library as one new group, in a single prefs write.
+        Returns { ok, message, added, errors }
+        """
+        try:
+            import palette
+            conversion = _load_conversion()
+        except ImportError:
+            return {"ok": False, "message": PILLOW_MISSING, "added": 0, "errors": []}
+
+        try:
+            # ── Normalise paths, expanding folders ────────────────────────────
+            paths = palette.image_paths(file_paths)
+            if not paths:
+                return {"ok": False, "message": "No image files received.", "added": 0, "errors": []}
+
+            count  = max(1, min(32, int(prefs.get("paletteCount", 6))))
+            method = int(prefs.get("paletteMethod", 0))
+            method = PALETTE_METHODS[method] if 0 <= method < len(PALETTE_METHODS) else "kmeans"
+
+            results = palette.extract_many(paths, count, method)
+
+            # ── Convert every extracted colour in one pass ────────────────────
+            found  = [r for r in results if r["ok"]]
+            errors = [f"{os.path.basename(r['path'])}: {r['error']}" for r in results if not r["ok"]]
+            rgb    = [c for r in found for c in r["colors"]]
+            if not rgb:
+                return {
+                    "ok": False,
+                    "message": "No colours extracted.\n" + "\n".join(errors),
+                    "added": 0,
+                    "errors": errors,
+                }
+            hsv = conversion.rgb_to_hsv(rgb).round(4).tolist()
+            hexes = conversion.rgb_to_hex(rgb).tolist()
+
+            # ── Build library rows: one new group named after the folder ──────
+            group = _library_text(
+                prefs.get("paletteGroup") or os.path.basename(os.path.dirname(paths[0])) or "palette"
             )
-            if result.returncode == 0:
-                return result.stdout.decode("utf-8", errors="replace")
-        except FileNotFoundError:
-            pass
-        for cmd in (["xclip", "-selection", "clipboard", "-o"],
-                    ["xsel", "--clipboard", "--output"]):
-            try:
-                result = subprocess.run(cmd, capture_output=True, timeout=5)
-                if result.returncode == 0:
-                    return result.stdout.decode("utf-8", errors="replace")
-            except FileNotFoundError:
-                continue
-        return None
+            stamp = self._next_stamp()
+            rows  = []
+            i = 0
+            for r in found:
+                stem = _library_text(os.path.splitext(os.path.basename(r["path"]))[0])
+                for n, c in enumerate(r["colors"]):
+                    rows.append([
+                        group, f"{stem} {n + 1}",
+                        *hsv[i], *(round(v, 4) for v in c),
+                        hexes[i],
+                        stamp + i,   # timestamps double as unique row keys
+                    ])
+                    i += 1
+
+            saved = self._append_library(rows)
+            if saved is not True:
+                return {"ok": False, "message": f"Could not save library:\n{saved}", "added": 0, "errors": errors}
+
+            n = len(found)
+            msg = (f"{len(rows)} colour{'s' if len(rows) != 1 else ''} from "
+                   f"{n} image{'s' if n != 1 else ''} added to \"{group}\".")
+            if errors:
+                msg += "\n\nWarnings:\n" + "\n".join(errors)
+            return {"ok": True, "message": msg, "added": len(rows), "errors": errors}
+
+        except Exception as ex:
+            return {"ok": False, "message": f"Unexpected error:\n{ex}", "added": 0, "errors": []}
+
+    # ── Library files ─────────────────────────────────────────────────────────
+
+    def choose_library_file(self, save: bool = False) -> str | None:
+        """Show a native open/save dialog for CSV / ASE / GPL palette files."""
+        if not self._window:
+            return None
+        import webview
+        file_types = ("Palettes (*.csv;*.ase;*.gpl)", "All files (*.*)")
+        if save:
+            result = self._window.create_file_dialog(
+                webview.SAVE_DIALOG, save_filename="Chroma.csv", file_types=file_types
+            )
+        else:
+            result = self._window.create_file_dialog(
+                webview.OPEN_DIALOG, allow_multiple=False, file_types=file_types
+            )
+        if not result:
+            return None
+        return result if isinstance(result, str) else result[0]
+
+    def scan_library_file(self, path: str) -> dict:
+        """
+        Count the colours in a palette file without loading it.
+        Returns { ok, message, path, count }
+        """
+        import library_io
+        try:
+            count = sum(1 for _ in library_io.read_file(path))
+        except Exception as ex:
+            return {"ok": False, "message": f"Could not read palette:\n{ex}", "path": path, "count": 0}
+        if not count:
+            return {"ok": False, "message": "No colours found.", "path": path, "count": 0}
+        return {
+            "ok": True,
+            "message": f"Found {count} colour{'s' if count != 1 else ''}.",
+            "path": path,
+            "count": count,
+        }
+
+    def import_library_file(self, path: str, replace: bool = False) -> dict:
+        """
+        Stream a CSV / ASE / GPL palette into the library.  Rows are parsed
+        and packed one at a time and stored with a single prefs write.
+        Returns { ok, message, count }
+        """
+        import library_io
+        try:
+            stamp = int(time.time() * 1000) if replace else self._next_stamp()
+            counter = [0]
+
+            def stamped(rows):
+                for i, row in enumerate(rows):
+                    counter[0] = i + 1
+                    yield row + [stamp + i]
+
+            packed = _pack_library(stamped(library_io.read_file(path)))
+            n = counter[0]
+            if not n:
+                return {"ok": False, "message": "No colours found.", "count": 0}
+            saved = self._store_library(packed, replace=replace)
+            if saved is not True:
+                return {"ok": False, "message": f"Could not save library:\n{saved}", "count": 0}
+            return {"ok": True, "message": f"{n} colour{'s' if n != 1 else ''} imported.", "count": n}
+        except Exception as ex:
+            return {"ok": False, "message": f"Could not import palette:\n{ex}", "count": 0}
+
+    def export_library_file(self, path: str) -> dict:
+        """
+        Write the stored library to `path`; the format follows the extension
+        (CSV when the name has none).  Returns { ok, message, count }
+        """
+        import library_io
+        if not os.path.splitext(path)[1]:
+            path += ".csv"
+        try:
+            library = self.load_prefs().get("library", "")
+            rows = (row for row in (e.split(":") for e in library.split("::"))
+                    if len(row) > 9 and row[9])
+            n = library_io.write_file(path, rows)
+            return {
+                "ok": True,
+                "message": f"{n} colour{'s' if n != 1 else ''} exported to {os.path.basename(path)}.",
+                "count": n,
+            }
+        except Exception as ex:
+            return {"ok": False, "message": f"Could not export palette:\n{ex}", "count": 0}
+
+    def _next_stamp(self) -> int:
+        """First free timestamp key: now, or just past the newest library row."""
+        newest = max(
+            (int(float(row[9])) for row in _unpack_library(self.load_prefs().get("library", ""))),
+            default=0,
+        )
+        return max(int(time.time() * 1000), newest + 1)
+
+    def _append_library(self, rows: list, replace: bool = False):
+        """Append (or replace with) `rows` in the stored library as a single write."""
+        return self._store_library(_pack_library(rows), replace)
+
+    def _store_library(self, packed: str, replace: bool = False):
+        prefs = self.load_prefs()
+        if not replace and prefs.get("library"):
+            packed = prefs["library"] + ("::" + packed if packed else "")
+        prefs["library"] = packed
+        return self.save_prefs(prefs)
 
     # ── Website ───────────────────────────────────────────────────────────────
 
@@ -122,13 +332,47 @@ class ChromaAPI:
         return True
 
 
+# ── Library helpers ───────────────────────────────────────────────────────────
+# Packed format mirrors packLibrary / unpackLibrary in app.js:
+# "grp:name:H:S:V:R:G:B:HEX:ts::grp:name:…", rows without a timestamp dropped.
+
+def _unpack_library(data: str) -> list:
+    if not data or not data.strip():
+        return []
+    rows = [entry.split(":") for entry in data.split("::")]
+    return [row for row in rows if len(row) > 9 and row[9]]
+
+
+def _pack_library(rows: list) -> str:
+    return "::".join(
+        ":".join(str(v) for v in row) for row in rows if len(row) > 9 and row[9]
+    )
+
+
+def _library_text(text: str) -> str:
+    """Strip the packed (":") and CSV (",") separators from a group/name."""
+    return re.sub(r"[:,\n]+", " ", str(text)).strip()
+
+
+def _load_conversion():
+    """Import the NumPy conversion module on first use (NumPy is optional)."""
+    try:
+        import conversion
+        return conversion
+    except ImportError:
+        return None
+
+
 # ── Window ────────────────────────────────────────────────────────────────────
 
 def main():
+    import webview
+    from common.startup import probe
+
     api      = ChromaAPI()
     html_path = os.path.join(APP_DIR, "app", "index.html")
 
-    webview.create_window(
+    window = webview.create_window(
         title="Chroma",
         url=f"file://{html_path}",
         js_api=api,
@@ -138,7 +382,11 @@ def main():
         background_color="#111111",
         min_size=(300, 400),
     )
+    api._window = window
+    probe(window)
     webview.start(debug=False)
+    _prefs.flush()
+    api._clipboard.close()
 
 
 if __name__ == "__main__":
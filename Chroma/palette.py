@@ -0,0 +1,192 @@
+"""
+Chroma – palette extraction from images.
+
+Decodes a downsampled copy of each image (Pillow), then finds its dominant
+colours with k-means or median cut (NumPy).  Batches of images are spread
+over a process pool; each worker returns plain lists so results pickle cheaply.
+
+Requires:  pip install numpy pillow
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+IMAGE_EXTS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".tif", ".tiff",
+    ".bmp", ".webp", ".tga",
+}
+
+METHODS = ("kmeans", "mediancut")
+
+
+# ── Dropped files ─────────────────────────────────────────────────────────────
+
+def _decode_paths(raw: list) -> list:
+    out = []
+    for p in raw:
+        p = p.replace("file://localhost", "").replace("file://", "").strip()
+        p = re.sub(r"%([0-9A-Fa-f]{2})", lambda m: chr(int(m.group(1), 16)), p)
+        p = os.path.normpath(p)
+        out.append(p)
+    return out
+
+
+def _alphanum_key(path: str):
+    basename = os.path.basename(path)
+    parts = re.split(r"(\d+)", basename)
+    return [int(p) if p.isdigit() else p.lower() for p in parts]
+
+
+def image_paths(raw: list) -> list:
+    """Dropped file:// URIs or paths → image files, folders expanded, sorted alphanumerically."""
+    paths = []
+    for p in _decode_paths(raw):
+        if os.path.isdir(p):
+            paths += [
+                os.path.join(p, f) for f in os.listdir(p)
+                if os.path.splitext(f)[1].lower() in IMAGE_EXTS
+            ]
+        elif os.path.splitext(p)[1].lower() in IMAGE_EXTS:
+            paths.append(p)
+    return sorted(paths, key=_alphanum_key)
+
+
+# ── Sampling ──────────────────────────────────────────────────────────────────
+
+def load_sample(path: str, size: int = 128) -> np.ndarray:
+    """
+    Decode `path` at roughly `size` × `size` and return its opaque pixels as
+    an (N, 3) float32 array in 0–255.
+    """
+    with Image.open(path) as img:
+        # JPEG can decode straight to a reduced scale, skipping most of the IDCT
+        img.draft("RGB", (size, size))
+        img.thumbnail((size, size), Image.Resampling.BILINEAR)
+        if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+            rgba = np.asarray(img.convert("RGBA"), dtype=np.float32).reshape(-1, 4)
+            pixels = rgba[rgba[:, 3] >= 128, :3]
+        else:
+            pixels = np.asarray(img.convert("RGB"), dtype=np.float32).reshape(-1, 3)
+    return pixels
+
+
+# ── Quantisers ────────────────────────────────────────────────────────────────
+
+def kmeans(pixels: np.ndarray, k: int, iterations: int = 16, seed: int = 0):
+    """
+    k-means with k-means++ seeding.  Returns (centres, counts), both sorted by
+    cluster size, largest first.
+    """
+    n = len(pixels)
+    k = min(k, n)
+    rng = np.random.default_rng(seed)
+
+    centres = np.empty((k, 3), dtype=np.float32)
+    centres[0] = pixels[rng.integers(n)]
+    dist = ((pixels - centres[0]) ** 2).sum(axis=1)
+    for i in range(1, k):
+        total = dist.sum()
+        idx = rng.choice(n, p=dist / total) if total > 0 else rng.integers(n)
+        centres[i] = pixels[idx]
+        dist = np.minimum(dist, ((pixels - centres[i]) ** 2).sum(axis=1))
+
+    labels = np.zeros(n, dtype=np.intp)
+    for _ in range(iterations):
+        # ‖p − c‖² = ‖p‖² − 2 p·c + ‖c‖²; ‖p‖² is constant per row so skip it
+        d = (centres ** 2).sum(axis=1) - 2 * pixels @ centres.T
+        new_labels = d.argmin(axis=1)
+        counts = np.bincount(new_labels, minlength=k)
+        sums = np.stack(
+            [np.bincount(new_labels, weights=pixels[:, c], minlength=k) for c in range(3)],
+            axis=1,
+        )
+        empty = counts == 0
+        centres = np.where(empty[:, None], centres, sums / np.maximum(counts, 1)[:, None])
+        centres = centres.astype(np.float32)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+    counts = np.bincount(labels, minlength=k)
+    order = np.argsort(-counts, kind="stable")
+    keep = order[counts[order] > 0]
+    return centres[keep], counts[keep]
+
+
+def median_cut(pixels: np.ndarray, k: int):
+    """
+    Median cut: repeatedly split the box with the widest channel range × pixel
+    count at its median.  Returns (centres, counts), largest box first.
+    """
+    boxes = [pixels]
+    while len(boxes) < k:
+        scores = [
+            (np.ptp(b, axis=0).max() * len(b)) if len(b) > 1 else -1
+            for b in boxes
+        ]
+        i = int(np.argmax(scores))
+        if scores[i] <= 0:
+            break
+        box = boxes.pop(i)
+        channel = int(np.ptp(box, axis=0).argmax())
+        box = box[box[:, channel].argsort(kind="stable")]
+        mid = len(box) // 2
+        boxes += [box[:mid], box[mid:]]
+
+    centres = np.array([b.mean(axis=0) for b in boxes], dtype=np.float32)
+    counts = np.array([len(b) for b in boxes])
+    order = np.argsort(-counts, kind="stable")
+    return centres[order], counts[order]
+
+
+# ── Extraction ────────────────────────────────────────────────────────────────
+
+def extract(path: str, count: int = 6, method: str = "kmeans", size: int = 128) -> dict:
+    """
+    Extract up to `count` dominant colours from one image.
+    Returns { path, ok, colors: [[r, g, b] 0–1 …], weights: [0–1 …], error }
+    """
+    try:
+        pixels = load_sample(path, size)
+        if not len(pixels):
+            return {"path": path, "ok": False, "colors": [], "weights": [],
+                    "error": "no opaque pixels"}
+        if method == "mediancut":
+            centres, counts = median_cut(pixels, count)
+        else:
+            centres, counts = kmeans(pixels, count)
+        return {
+            "path":    path,
+            "ok":      True,
+            "colors":  (np.clip(centres, 0, 255) / 255.0).round(6).tolist(),
+            "weights": (counts / counts.sum()).round(4).tolist(),
+            "error":   "",
+        }
+    except Exception as ex:
+        return {"path": path, "ok": False, "colors": [], "weights": [], "error": str(ex)}
+
+
+def _extract_args(args):
+    return extract(*args)
+
+
+def extract_many(paths: list, count: int = 6, method: str = "kmeans",
+                 size: int = 128, workers: int | None = None) -> list:
+    """
+    Extract palettes from many images across a process pool.
+    Results are returned in the same order as `paths`.
+    """
+    jobs = [(p, count, method, size) for p in paths]
+    workers = workers or os.cpu_count() or 1
+    if len(jobs) <= 1 or workers <= 1:
+        return [_extract_args(j) for j in jobs]
+
+    workers = min(workers, len(jobs))
+    # Several images per task keeps the pickling/IPC overhead small
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_extract_args, jobs, chunksize=chunksize))
@@ -22,13 +22,20 @@ let prefColors      = 256;
 let prefLocation    = "/opt/homebrew/bin/";
 let prefQuality     = 2;
 let prefOverwrite   = 1;
+let prefLossless    = false;
+let prefWebp        = false;
+let prefAvif        = false;
+let prefLossyQuality = 80;
+let prefMinPsnr     = 40;
+let prefManifest    = "crusher-manifest.json";   // no control; kept on save
 let prefName        = ".%d";
 let prefNameDither  = ".dither";
 let prefNameIE6     = ".ie6";
 
 // ── DOM refs ──────────────────────────────────────────────────────────────────
 let colorsEl, sliderEl, ditherEl, ie6El;
-let locEl, qualityEl, overwriteEl;
+let locEl, qualityEl, overwriteEl, losslessEl;
+let webpEl, avifEl, lossyQualityEl, minPsnrEl;
 let nameEl, nameDitherEl, nameIE6El;
 let dropZone, pqStatusEl;
 
@@ -44,6 +51,12 @@ async function savePrefs() {
     loc:         prefLocation,
     quality:     prefQuality,
     overwrite:   prefOverwrite,
+    lossless:    prefLossless,
+    webp:        prefWebp,
+    avif:        prefAvif,
+    lossyQuality: prefLossyQuality,
+    minPsnr:     prefMinPsnr,
+    manifest:    prefManifest,
     name:        prefName,
     nameDither:  prefNameDither,
     nameIE6:     prefNameIE6,
@@ -75,6 +88,11 @@ async function init() {
   locEl         = document.getElementById("loc");
   qualityEl     = document.getElementById("quality");
   overwriteEl   = document.getElementById("overwrite");
+  losslessEl    = document.getElementById("lossless");
+  webpEl        = document.getElementById("webp");
+  avifEl        = document.getElementById("avif");
+  lossyQualityEl = document.getElementById("lossyQuality");
+  minPsnrEl     = document.getElementById("minPsnr");
   nameEl        = document.getElementById("name");
   nameDitherEl  = document.getElementById("nameDither");
   nameIE6El     = document.getElementById("nameIE6");
@@ -92,6 +110,12 @@ function applyPrefs(prefs) {
   prefLocation   = prefs.loc        ?? prefLocation;
   prefQuality    = parseInt(prefs.quality    ?? prefQuality);
   prefOverwrite  = parseInt(prefs.overwrite  ?? prefOverwrite);
+  prefLossless   = prefs.lossless   ?? prefLossless;
+  prefWebp       = prefs.webp       ?? prefWebp;
+  prefAvif       = prefs.avif       ?? prefAvif;
+  prefLossyQuality = parseInt(prefs.lossyQuality ?? prefLossyQuality);
+  prefMinPsnr    = parseFloat(prefs.minPsnr ?? prefMinPsnr);
+  prefManifest   = prefs.manifest   ?? prefManifest;
   prefName       = prefs.name       ?? prefName;
   prefNameDither = prefs.nameDither ?? prefNameDither;
   prefNameIE6    = prefs.nameIE6    ?? prefNameIE6;
@@ -104,6 +128,11 @@ function applyPrefs(prefs) {
   locEl.value         = prefLocation;
   qualityEl.value     = prefQuality;
   overwriteEl.value   = prefOverwrite;
+  losslessEl.checked  = prefLossless;
+  webpEl.checked      = prefWebp;
+  avifEl.checked      = prefAvif;
+  lossyQualityEl.value = prefLossyQuality;
+  minPsnrEl.value     = prefMinPsnr;
   nameEl.value        = prefName;
   nameDitherEl.value  = prefNameDither;
   nameIE6El.value     = prefNameIE6;
@@ -191,6 +220,25 @@ function updateIE6() {
 function updateLoc()        { prefLocation   = locEl.value;          savePrefs(); }
 function updateQuality()    { prefQuality    = parseInt(qualityEl.value);   savePrefs(); }
 function updateOverwrite()  { prefOverwrite  = parseInt(overwriteEl.value); savePrefs(); }
+function updateLossless()   { prefLossless   = losslessEl.checked;   savePrefs(); }
+function updateWebp()       { prefWebp       = webpEl.checked;       savePrefs(); }
+function updateAvif()       { prefAvif       = avifEl.checked;       savePrefs(); }
+
+function updateLossyQuality() {
+  const v = parseInt(lossyQualityEl.value);
+  if (!isNaN(v) && v >= 1 && v <= 100) {
+    prefLossyQuality = v;
+    savePrefs();
+  }
+}
+
+function updateMinPsnr() {
+  const v = parseFloat(minPsnrEl.value);
+  if (!isNaN(v) && v >= 0) {
+    prefMinPsnr = v;
+    savePrefs();
+  }
+}
 function updateName()       { prefName       = nameEl.value;          savePrefs(); }
 function updateNameDither() { prefNameDither = nameDitherEl.value;    savePrefs(); }
 function updateNameIE6()    { prefNameIE6    = nameIE6El.value;       savePrefs(); }
@@ -202,7 +250,8 @@ async function checkPngquant() {
   if (window.pywebview) {
     const result = await window.pywebview.api.check_pngquant(prefLocation);
     if (result.ok) {
-      pqStatusEl.textContent = "✓ Found: " + result.path;
+      pqStatusEl.textContent = "✓ Found: " + result.path
+        + (result.version ? " (" + result.version + ")" : "");
       pqStatusEl.className   = "setting-hint ok";
     } else {
       pqStatusEl.textContent = "✕ Not found at " + result.path;
@@ -276,6 +325,12 @@ async function dragDrop(event) {
     loc:         prefLocation,
     quality:     prefQuality,
     overwrite:   prefOverwrite,
+    lossless:    prefLossless,
+    webp:        prefWebp,
+    avif:        prefAvif,
+    lossyQuality: prefLossyQuality,
+    minPsnr:     prefMinPsnr,
+    manifest:    prefManifest,
     name:        prefName,
     nameDither:  prefNameDither,
     nameIE6:     prefNameIE6,
@@ -5,20 +5,29 @@ Reduces PNG color depth using pngquant.
 
 Requires:  pip install pywebview
 Optional:  pngquant installed (brew install pngquant on macOS)
+           oxipng or optipng for the lossless pass (else zlib, or zopfli if installed)
+           Pillow for WebP / AVIF output (pip install pillow)
 Run:       python main.py
+Headless:  python main.py [--prefs JSON] [--set KEY=VALUE] PATH|GLOB|DIR …
 """
 
-import json
 import os
 import re
-import shutil
 import subprocess
-import webbrowser
-
-import webview
+import sys
+from concurrent.futures import ThreadPoolExecutor
 
 # ── Preferences file ──────────────────────────────────────────────────────────
-PREFS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "crusher_prefs.json")
+APP_DIR    = os.path.dirname(os.path.abspath(__file__))
+PREFS_PATH = os.path.join(APP_DIR, "crusher_prefs.json")
+
+# Repository root, for the shared `common` package
+sys.path.insert(0, os.path.dirname(APP_DIR))
+
+from common import governor, tools  # noqa: E402
+from common.atomic import discard, partial_path  # noqa: E402
+from common.metrics import Metrics  # noqa: E402
+from common.prefs import PrefsStore  # noqa: E402
 
 DEFAULT_PREFS = {
     "dither":      False,
@@ -33,11 +42,30 @@ DEFAULT_PREFS = {
     "name":        ".%d",
     "nameDither":  ".dither",
     "nameIE6":     ".ie6",
+    # Recompress each output losslessly after pngquant (oxipng, optipng or in-process)
+    "lossless":    False,
+    # Also try WebP / AVIF and keep the smallest file (see variants.py) …
+    "webp":        False,
+    "avif":        False,
+    "lossyQuality": 80,
+    # … among those within this PSNR of the source (dB)
+    "minPsnr":     40,
+    # Written next to the outputs when WebP / AVIF are on
+    "manifest":    "crusher-manifest.json",
 }
 
+_prefs   = PrefsStore(PREFS_PATH, DEFAULT_PREFS)
+_metrics = Metrics("Crusher")
+
 # pngquant speed flag: quality index → --speed value (1=slowest/best, 11=fastest/worst)
 SPEED_MAP = [5, 4, 3, 2, 1]
 
+# Lossless optimisers, best first: name → flags before "<out> <in>"
+OPTIMISERS = {
+    "oxipng":  ["-o", "2", "--strip", "safe", "-q", "--out"],
+    "optipng": ["-o2", "-strip", "all", "-quiet", "-clobber", "-out"],
+}
+
 
 class CrusherAPI:
     """Python-side API exposed to JS via window.pywebview.api.*"""
@@ -45,43 +73,28 @@ class CrusherAPI:
     # ── Prefs ─────────────────────────────────────────────────────────────────
 
     def load_prefs(self) -> dict:
-        if os.path.exists(PREFS_PATH):
-            try:
-                with open(PREFS_PATH) as f:
-                    saved = json.load(f)
-                return {**DEFAULT_PREFS, **saved}
-            except Exception:
-                pass
-        return dict(DEFAULT_PREFS)
+        return _prefs.load()
 
     def save_prefs(self, prefs: dict) -> bool:
-        try:
-            with open(PREFS_PATH, "w") as f:
-                json.dump(prefs, f, indent=2)
-            return True
-        except Exception as e:
-            return str(e)
+        return _prefs.save(prefs)
 
     def erase_prefs(self) -> bool:
-        if os.path.exists(PREFS_PATH):
-            os.remove(PREFS_PATH)
-        return True
+        return _prefs.erase()
 
     # ── System utility ────────────────────────────────────────────────────────
 
     def open_url(self, url: str) -> bool:
+        import webbrowser
         webbrowser.open(url)
         return True
 
     def check_pngquant(self, loc: str) -> dict:
         """Verify that pngquant is reachable at `loc`."""
-        binary = os.path.join(loc.rstrip("/"), "pngquant")
-        if os.path.isfile(binary) and os.access(binary, os.X_OK):
-            return {"ok": True, "path": binary}
-        found = shutil.which("pngquant")
-        if found:
-            return {"ok": True, "path": found}
-        return {"ok": False, "path": binary}
+        return tools.info("pngquant", loc)
+
+    def get_metrics(self, limit: int = 50) -> dict:
+        """Timing spans of the recent process_files calls (see common/metrics.py)."""
+        return _metrics.snapshot(limit)
 
     # ── Core processing ───────────────────────────────────────────────────────
 
@@ -90,8 +103,15 @@ class CrusherAPI:
         Run pngquant on each dropped PNG file.
         Returns { ok, message, commands, results }
         """
+        job = _metrics.start(files=len(file_paths))
+        result = self._process_files(file_paths, prefs, job)
+        job.end(result)
+        return result
+
+    def _process_files(self, file_paths: list, prefs: dict, job) -> dict:
         try:
             # ── Normalise paths ───────────────────────────────────────────────
+            job.stage("decode")
             paths = []
             for p in file_paths:
                 p = p.replace("file://localhost", "").replace("file://", "").strip()
@@ -103,6 +123,7 @@ class CrusherAPI:
                 return {"ok": False, "message": "No files received.", "commands": []}
 
             # ── Validate: PNGs only ───────────────────────────────────────────
+            job.stage("validate")
             for p in paths:
                 if not p.lower().endswith(".png"):
                     return {
@@ -122,24 +143,33 @@ class CrusherAPI:
             paths = sorted(paths, key=_alphanum_key)
 
             # ── Resolve pngquant binary ───────────────────────────────────────
+            job.stage("lookup")
             loc = prefs.get("loc", "/opt/homebrew/bin/").rstrip("/") + "/"
-            pngquant_bin = loc + "pngquant"
-            if not (os.path.isfile(pngquant_bin) and os.access(pngquant_bin, os.X_OK)):
-                found = shutil.which("pngquant")
-                if found:
-                    pngquant_bin = found
-                else:
-                    return {
-                        "ok": False,
-                        "message": (
-                            "pngquant not found.\n"
-                            f"Configured path: {loc}\n\n"
-                            "Install via: brew install pngquant"
-                        ),
-                        "commands": [],
-                    }
+            pngquant_bin = tools.find("pngquant", loc)
+            lossless     = bool(prefs.get("lossless", False))
+            # (name, path) of the first optimiser found; None recompresses
+            # in-process (see recompress.py)
+            optimiser    = next(((n, tools.find(n, loc)) for n in OPTIMISERS
+                                 if lossless and tools.find(n, loc)), None)
+            formats      = [f for f in ("webp", "avif") if prefs.get(f, False)]
+            if not pngquant_bin:
+                return {
+                    "ok": False,
+                    "message": (
+                        "pngquant not found.\n"
+                        f"Configured path: {loc}\n\n"
+                        "Install via: brew install pngquant"
+                    ),
+                    "commands": [],
+                }
+            if formats:
+                from variants import missing
+                reason = missing(formats)
+                if reason:
+                    return {"ok": False, "message": reason, "commands": []}
 
             # ── Build pngquant flags ──────────────────────────────────────────
+            job.stage("build")
             dither    = bool(prefs.get("dither", False))
             ie6       = bool(prefs.get("ie6", False))
             colors    = int(prefs.get("colors", 256))
@@ -170,36 +200,93 @@ class CrusherAPI:
                 flags += ["--iebug"]
             flags += ["--ext", ext_suffix]
 
+            modern = None
+            if formats:
+                modern = {
+                    "formats":  formats,
+                    "quality":  max(1, min(100, int(prefs.get("lossyQuality", 80)))),
+                    "min_psnr": float(prefs.get("minPsnr", 40)),
+                }
+
             # ── Process each file ─────────────────────────────────────────────
+            # The lossless pass and WebP / AVIF of each output run on a pool
+            # while pngquant moves on to the next file
+            job.stage("run")
             commands  = []
             errors    = []
             successes = []
+            saved     = {"pngquant": 0, "lossless": 0, "variants": 0}
+            pool      = (ThreadPoolExecutor(max_workers=governor.cpu_slots())
+                         if lossless or modern else None)
+            passes    = []   # (source, output name, future)
 
-            for path in paths:
-                cmd = [pngquant_bin] + flags + [str(colors), path]
-                commands.append(" ".join(cmd))
-
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=60,
-                )
+            try:
+                for path in paths:
+                    cmd = [pngquant_bin] + flags + [str(colors), path]
+                    commands.append(" ".join(cmd))
 
-                basename = os.path.basename(path)
-                if result.returncode == 0:
                     # Derive expected output filename
-                    stem = os.path.splitext(basename)[0]
-                    out_name = stem + ext_suffix
-                    successes.append(out_name)
-                elif result.returncode == 99:
-                    # pngquant exit 99 = file already exists (no --force)
-                    errors.append(f"{basename}: output already exists (enable overwrite)")
-                else:
-                    err = (result.stderr or result.stdout or "").strip()
-                    errors.append(f"{basename}: {err or f'exit {result.returncode}'}")
+                    basename = os.path.basename(path)
+                    out_name = os.path.splitext(basename)[0] + ext_suffix
+                    # pngquant is single-threaded; it holds the image and its palette copy
+                    with governor.acquire(cpu=1, mem_mb=governor.decoded_mb([path]) * 2) as lease:
+                        result = job.run(
+                            cmd,
+                            inputs=[path],
+                            outputs=[os.path.join(os.path.dirname(path), out_name)],
+                            timeout=60,
+                            lease=lease,
+                        )
+
+                    if result.returncode == 0:
+                        successes.append(out_name)
+                        out_path = os.path.join(os.path.dirname(path), out_name)
+                        saved["pngquant"] += _file_size(path) - _file_size(out_path)
+                        if pool:
+                            passes.append((path, out_name, pool.submit(
+                                _finish, job, path, out_path, optimiser if lossless else False, modern
+                            )))
+                    elif result.returncode == 99:
+                        # pngquant exit 99 = file already exists (no --force)
+                        errors.append(f"{basename}: output already exists (enable overwrite)")
+                    else:
+                        err = (result.stderr or result.stdout or "").strip()
+                        errors.append(f"{basename}: {err or f'exit {result.returncode}'}")
+
+                # ── Wait for the lossless pass and WebP / AVIF ────────────────
+                chosen    = []
+                manifests = {}   # manifest path → {source name: entry}
+                if pool:
+                    job.stage("finish")
+                    for path, out_name, future in passes:
+                        try:
+                            shrunk, entry = future.result()
+                        except Exception as ex:
+                            errors.append(f"{out_name}: {ex}")
+                            continue
+                        saved["lossless"] += shrunk
+                        if entry:
+                            png8 = entry["candidates"][0]["bytes"]
+                            best = next(c for c in entry["candidates"]
+                                        if c["format"] == entry["chosen_format"])
+                            saved["variants"] += png8 - best["bytes"]
+                            if entry["chosen"] != out_name:
+                                chosen.append(entry["chosen"])
+                            manifest = os.path.join(
+                                os.path.dirname(path),
+                                str(prefs.get("manifest") or "crusher-manifest.json"))
+                            manifests.setdefault(manifest, {})[os.path.basename(path)] = entry
+            finally:
+                # On an error, drop the queued passes; running ones finish first
+                if pool:
+                    pool.shutdown(cancel_futures=True)
+            if manifests:
+                from variants import write_manifest
+                for manifest, entries in manifests.items():
+                    write_manifest(manifest, entries)
 
             # ── Build result summary ──────────────────────────────────────────
+            job.stage("assemble")
             if errors and not successes:
                 return {
                     "ok": False,
@@ -213,6 +300,14 @@ class CrusherAPI:
                     f"{len(successes)} file{'s' if len(successes) != 1 else ''} crushed:"
                 )
                 msg_parts += successes
+                msg_parts.append(f"\nSaved {_kb(saved['pngquant'])} with pngquant"
+                                 + (f", {_kb(saved['lossless'])} more losslessly" if lossless else ""))
+                if modern:
+                    msg_parts.append(
+                        f"{len(chosen)} smaller as {' / '.join(f.upper() for f in formats)}"
+                        f" (another {_kb(saved['variants'])}):"
+                    )
+                    msg_parts += chosen
             if errors:
                 msg_parts.append("\nWarnings:")
                 msg_parts += errors
@@ -221,6 +316,8 @@ class CrusherAPI:
                 "ok": True,
                 "message": "\n".join(msg_parts),
                 "commands": commands,
+                "saved": saved,
+                "manifests": sorted(manifests),
             }
 
         except subprocess.TimeoutExpired:
@@ -229,6 +326,80 @@ class CrusherAPI:
             return {"ok": False, "message": f"Unexpected error:\n{ex}", "commands": []}
 
 
+# ── After pngquant ────────────────────────────────────────────────────────────
+def _finish(job, src: str, path: str, optimiser, modern: dict | None) -> tuple:
+    """
+    The work on one PNG8 after pngquant: the lossless pass (`optimiser` as
+    for _lossless; False skips it), then WebP / AVIF.  Returns
+    (bytes saved losslessly, manifest entry or None).
+    """
+    shrunk = 0 if optimiser is False else _lossless(job, optimiser, path)
+    if not modern:
+        return shrunk, None
+    from variants import choose
+    # Source and PNG8 decoded as RGBA, plus one encode buffer per format
+    mem = governor.decoded_mb([src]) * (3 + len(modern["formats"]))
+    with governor.acquire(cpu=1, mem_mb=mem):
+        return shrunk, choose(src, path, modern["formats"], modern["quality"], modern["min_psnr"])
+
+
+def _lossless(job, optimiser: tuple | None, path: str) -> int:
+    """
+    Recompress `path` without changing a pixel; returns the bytes saved.
+    The result goes to a hidden .partial file next to it and replaces the
+    output only if it is smaller.
+    """
+    partial = partial_path(path)
+    before  = _file_size(path)
+    try:
+        with governor.acquire(cpu=1, mem_mb=governor.decoded_mb([path]) * 2) as lease:
+            if not optimiser:
+                from recompress import recompress_file
+                return recompress_file(path)
+
+            name, binary = optimiser
+            result = job.run([binary] + OPTIMISERS[name] + [partial, path],
+                             inputs=[path], outputs=[partial], timeout=120, lease=lease)
+        if result.returncode != 0:
+            err = (result.stderr or result.stdout or "").strip()
+            raise RuntimeError(err or f"exit {result.returncode}")
+        after = _file_size(partial)
+        if 0 < after < before:
+            os.replace(partial, path)
+            return before - after
+        return 0
+    finally:
+        discard(partial)
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _kb(n: int) -> str:
+    return f"{n / 1024:.1f} KB"
+
+
+# ── Output names ──────────────────────────────────────────────────────────────
+def is_output(path: str, prefs: dict) -> bool:
+    """True for a file Crusher wrote itself, e.g. image.256.png / image.256.dither.png."""
+    colors = max(8, min(256, int(prefs.get("colors", 256))))
+    name   = str(prefs.get("name", ".%d")).replace("%d", str(colors))
+    if not name:
+        return False
+    # The exact colour count, not any number, so frame.0001.png is still an input
+    suffix = (
+        re.escape(name)
+        + f"(?:{re.escape(str(prefs.get('nameDither', '.dither')))})?"
+        + f"(?:{re.escape(str(prefs.get('nameIE6', '.ie6')))})?"
+        + r"\.png$"
+    )
+    return re.search(suffix, os.path.basename(path), re.IGNORECASE) is not None
+
+
 # ── Alphanumeric sort (mirrors original sortAlphaNum) ─────────────────────────
 def _alphanum_key(path: str):
     basename = os.path.basename(path)
@@ -238,10 +409,11 @@ def _alphanum_key(path: str):
 
 # ── Window ────────────────────────────────────────────────────────────────────
 def main():
+    import webview
+    from common.startup import probe
+
     api = CrusherAPI()
-    html_path = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)), "app", "index.html"
-    )
+    html_path = os.path.join(APP_DIR, "app", "index.html")
 
     window = webview.create_window(
         title="Crusher",
@@ -254,8 +426,24 @@ def main():
         min_size=(300, 200),
     )
 
+    probe(window)
     webview.start(debug=False)
+    _prefs.flush()
+
+
+# ── Headless ──────────────────────────────────────────────────────────────────
+def cli(argv: list) -> int:
+    from common.cli import run_cli
+    return run_cli(
+        CrusherAPI(), argv,
+        tool="Crusher",
+        extensions={".png"},
+        ignore=is_output,
+        description="Reduce PNG colour depth with pngquant, one JSON line per file.",
+    )
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(cli(sys.argv[1:]))
     main()
@@ -0,0 +1,97 @@
+"""
+Lossless PNG recompression, the fallback when neither oxipng nor optipng
+is installed.
+
+pngquant writes its palette images with ordinary zlib settings.  Here the
+image data (the IDAT stream) is inflated and deflated again at the highest
+effort: with zopfli when the `zopfli` package is installed, otherwise with
+zlib at level 9 under each of its strategies, keeping the smallest.  The
+scanline filters and pixels are left exactly as they are.  Metadata chunks
+(text, timestamps …) are dropped; chunks that change how the image looks
+(palette, transparency, colour space, pixel size) are kept.
+
+Animated PNGs are left untouched.
+"""
+
+import struct
+import zlib
+
+from common.atomic import atomic_write
+
+SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Chunks copied to the output; IDAT is rewritten, everything else is dropped
+KEEP = {b"IHDR", b"PLTE", b"tRNS", b"gAMA", b"cHRM", b"sRGB", b"iCCP", b"sBIT",
+        b"pHYs", b"IEND"}
+
+_STRATEGIES = (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED)
+
+
+def _chunks(data: bytes):
+    """(type, body) for each chunk; raises ValueError on a damaged file."""
+    if not data.startswith(SIGNATURE):
+        raise ValueError("not a PNG file")
+    pos = len(SIGNATURE)
+    while pos < len(data):
+        if pos + 8 > len(data):
+            raise ValueError("truncated chunk header")
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        if len(body) != length:
+            raise ValueError(f"truncated {kind.decode('latin-1')} chunk")
+        yield kind, body
+        pos += 12 + length
+
+
+def _chunk(kind: bytes, body: bytes) -> bytes:
+    return (struct.pack(">I", len(body)) + kind + body
+            + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF))
+
+
+def _deflate(raw: bytes) -> bytes:
+    try:
+        import zopfli.zlib
+        return zopfli.zlib.compress(raw)
+    except ImportError:
+        pass
+    best = None
+    for strategy in _STRATEGIES:
+        c = zlib.compressobj(9, zlib.DEFLATED, zlib.MAX_WBITS, 9, strategy)
+        out = c.compress(raw) + c.flush()
+        if best is None or len(out) < len(best):
+            best = out
+    return best
+
+
+def recompress(data: bytes) -> bytes:
+    """The PNG `data` recompressed, or `data` itself if that is no smaller."""
+    chunks = list(_chunks(data))
+    kinds  = [k for k, _ in chunks]
+    if b"acTL" in kinds or b"IDAT" not in kinds:
+        return data
+
+    idat = zlib.decompress(b"".join(b for k, b in chunks if k == b"IDAT"))
+    out  = [SIGNATURE]
+    for kind, body in chunks:
+        if kind == b"IDAT":
+            if idat is not None:   # one IDAT holds the whole stream
+                out.append(_chunk(b"IDAT", _deflate(idat)))
+                idat = None
+        elif kind in KEEP:
+            out.append(_chunk(kind, body))
+    result = b"".join(out)
+    return result if len(result) < len(data) else data
+
+
+def recompress_file(path: str) -> int:
+    """
+    Recompress the PNG at `path` in place (atomically, see common/atomic.py).
+    Returns the bytes saved; 0 leaves the file untouched.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    smaller = recompress(data)
+    if smaller is data:
+        return 0
+    atomic_write(path, smaller)
+    return len(data) - len(smaller)
@@ -0,0 +1,134 @@
+"""
+WebP and AVIF alternatives to Crusher's palette PNG (needs Pillow).
+
+The source and the finished PNG8 are decoded once.  From them come the
+candidates, encoded in memory:
+
+    webp-lossless   the PNG8's own pixels, losslessly
+    webp            the source, lossy at the given quality
+    avif            the source, lossy at the given quality
+
+Each is scored by its PSNR against the source.  Candidates with the PNG8's
+pixels are always acceptable (the PNG8 is what the user asked for); lossy
+ones must reach `min_psnr`.  The smallest acceptable candidate wins, and
+only a winner other than the PNG8 itself is written out.  A WebP / AVIF
+left by an earlier run that lost this time is removed.
+"""
+
+import io
+import json
+import math
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+
+from common.atomic import atomic_write
+
+FORMATS = {"webp": "WEBP", "avif": "AVIF"}
+
+_manifest_lock = threading.Lock()
+
+
+def missing(formats: list) -> str | None:
+    """Why `formats` cannot be written here, or None."""
+    try:
+        from PIL import features
+    except ImportError:
+        return "Pillow is needed for WebP / AVIF output.\n\nInstall via: pip install pillow"
+    for fmt in formats:
+        if not features.check(fmt):
+            return f"This Pillow build cannot write {fmt.upper()}.\n\nUpgrade via: pip install -U pillow"
+    return None
+
+
+def psnr(a, b) -> float | None:
+    """Peak signal-to-noise ratio of two RGBA images in dB; None when identical."""
+    from PIL import ImageChops, ImageStat
+    squares = ImageStat.Stat(ImageChops.difference(a, b)).sum2
+    mse     = sum(squares) / (len(squares) * a.width * a.height)
+    return round(10 * math.log10(255 ** 2 / mse), 2) if mse else None
+
+
+def _encode(image, fmt: str, **options) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, FORMATS[fmt], **options)
+    return buf.getvalue()
+
+
+def choose(src_path: str, png_path: str, formats: list, quality: int,
+           min_psnr: float) -> dict:
+    """
+    Score the candidates for one image and write the winner next to the
+    PNG8 (same name, the format's extension).  Returns the manifest entry:
+    { source_bytes, chosen, chosen_format, candidates: [{ file, format,
+    bytes, psnr }, …] }; both WebP candidates share a file name, so
+    chosen_format tells them apart.
+    """
+    from PIL import Image
+
+    with Image.open(src_path) as im:
+        source = im.convert("RGBA")
+    with Image.open(png_path) as im:
+        png8 = im.convert("RGBA")
+    opaque = source.getextrema()[3][0] == 255
+    lossy  = source.convert("RGB") if opaque else source
+    stem   = os.path.splitext(png_path)[0]
+
+    png8_psnr  = psnr(source, png8)
+    candidates = [{"file": png_path, "format": "png8", "bytes": os.path.getsize(png_path),
+                   "psnr": png8_psnr, "ok": True}]
+    encoded = {}
+    for fmt in formats:
+        if fmt == "webp":
+            data = _encode(png8, fmt, lossless=True, quality=100, method=6)
+            candidates.append({"file": stem + ".webp", "format": "webp-lossless",
+                               "bytes": len(data), "psnr": png8_psnr, "ok": True})
+            encoded[len(candidates) - 1] = data
+        data = _encode(lossy, fmt, quality=quality)
+        with Image.open(io.BytesIO(data)) as im:
+            score = psnr(source, im.convert("RGBA"))
+        candidates.append({"file": stem + "." + fmt, "format": fmt, "bytes": len(data),
+                           "psnr": score, "ok": score is None or score >= min_psnr})
+        encoded[len(candidates) - 1] = data
+
+    best = min((i for i, c in enumerate(candidates) if c["ok"]),
+               key=lambda i: candidates[i]["bytes"])
+    if best in encoded:
+        atomic_write(candidates[best]["file"], encoded[best])
+    for ext in FORMATS:
+        stale = stem + "." + ext
+        if stale != candidates[best]["file"] and os.path.exists(stale):
+            os.remove(stale)
+
+    for c in candidates:
+        c["file"] = os.path.basename(c["file"])
+        del c["ok"]
+    return {"source_bytes":  os.path.getsize(src_path),
+            "chosen":        candidates[best]["file"],
+            "chosen_format": candidates[best]["format"],
+            "candidates":    candidates}
+
+
+def write_manifest(path: str, entries: dict):
+    """
+    Merge {source name: entry} into the JSON manifest at `path`.  Batches
+    finishing together (watch workers, other Crusher processes) take turns:
+    a lock in this process, and flock(2) on a hidden .name.lock beside the
+    manifest, so no writer drops another's entries.
+    """
+    directory, name = os.path.split(path)
+    with _manifest_lock, open(os.path.join(directory, f".{name}.lock"), "a") as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)   # released when the file closes
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        images = manifest.setdefault("images", {})
+        images.update(entries)
+        atomic_write(path, json.dumps(manifest, indent=2, sort_keys=True))
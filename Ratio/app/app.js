@@ -192,7 +192,11 @@ function update(vx, vy, vs, vp, vr, active) {
     scaleEl.value = isInt(prefScale) ? prefScale.toFixed(0) : prefScale.toFixed(2);
   }
 
-  if (vr && prefWidth > 0 && prefHeight > 0 && !prefLock) {
+  if (vr && prefWidth > 0 && prefHeight > 0 && !prefLock && window.pywebview) {
+    prefAspect = prefWidth / prefHeight;
+    aspectEl.textContent = prefAspect.toFixed(3);
+    updateRatioLabel(prefWidth, prefHeight);
+  } else if (vr && prefWidth > 0 && prefHeight > 0 && !prefLock) {
     let w = 1;
     let foundRatio = false;
     while (!foundRatio && w <= 100) {
@@ -209,6 +213,18 @@ function update(vx, vy, vs, vp, vr, active) {
   }
 }
 
+/**
+ * Ratio label from the Python continued-fraction search: the exact ratio when
+ * both terms fit in 100, otherwise the closest approximation ("≈ 37 × 20").
+ * Stale replies (the size changed while waiting) are ignored.
+ */
+async function updateRatioLabel(width, height) {
+  const result = await window.pywebview.api.best_ratios(width, height, 100, 1);
+  if (!result.ok || width !== prefWidth || height !== prefHeight) return;
+  prefRatio = result.label;
+  ratioEl.textContent = prefRatio;
+}
+
 function isInt(n) {
   return (n % 1) === 0;
 }
@@ -336,7 +352,60 @@ function toggleLock() {
 // Mirrors the original auto() function
 // ─────────────────────────────────────────────────────────────────────────────
 
-function auto() {
+// Rows per page fetched from RatioAPI.list_sizes
+const LIST_PAGE_SIZE = 200;
+
+async function auto() {
+  if (!window.pywebview) return autoScan();
+  const tbody = document.getElementById("ratio-tbody");
+  tbody.innerHTML = "";
+  await appendSizes(0);
+  showList();
+}
+
+/**
+ * Append one page of exact sizes from Python (GCD-based, no width scan),
+ * followed by a "more" row when further pages exist.
+ */
+async function appendSizes(page) {
+  const tbody  = document.getElementById("ratio-tbody");
+  const limit  = prefLimit === "none" ? "none" : prefLimit;
+  const result = await window.pywebview.api.list_sizes(
+    prefWidth, prefHeight, limit, page, LIST_PAGE_SIZE
+  );
+
+  for (const row of result.rows) {
+    const pct = row.scale.toFixed(2);
+    const tr  = document.createElement("tr");
+    tr.innerHTML = `<td>${pct}%</td><td>${row.width} × ${row.height}</td>`;
+    tr.addEventListener("click", () => {
+      prefScale = (row.width / prefWidth) * 100;
+      showFront();
+      update(true, true, true, true, false);
+      savePrefs();
+    });
+    tbody.appendChild(tr);
+  }
+
+  if (result.page + 1 < result.pages) {
+    const tr = document.createElement("tr");
+    tr.className = "no-results";
+    tr.innerHTML = `<td colspan="2">Show more (${result.total - (result.page + 1) * LIST_PAGE_SIZE} left)</td>`;
+    tr.addEventListener("click", () => {
+      tr.remove();
+      appendSizes(result.page + 1);
+    });
+    tbody.appendChild(tr);
+  } else if (result.total === 0) {
+    const tr = document.createElement("tr");
+    tr.className = "no-results";
+    tr.innerHTML = `<td colspan="2">No results — try a smaller step size</td>`;
+    tbody.appendChild(tr);
+  }
+}
+
+// Browser-mode fallback: the original step-by-step width scan
+function autoScan() {
   const tbody  = document.getElementById("ratio-tbody");
   const limit  = prefLimit === "none" ? 1 : parseFloat(prefLimit);
   tbody.innerHTML = "";
@@ -0,0 +1,192 @@
+"""
+Ratio - batch size resolution.
+
+Resolves a whole manifest of source dimensions in one vectorised NumPy pass,
+using the same rules as update() in app/app.js: output = source × scale,
+snapped to the nearest multiple of the step size ("limit").
+
+Each row needs `width` and `height`; the output size is chosen by the first
+of these columns that is present:
+
+    target_width / target_height   scale to an exact width or height
+    max_width / max_height         largest scale that fits inside the box
+    scale                          percentage, as the scale slider
+
+`ratio` ("16x9", "16:9", "16 × 9" or 1.778) first crops the source to the
+largest centred area with that aspect ratio.  `limit` overrides the default
+step size per row ("none" or 0 disables snapping).  A row whose width or
+height is not a positive number gets ok False, the reason in `error`, and
+no outputs.
+
+Requires:  pip install numpy
+"""
+
+import csv
+import re
+
+import numpy as np
+
+COLUMNS = (
+    "width", "height", "scale", "target_width", "target_height",
+    "max_width", "max_height", "ratio", "limit",
+)
+
+OUTPUT_COLUMNS = (
+    "width", "height", "out_width", "out_height",
+    "scale_x", "scale_y", "aspect", "exact", "ok", "error",
+)
+
+
+# ── parsing ────────────────────────────────────────────────────────────────
+
+def parse_ratio(value) -> float:
+    """'16x9' / '16:9' / '16 × 9' / 1.778 → width/height as a float (NaN if blank)."""
+    if value is None or value == "":
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    parts = re.split(r"\s*[x×:/]\s*", str(value).strip().lower())
+    try:
+        if len(parts) == 2:
+            return float(parts[0]) / float(parts[1])
+        return float(parts[0])
+    except (ValueError, ZeroDivisionError):
+        return np.nan
+
+
+def _number(value) -> float:
+    if value is None or value == "" or value == "none":
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _column(rows: list, key: str) -> np.ndarray:
+    values = [r.get(key) for r in rows]
+    try:
+        # Fast path: numbers, numeric strings and None (→ NaN) convert in C
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([_number(v) for v in values], dtype=np.float64)
+
+
+def _columns(rows: list, limit) -> dict:
+    """List of dicts → dict of float arrays (NaN where a value is missing)."""
+    cols = {c: _column(rows, c) for c in COLUMNS if c not in ("ratio", "limit")}
+    cols["ratio"] = np.array([parse_ratio(r.get("ratio")) for r in rows], dtype=np.float64)
+
+    default = 0.0 if limit in (None, "", "none") else float(limit)
+    steps = []
+    for r in rows:
+        step = r.get("limit", "")
+        if step == "" or step is None:
+            steps.append(default)
+        else:
+            steps.append(0.0 if step == "none" else _number(step))
+    cols["limit"] = np.nan_to_num(np.array(steps, dtype=np.float64))
+    return cols
+
+
+def read_csv(path: str) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            {k.strip().lower(): (v or "").strip() for k, v in rec.items() if k}
+            for rec in csv.DictReader(f)
+        ]
+
+
+def write_csv(path: str, rows: list):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# ── resolution ─────────────────────────────────────────────────────────────
+
+def resolve(rows: list, limit=None, scale: float = 100.0) -> dict:
+    """
+    Resolve every row at once.  `limit` is the default step size and `scale`
+    the default percentage for rows that set neither a scale nor a target.
+    Returns a dict of arrays keyed by OUTPUT_COLUMNS.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return _resolve(_columns(rows, limit), scale)
+
+
+def _resolve(c: dict, scale: float) -> dict:
+    w, h = c["width"], c["height"]
+
+    # Rows without a usable source size resolve to nothing
+    bad_w = ~(np.isfinite(w) & (w > 0))
+    bad_h = ~(np.isfinite(h) & (h > 0))
+    valid = ~(bad_w | bad_h)
+    error = np.where(bad_w & bad_h, "width and height must be positive numbers",
+                     np.where(bad_w, "width must be a positive number",
+                              "height must be a positive number")).astype(object)
+    error[valid] = None
+
+    # Crop to the requested aspect ratio (largest centred area)
+    r = c["ratio"]
+    has_r = ~np.isnan(r) & (r > 0)
+    wider = w / h > r
+    w = np.where(has_r & wider, h * r, w)
+    h = np.where(has_r & ~wider, w / np.where(has_r, r, 1.0), h)
+
+    # Scale factor, highest-priority column first
+    fit = np.fmin(c["max_width"] / w, c["max_height"] / h)
+    s = np.where(~np.isnan(c["scale"]), c["scale"] / 100.0, scale / 100.0)
+    s = np.where(~np.isnan(fit), fit, s)
+    s = np.where(~np.isnan(c["target_height"]), c["target_height"] / h, s)
+    s = np.where(~np.isnan(c["target_width"]), c["target_width"] / w, s)
+
+    ox, oy = w * s, h * s
+
+    # Snap to the nearest step; fit-to-box rows round down so they still fit
+    step = c["limit"]
+    snap = step > 0
+    safe = np.where(snap, step, 1.0)
+    rounder = np.where(~np.isnan(fit), np.floor(ox / safe + 1e-9), np.round(ox / safe))
+    sx = np.where(snap, rounder * safe, np.round(ox, 2))
+    rounder = np.where(~np.isnan(fit), np.floor(oy / safe + 1e-9), np.round(oy / safe))
+    sy = np.where(snap, rounder * safe, np.round(oy, 2))
+
+    exact = np.isclose(sx, ox) & np.isclose(sy, oy) & valid
+    result = {
+        "width":      w,
+        "height":     h,
+        "out_width":  sx,
+        "out_height": sy,
+        "scale_x":    np.round(sx / w * 100, 4),
+        "scale_y":    np.round(sy / h * 100, 4),
+        "aspect":     np.round(sx / np.where(sy > 0, sy, np.nan), 4),
+    }
+    for k in result:
+        result[k] = np.where(valid, result[k], np.nan)
+    result.update(exact=exact, ok=valid, error=error)
+    return result
+
+
+def to_rows(result: dict) -> list:
+    """Dict of arrays → list of plain dicts (JSON / CSV friendly)."""
+    cols = []
+    for k in OUTPUT_COLUMNS:
+        col = result[k]
+        if k == "exact":
+            # No answer, rather than False, for rows that did not resolve
+            obj = col.astype(object)
+            obj[~result["ok"]] = None
+            cols.append(obj.tolist())
+            continue
+        if col.dtype != np.float64:
+            cols.append(col.tolist())
+            continue
+        obj = col.astype(object)
+        if k in ("width", "height", "out_width", "out_height"):
+            whole = np.isfinite(col) & (col == np.floor(col))
+            obj[whole] = col[whole].astype(np.int64)
+        obj[np.isnan(col)] = None            # NaN is not valid JSON
+        cols.append(obj.tolist())
+    return [dict(zip(OUTPUT_COLUMNS, values)) for values in zip(*cols)]
@@ -2,18 +2,24 @@
 """
 Ratio - PyWebView port of the original Dashcode Dashboard widget.
 Requires: pip install pywebview
+Optional: pip install numpy (batch resolution)
 Run:      python main.py
 """
 
-import webview
-import json
 import os
+import sys
 
 # ──────────────────────────────────────────────
 # Preferences are stored in a small JSON file
 # alongside the script (mirrors widget.preferenceForKey)
 # ──────────────────────────────────────────────
-PREFS_PATH = os.path.join(os.path.dirname(__file__), "ratio_prefs.json")
+APP_DIR    = os.path.dirname(os.path.abspath(__file__))
+PREFS_PATH = os.path.join(APP_DIR, "ratio_prefs.json")
+
+# Repository root, for the shared `common` package
+sys.path.insert(0, os.path.dirname(APP_DIR))
+
+from common.prefs import PrefsStore  # noqa: E402
 
 DEFAULT_PREFS = {
     "preset":    1,
@@ -27,6 +33,10 @@ DEFAULT_PREFS = {
     "height":    1080,
 }
 
+_prefs = PrefsStore(PREFS_PATH, DEFAULT_PREFS)
+
+NUMPY_MISSING = "NumPy not found.\n\nInstall via: pip install numpy"
+
 
 class RatioAPI:
     """Python-side API exposed to the JS front-end via window.pywebview.api.*"""
@@ -34,28 +44,114 @@ class RatioAPI:
     # ── prefs ──────────────────────────────────────────────────────────────
 
     def load_prefs(self):
-        if os.path.exists(PREFS_PATH):
-            try:
-                with open(PREFS_PATH) as f:
-                    saved = json.load(f)
-                prefs = {**DEFAULT_PREFS, **saved}
-                return prefs
-            except Exception:
-                pass
-        return dict(DEFAULT_PREFS)
+        return _prefs.load()
 
     def save_prefs(self, prefs: dict):
+        return _prefs.save(prefs)
+
+    def erase_prefs(self):
+        return _prefs.erase()
+
+    # ── batch resolution ───────────────────────────────────────────────────
+
+    def resolve_batch(self, rows: list, limit=None, scale=100.0) -> dict:
+        """
+        Resolve a list of {width, height, scale | target_width | max_width …}
+        rows in one vectorised pass (see batch.py).  `limit` defaults to the
+        saved step size.  Returns { ok, message, rows }
+        """
+        try:
+            import batch
+        except ImportError:
+            return {"ok": False, "message": NUMPY_MISSING, "rows": []}
         try:
-            with open(PREFS_PATH, "w") as f:
-                json.dump(prefs, f, indent=2)
-            return True
+            if limit is None:
+                limit = self.load_prefs().get("limit", "none")
+            out = batch.to_rows(batch.resolve(rows, limit, scale))
+            message = f"{len(out)} row{'s' if len(out) != 1 else ''} resolved."
+            invalid = sum(not r["ok"] for r in out)
+            if invalid:
+                message += f" {invalid} without a valid width and height."
+            return {"ok": True, "message": message, "rows": out}
         except Exception as e:
-            return str(e)
+            return {"ok": False, "message": str(e), "rows": []}
 
-    def erase_prefs(self):
-        if os.path.exists(PREFS_PATH):
-            os.remove(PREFS_PATH)
-        return True
+    def resolve_csv(self, path: str, out_path: str = None, limit=None, scale=100.0) -> dict:
+        """
+        Resolve every row of a CSV manifest.  Results are written to `out_path`
+        when given, and always returned.  Returns { ok, message, rows }
+        """
+        try:
+            import batch
+        except ImportError:
+            return {"ok": False, "message": NUMPY_MISSING, "rows": []}
+        try:
+            result = self.resolve_batch(batch.read_csv(path), limit, scale)
+            if result["ok"] and out_path:
+                batch.write_csv(out_path, result["rows"])
+                result["message"] += f" Written to {os.path.basename(out_path)}."
+            return result
+        except Exception as e:
+            return {"ok": False, "message": str(e), "rows": []}
+
+    # ── conforming sizes ───────────────────────────────────────────────────
+
+    def list_sizes(self, width, height, limit=None, page: int = 0, page_size: int = 200) -> dict:
+        """
+        One page of the exact integer sizes that keep the width:height ratio
+        and are divisible by `limit` (the saved step size by default), largest
+        first.  Returns { ok, message, rows, total, page, pages, ratio }
+        """
+        from rational import SizeList
+        try:
+            if limit is None:
+                limit = self.load_prefs().get("limit", "none")
+            sizes = SizeList(width, height, limit)
+            total = len(sizes)
+            page_size = max(1, int(page_size))
+            pages = -(-total // page_size)
+            page  = min(max(0, int(page)), max(0, pages - 1))
+            return {
+                "ok":      True,
+                "message": f"{total} size{'s' if total != 1 else ''}",
+                "rows":    sizes.page(page, page_size),
+                "total":   total,
+                "page":    page,
+                "pages":   pages,
+                "ratio":   f"{sizes.a} × {sizes.b}",
+            }
+        except Exception as e:
+            return {"ok": False, "message": str(e), "rows": [], "total": 0,
+                    "page": 0, "pages": 0, "ratio": ""}
+
+    # ── ratio label ────────────────────────────────────────────────────────
+
+    def best_ratios(self, width, height, max_term: int = 100, count: int = 5) -> dict:
+        """
+        Best "w × h" approximations of width/height with both terms ≤ max_term
+        (continued fractions, see rational.py), ranked by error.
+        Returns { ok, message, label, rows }
+        """
+        from rational import approximations
+        try:
+            rows = approximations(width, height, max_term, count)
+            best = rows[0]
+            label = best["ratio"] if best["exact"] else "≈ " + best["ratio"]
+            return {"ok": True, "message": label, "label": label, "rows": rows}
+        except Exception as e:
+            return {"ok": False, "message": str(e), "label": "", "rows": []}
+
+    def best_ratios_batch(self, sizes: list, max_term: int = 100, count: int = 1) -> dict:
+        """
+        best_ratios for a list of [width, height] pairs.
+        Returns { ok, message, results: [{ label, rows } …] }
+        """
+        results = []
+        for width, height in sizes:
+            r = self.best_ratios(width, height, max_term, count)
+            results.append({"label": r["label"], "rows": r["rows"]})
+        return {"ok": True, "message": f"{len(results)} size{'s' if len(results) != 1 else ''}",
+                "results": results}
 
     # ── open external URL ──────────────────────────────────────────────────
 
@@ -66,8 +162,11 @@ class RatioAPI:
 
 
 def main():
+    import webview
+    from common.startup import probe
+
     api = RatioAPI()
-    html_path = os.path.join(os.path.dirname(__file__), "app", "index.html")
+    html_path = os.path.join(APP_DIR, "app", "index.html")
 
     window = webview.create_window(
         title="Ratio",
@@ -80,7 +179,9 @@ def main():
         min_size=(270, 145),
     )
 
+    probe(window)
     webview.start(debug=False)
+    _prefs.flush()
 
 
 if __name__ == "__main__":
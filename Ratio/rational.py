@@ -0,0 +1,152 @@
+"""
+Ratio - exact integer arithmetic for aspect ratios.
+
+Works on Fractions throughout, so there is no float-modulo error however
+large the canvas.
+"""
+
+from fractions import Fraction
+from math import gcd
+
+
+def to_fraction(value) -> Fraction:
+    """Exact Fraction of an int, float or numeric string ("1920", 1066.67)."""
+    if isinstance(value, Fraction):
+        return value
+    if isinstance(value, int):
+        return Fraction(value)
+    return Fraction(str(value).strip())
+
+
+def reduced_ratio(width, height) -> tuple:
+    """Width/height as the coprime integer pair (a, b), e.g. 1920×1080 → (16, 9)."""
+    r = to_fraction(width) / to_fraction(height)
+    return r.numerator, r.denominator
+
+
+def _lcm(a: int, b: int) -> int:
+    return a * b // gcd(a, b)
+
+
+# ── conforming sizes ───────────────────────────────────────────────────────
+
+class SizeList:
+    """
+    Every integer size w × h with w:h equal to the source ratio, both sides
+    divisible by `limit`, and limit ≤ w < width – listed largest first, like
+    the original auto() list.
+
+    All such sizes are (a·k, b·k) for the reduced ratio a:b, with k a multiple
+    of a fixed step, so the list is an arithmetic sequence: its length and
+    any page of it are computed directly, never by scanning widths.
+    """
+
+    def __init__(self, width, height, limit=None):
+        self.width  = to_fraction(width)
+        self.height = to_fraction(height)
+        if self.width <= 0 or self.height <= 0:
+            raise ValueError("Width and height must be positive")
+        self.a, self.b = reduced_ratio(self.width, self.height)
+
+        step = Fraction(1) if limit in (None, "", "none") else to_fraction(limit)
+        if step <= 0:
+            step = Fraction(1)
+        self.limit = step
+
+        # a·k / step is an integer  ⇔  k is a multiple of p / gcd(p, a·q)
+        p, q = step.numerator, step.denominator
+        self.step = _lcm(p // gcd(p, self.a * q), p // gcd(p, self.b * q))
+
+        # Smallest k with a·k ≥ limit, largest with a·k < width
+        k_lo = -(-step // self.a)                  # ceil
+        k_lo = -(-k_lo // self.step) * self.step   # up to a multiple of step
+        k_hi = -(-self.width // self.a) - 1        # ceil(width / a) − 1
+        k_hi = (k_hi // self.step) * self.step
+        self.k_lo = int(max(k_lo, self.step))
+        self.k_hi = int(k_hi)
+
+    def __len__(self) -> int:
+        if self.k_hi < self.k_lo:
+            return 0
+        return (self.k_hi - self.k_lo) // self.step + 1
+
+    def __getitem__(self, i: int) -> dict:
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        k = self.k_hi - i * self.step
+        w, h = self.a * k, self.b * k
+        return {"width": w, "height": h, "scale": round(float(w / self.width * 100), 4)}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def page(self, page: int = 0, size: int = 200) -> list:
+        start = max(0, page) * size
+        return [self[i] for i in range(start, min(start + size, len(self)))]
+
+
+# ── best rational approximations ───────────────────────────────────────────
+
+def _convergents(x: Fraction, bound: int):
+    """
+    Convergents of the continued fraction of 0 < x ≤ 1 with denominator ≤ bound,
+    plus the last semiconvergent under the bound.  One step per partial
+    quotient, so O(log bound) candidates in total.
+    """
+    h0, k0, h1, k1 = 0, 1, 1, 0
+    rest = x
+    while True:
+        a = rest.numerator // rest.denominator
+        h2, k2 = a * h1 + h0, a * k1 + k0
+        if k2 > bound:
+            # Largest semiconvergent (h0 + j·h1) / (k0 + j·k1) still under the bound
+            j = (bound - k0) // k1 if k1 else 0
+            if j > 0:
+                yield Fraction(h0 + j * h1, k0 + j * k1)
+            return
+        yield Fraction(h2, k2)
+        frac = rest - a
+        if frac == 0:
+            return
+        rest = 1 / frac
+        h0, k0, h1, k1 = h1, k1, h2, k2
+
+
+def approximations(width, height, max_term: int = 100, count: int = 5) -> list:
+    """
+    Best small-integer ratios "w × h" for width/height with both terms
+    ≤ max_term, ranked by error (|w/h − width/height|).  An exact ratio
+    within the bound comes first with error 0.
+    """
+    x = to_fraction(width) / to_fraction(height)
+    if x <= 0:
+        raise ValueError("Width and height must be positive")
+    max_term = max(1, int(max_term))
+
+    # Approximate the ratio ≤ 1 so the bounded denominator is the larger term
+    flip = x > 1
+    y = 1 / x if flip else x
+
+    seen = set()
+    rows = []
+    for c in _convergents(y, max_term):
+        if c.numerator == 0 or c in seen:
+            continue
+        seen.add(c)
+        w, h = (c.denominator, c.numerator) if flip else (c.numerator, c.denominator)
+        aspect = Fraction(w, h)
+        rows.append({
+            "width":  w,
+            "height": h,
+            "ratio":  f"{w} × {h}",
+            "aspect": round(float(aspect), 6),
+            "error":  round(float(abs(aspect - x)), 6),
+            "exact":  aspect == x,
+        })
+
+    rows.sort(key=lambda r: (r["error"], r["width"] + r["height"]))
+    return rows[:max(1, count)]
@@ -18,10 +18,14 @@ let prefNameSprite  = "Sheet-%d";
 let prefNameFile    = "Files-";
 let prefScale       = 3;
 let prefOutput      = 0;
+let prefVideoFps    = 0;
+let prefVideoStride = 1;
+let prefIncremental = true;
+let prefTexture     = 0;
 
 // ── DOM refs ──────────────────────────────────────────────────────────────────
-let typeEl, sizeEl, tileEl, locEl, scaleEl, outputEl;
-let nameSpriteEl, nameFileEl;
+let typeEl, sizeEl, tileEl, locEl, scaleEl, outputEl, textureEl;
+let nameSpriteEl, nameFileEl, videoFpsEl, videoStrideEl, incrementalEl;
 let dropZone, imStatusEl;
 
 // ─────────────────────────────────────────────────────────────────────────────
@@ -38,6 +42,10 @@ async function savePrefs() {
     nameFile:    prefNameFile,
     scale:       prefScale,
     output:      prefOutput,
+    videoFps:    prefVideoFps,
+    videoStride: prefVideoStride,
+    incremental: prefIncremental,
+    texture:     prefTexture,
   };
   if (window.pywebview) {
     await window.pywebview.api.save_prefs(prefs);
@@ -65,8 +73,12 @@ async function init() {
   locEl         = document.getElementById("loc");
   scaleEl       = document.getElementById("scale");
   outputEl      = document.getElementById("output");
+  textureEl     = document.getElementById("texture");
   nameSpriteEl  = document.getElementById("nameSprite");
   nameFileEl    = document.getElementById("nameFile");
+  videoFpsEl    = document.getElementById("videoFps");
+  videoStrideEl = document.getElementById("videoStride");
+  incrementalEl = document.getElementById("incremental");
   dropZone      = document.getElementById("drop-zone");
   imStatusEl    = document.getElementById("im-status");
 
@@ -85,6 +97,10 @@ function applyPrefs(prefs) {
   prefNameFile    = prefs.nameFile    ?? prefNameFile;
   prefScale       = parseInt(prefs.scale      ?? prefScale);
   prefOutput      = parseInt(prefs.output     ?? prefOutput);
+  prefVideoFps    = parseFloat(prefs.videoFps ?? prefVideoFps);
+  prefVideoStride = parseInt(prefs.videoStride ?? prefVideoStride);
+  prefIncremental = prefs.incremental ?? prefIncremental;
+  prefTexture     = parseInt(prefs.texture    ?? prefTexture);
 
   typeEl.value        = prefType;
   sizeEl.value        = prefSize;
@@ -94,6 +110,10 @@ function applyPrefs(prefs) {
   nameFileEl.value    = prefNameFile;
   scaleEl.value       = prefScale;
   outputEl.value      = prefOutput;
+  textureEl.value     = prefTexture;
+  videoFpsEl.value    = prefVideoFps;
+  videoStrideEl.value = prefVideoStride;
+  incrementalEl.checked = prefIncremental;
 }
 
 // ─────────────────────────────────────────────────────────────────────────────
@@ -139,6 +159,25 @@ function updateNameSprite() { prefNameSprite = nameSpriteEl.value; savePrefs();
 function updateNameFile()   { prefNameFile   = nameFileEl.value;   savePrefs(); }
 function updateScale()      { prefScale      = parseInt(scaleEl.value); savePrefs(); }
 function updateOutput()     { prefOutput     = parseInt(outputEl.value); savePrefs(); }
+function updateTexture()    { prefTexture    = parseInt(textureEl.value); savePrefs(); }
+
+function updateVideoFps() {
+  const v = parseFloat(videoFpsEl.value);
+  if (!isNaN(v) && v >= 0) {
+    prefVideoFps = v;
+    savePrefs();
+  }
+}
+
+function updateVideoStride() {
+  const v = parseInt(videoStrideEl.value);
+  if (!isNaN(v) && v >= 1) {
+    prefVideoStride = v;
+    savePrefs();
+  }
+}
+
+function updateIncremental() { prefIncremental = incrementalEl.checked; savePrefs(); }
 
 // ─────────────────────────────────────────────────────────────────────────────
 // ImageMagick check (Settings panel)
@@ -151,7 +190,8 @@ async function checkIM() {
   if (window.pywebview) {
     const result = await window.pywebview.api.check_imagemagick(prefLocation);
     if (result.ok) {
-      imStatusEl.textContent = "✓ Found: " + result.path;
+      imStatusEl.textContent = "✓ Found: " + result.path
+        + (result.version ? " (" + result.version + ")" : "");
       imStatusEl.className   = "setting-hint ok";
     } else {
       imStatusEl.textContent = "✕ Not found at " + result.path;
@@ -231,6 +271,10 @@ async function dragDrop(event) {
     nameFile:    prefNameFile,
     scale:       prefScale,
     output:      prefOutput,
+    videoFps:    prefVideoFps,
+    videoStride: prefVideoStride,
+    incremental: prefIncremental,
+    texture:     prefTexture,
   };
 
   try {
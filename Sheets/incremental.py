@@ -0,0 +1,178 @@
+"""
+Incremental sprite-sheet rebuilds.
+
+In sprite-sheet mode with explicit cells (-geometry WxH, no offsets, so
+cells touch) and an explicit grid (-tile CxR), montage puts frame i at a
+position known in advance.  After a full build in that mode Sheets writes
+a manifest next to the sheets: the build flags, every frame's name, size,
+mtime and hash with its sheet page and tile position, and the size and
+mtime of every sheet written.
+
+When the same sequence is dropped again, only frames whose content
+changed are rendered again, alone (montage -tile 1x1 with the same
+flags), and copied over their tiles in the existing sheets (magick /
+convert, -compose Copy).  A full build happens instead when there is no
+manifest, or the flags, the frame list or any sheet on disk changed
+since, or more than half of the frames changed.
+"""
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+
+from common.atomic import atomic_copy, atomic_write
+
+FORMAT = 1
+
+
+# ── Layout ────────────────────────────────────────────────────────────────────
+
+def layout(size: str, tile: str) -> dict | None:
+    """{ cell: [w, h], cols, rows } for WxH cells in a CxR grid, else None."""
+    try:
+        w, h = (int(v) for v in size.lower().split("x"))
+        c, r = (int(v) for v in tile.lower().split("x"))
+    except ValueError:
+        return None
+    if min(w, h, c, r) <= 0:
+        return None
+    return {"cell": [w, h], "cols": c, "rows": r}
+
+
+def position(grid: dict, i: int) -> tuple:
+    """(page, x, y) of frame i."""
+    page, k = divmod(i, grid["cols"] * grid["rows"])
+    row, col = divmod(k, grid["cols"])
+    return page, col * grid["cell"][0], row * grid["cell"][1]
+
+
+def page_path(pattern: str, page: int, pages: int) -> str:
+    """montage's name for sheet `page`: %d filled in, or -N added when it writes several."""
+    if "%d" in pattern:
+        return pattern.replace("%d", str(page))
+    if pages == 1:
+        return pattern
+    stem, ext = os.path.splitext(pattern)
+    return f"{stem}-{page}{ext}"
+
+
+# ── Manifest ──────────────────────────────────────────────────────────────────
+
+def manifest_path(directory: str, stem: str) -> str:
+    return os.path.join(directory, f"{stem}.sheet.json")
+
+
+def load(path: str) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        return manifest if manifest.get("format") == FORMAT else None
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _stat(path: str) -> list | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _hash(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def fingerprint(frames: list, previous: dict | None) -> list:
+    """[name, size, mtime_ns, hash] per frame; unchanged stats reuse the old hash."""
+    known = {f[0]: f for f in (previous or {}).get("frames", [])}
+    out = []
+    for path in frames:
+        name = os.path.basename(path)
+        stat = _stat(path) or [0, 0]
+        old  = known.get(name)
+        digest = old[3] if old and old[1:3] == stat else _hash(path)
+        out.append([name] + stat + [digest])
+    return out
+
+
+def save(path: str, flags: list, outputs: list, grid: dict, frames: list):
+    """Record a finished build; `outputs` are [alpha mode, path pattern] pairs."""
+    pages  = math.ceil(len(frames) / (grid["cols"] * grid["rows"]))
+    sheets = {}
+    for _, pattern in outputs:
+        for page in range(pages):
+            sheet = page_path(pattern, page, pages)
+            sheets[sheet] = _stat(sheet)
+    manifest = {
+        "format":  FORMAT,
+        "flags":   flags,
+        "outputs": outputs,
+        **grid,
+        "frames":  [f + list(position(grid, i)) for i, f in enumerate(frames)],
+        "sheets":  sheets,
+    }
+    atomic_write(path, json.dumps(manifest, indent=1))
+
+
+def changed(previous: dict | None, flags: list, outputs: list, grid: dict,
+            frames: list) -> list | None:
+    """Indices of the frames to patch ([] when up to date), or None for a full build."""
+    if not previous or previous["flags"] != flags or previous["outputs"] != outputs:
+        return None
+    if [previous["cols"], previous["rows"], previous["cell"]] != [grid["cols"], grid["rows"],
+                                                                  grid["cell"]]:
+        return None
+    old = previous["frames"]
+    if [f[0] for f in old] != [f[0] for f in frames]:
+        return None
+    if any(_stat(sheet) != stat for sheet, stat in previous["sheets"].items()):
+        return None
+    dirty = [i for i, (a, b) in enumerate(zip(old, frames)) if a[3] != b[3]]
+    return None if len(dirty) * 2 > len(frames) else dirty
+
+
+# ── Patch ─────────────────────────────────────────────────────────────────────
+
+def patch(job, tile_cmd: list, convert_bin: str, outputs: list, grid: dict,
+          paths: list, dirty: list, lease=None) -> list:
+    """
+    Render the dirty frames and copy them into every sheet.  `tile_cmd` is
+    the montage command without the alpha mode, inputs and output.  Returns
+    error messages (empty on success).
+    """
+    pages  = math.ceil(len(paths) / (grid["cols"] * grid["rows"]))
+    errors = []
+    with tempfile.TemporaryDirectory(prefix="sheets-") as scratch:
+        for alpha, pattern in outputs:
+            tiles  = os.path.join(scratch, f"{alpha}-%d.png")
+            inputs = [paths[i] for i in dirty]
+            result = job.run(tile_cmd + ["-alpha", alpha] + inputs + [tiles],
+                             inputs=inputs, outputs=[], timeout=120, lease=lease)
+            if result.returncode != 0:
+                errors.append(result.stderr.strip() or f"Exit {result.returncode}")
+                continue
+
+            by_page = {}
+            for n, i in enumerate(dirty):
+                page, x, y = position(grid, i)
+                by_page.setdefault(page, []).append((tiles.replace("%d", str(n)), x, y))
+            for page, placed in sorted(by_page.items()):
+                sheet   = page_path(pattern, page, pages)
+                patched = os.path.join(scratch, os.path.basename(sheet))
+                cmd = [convert_bin, sheet]
+                for tile, x, y in placed:
+                    cmd += [tile, "-geometry", f"+{x}+{y}", "-compose", "Copy", "-composite"]
+                result = job.run(cmd + [patched], inputs=[sheet], outputs=[patched],
+                                 timeout=120, lease=lease)
+                if result.returncode != 0:
+                    errors.append(result.stderr.strip() or f"Exit {result.returncode}")
+                    continue
+                atomic_copy(patched, sheet)
+    return errors
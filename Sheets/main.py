@@ -6,19 +6,27 @@ from drag-and-dropped image files.
 
 Requires:  pip install pywebview
 Optional:  ImageMagick installed (brew install imagemagick on macOS)
+           FFmpeg, for sheets made straight from video clips (brew install ffmpeg)
 Run:       python main.py
+Headless:  python main.py [--prefs JSON] [--set KEY=VALUE] PATH|GLOB|DIR …
 """
 
-import json
+import glob
 import os
 import re
 import subprocess
-import webbrowser
-
-import webview
+import sys
 
 # ── Preferences file (written alongside the script) ──────────────────────────
-PREFS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sheets_prefs.json")
+APP_DIR    = os.path.dirname(os.path.abspath(__file__))
+PREFS_PATH = os.path.join(APP_DIR, "sheets_prefs.json")
+
+# Repository root, for the shared `common` package
+sys.path.insert(0, os.path.dirname(APP_DIR))
+
+from common import governor, tools  # noqa: E402
+from common.metrics import Metrics  # noqa: E402
+from common.prefs import PrefsStore  # noqa: E402
 
 DEFAULT_PREFS = {
     # Processing mode (maps to prefType index)
@@ -35,8 +43,19 @@ DEFAULT_PREFS = {
     "scale":       3,
     # Output channel index: 0=RGBA  1=RGB  2=Alpha  3=All three
     "output":      0,
+    # Frames taken from a dropped video: this many per second, or when 0,
+    # every Nth frame
+    "videoFps":    0,
+    "videoStride": 1,
+    # Sprite sheets: keep a manifest and patch only changed frames on rebuild
+    "incremental": True,
+    # KTX2 texture of each sheet: 0=none  1=UASTC  2=ETC1S (see texture.py)
+    "texture":     0,
 }
 
+_prefs   = PrefsStore(PREFS_PATH, DEFAULT_PREFS)
+_metrics = Metrics("Sheets")
+
 SCALE_FILTERS = [
     "Point", "Box", "Cubic", "Quadratic",
     "Gaussian", "Mitchell", "Catrom", "Lanczos",
@@ -44,6 +63,20 @@ SCALE_FILTERS = [
 
 OUTPUT_MODES = ["rgba", "rgb", "alpha", "all"]
 
+# montage -alpha mode → the OUTPUT_MODES channel it writes
+ALPHA_CHANNELS = {"set": "rgba", "off": "rgb", "extract": "alpha"}
+
+IMAGE_EXTS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".tif", ".tiff",
+    ".bmp", ".webp", ".psd", ".tga", ".exr",
+}
+
+# Video clips are decoded with ffmpeg straight into the sheet (see video.py)
+VIDEO_EXTS = {
+    ".mov", ".mp4", ".m4v", ".avi", ".mkv", ".webm", ".mpg", ".mpeg",
+    ".mts", ".m2ts", ".wmv", ".flv", ".ogv", ".mxf",
+}
+
 
 class SheetsAPI:
     """Python-side API exposed to JS via window.pywebview.api.*"""
@@ -51,43 +84,28 @@ class SheetsAPI:
     # ── Prefs ─────────────────────────────────────────────────────────────────
 
     def load_prefs(self) -> dict:
-        if os.path.exists(PREFS_PATH):
-            try:
-                with open(PREFS_PATH) as f:
-                    saved = json.load(f)
-                return {**DEFAULT_PREFS, **saved}
-            except Exception:
-                pass
-        return dict(DEFAULT_PREFS)
+        return _prefs.load()
 
     def save_prefs(self, prefs: dict) -> bool:
-        try:
-            with open(PREFS_PATH, "w") as f:
-                json.dump(prefs, f, indent=2)
-            return True
-        except Exception as e:
-            return str(e)
+        return _prefs.save(prefs)
 
     def erase_prefs(self) -> bool:
-        if os.path.exists(PREFS_PATH):
-            os.remove(PREFS_PATH)
-        return True
+        return _prefs.erase()
 
     # ── System utility ────────────────────────────────────────────────────────
 
     def open_url(self, url: str) -> bool:
+        import webbrowser
         webbrowser.open(url)
         return True
 
     def check_imagemagick(self, loc: str) -> dict:
         """Verify that ImageMagick montage is reachable at `loc`."""
-        binary = os.path.join(loc.rstrip("/"), "montage")
-        exists = os.path.isfile(binary) and os.access(binary, os.X_OK)
-        # Also try PATH as a fallback
-        if not exists:
-            import shutil
-            exists = shutil.which("montage") is not None
-        return {"ok": exists, "path": binary}
+        return tools.info("montage", loc)
+
+    def get_metrics(self, limit: int = 50) -> dict:
+        """Timing spans of the recent process_files calls (see common/metrics.py)."""
+        return _metrics.snapshot(limit)
 
     # ── Core processing ───────────────────────────────────────────────────────
 
@@ -97,8 +115,17 @@ class SheetsAPI:
         the ImageMagick montage command(s), execute them, and return a result
         dict: { ok: bool, message: str, commands: [str] }
         """
+        job = _metrics.start(files=len(file_uris))
+        result = self._process_files(file_uris, prefs, job)
+        if result["ok"] and int(prefs.get("texture", 0) or 0):
+            result = self._textures(result, prefs, job)
+        job.end(result)
+        return result
+
+    def _process_files(self, file_uris: list, prefs: dict, job) -> dict:
         try:
             # ── Decode URIs → absolute paths ──────────────────────────────────
+            job.stage("decode")
             paths = []
             for uri in file_uris:
                 p = uri.replace("file://localhost", "").replace("file://", "")
@@ -111,21 +138,26 @@ class SheetsAPI:
             if not paths:
                 return {"ok": False, "message": "No files received.", "commands": []}
 
-            # ── Validate: all must be image files ─────────────────────────────
-            IMAGE_EXTS = {
-                ".png", ".jpg", ".jpeg", ".gif", ".tif", ".tiff",
-                ".bmp", ".webp", ".psd", ".tga", ".exr",
-            }
+            # ── Validate: all image files, or all video clips ─────────────────
+            job.stage("validate")
+            videos = [p for p in paths if os.path.splitext(p)[1].lower() in VIDEO_EXTS]
             for p in paths:
                 ext = os.path.splitext(p)[1].lower()
-                if ext not in IMAGE_EXTS:
+                if ext not in IMAGE_EXTS and ext not in VIDEO_EXTS:
                     return {
                         "ok": False,
                         "message": f"Unsupported file type: {os.path.basename(p)}\n"
-                                   "Only image files are accepted.",
+                                   "Only image files and video clips are accepted.",
                         "commands": [],
                         "wrong_type": True,
                     }
+            if videos and len(videos) != len(paths):
+                return {
+                    "ok": False,
+                    "message": "Drop either image files or video clips, not both.",
+                    "commands": [],
+                    "wrong_type": True,
+                }
 
             # ── Sort alphanumerically (mirrors original sortAlphaNum) ──────────
             paths = sorted(paths, key=_alphanum_key)
@@ -140,24 +172,34 @@ class SheetsAPI:
             pscale      = int(prefs.get("scale", 3))
             poutput     = int(prefs.get("output", 0))
 
-            montage_bin = loc + "montage"
+            # Textures are encoded once the sheets exist; fail before that
+            if int(prefs.get("texture", 0) or 0) and not tools.find("toktx", loc):
+                return {
+                    "ok": False,
+                    "message": (
+                        "KTX-Software 'toktx' not found (needed for KTX2 textures).\n"
+                        f"Configured path: {loc}\n"
+                        "Install via: brew install ktx-software"
+                    ),
+                    "commands": [],
+                }
 
-            # Fall back to PATH if the configured binary doesn't exist
-            if not os.path.isfile(montage_bin):
-                import shutil
-                found = shutil.which("montage")
-                if found:
-                    montage_bin = found
-                else:
-                    return {
-                        "ok": False,
-                        "message": (
-                            "ImageMagick 'montage' not found.\n"
-                            f"Configured path: {loc}\n"
-                            "Install via: brew install imagemagick"
-                        ),
-                        "commands": [],
-                    }
+            if videos:
+                return self._video_sheets(videos, prefs, job)
+
+            # Configured directory first, then PATH
+            job.stage("lookup")
+            montage_bin = tools.find("montage", loc)
+            if not montage_bin:
+                return {
+                    "ok": False,
+                    "message": (
+                        "ImageMagick 'montage' not found.\n"
+                        f"Configured path: {loc}\n"
+                        "Install via: brew install imagemagick"
+                    ),
+                    "commands": [],
+                }
 
             # Scale filter flag
             if pscale < len(SCALE_FILTERS):
@@ -190,11 +232,16 @@ class SheetsAPI:
 
             # Output names for single-sequence drop (wildcard glob)
             if len(paths) == 1 or num_part is not None:
-                # Build glob pattern (ImageMagick handles globbing)
+                # Expand the glob here rather than in ImageMagick: the sheets
+                # match it too (frameSheet-0.png matches frame*.png), both
+                # earlier ones and those the previous command just wrote
                 glob_pattern = os.path.join(first_dir, stem + "*" + ext)
-                input_spec   = [glob_pattern]
+                frames       = [f for f in sorted(glob.glob(glob_pattern))
+                                if not is_output(f, prefs)]
+                input_spec   = frames
             else:
                 input_spec = paths
+                frames     = paths
 
             out_base_sprite = os.path.join(first_dir, stem + name_sprite + ext)
             out_base_rgb    = os.path.join(first_dir, stem + name_sprite + ".rgb" + ext)
@@ -239,6 +286,7 @@ class SheetsAPI:
                     mode_flags = []
 
             # ── Build command lists ───────────────────────────────────────────
+            job.stage("build")
             base_cmd = (
                 [montage_bin, "-background", "none"]
                 + scale_flag
@@ -260,17 +308,69 @@ class SheetsAPI:
 
             if not commands:
                 return {"ok": False, "message": "No output mode selected.", "commands": []}
+            targets = [[c[c.index("-alpha") + 1], c[-1]] for c in commands]
+            sheets  = [[ALPHA_CHANNELS[alpha], path] for alpha, path in targets]
+
+            # ── Sprite sheets: patch only the changed frames if possible ──────
+            # (see incremental.py; anything else is a full build)
+            grid = None
+            if ptype == 5 and prefs.get("incremental", True):
+                import incremental
+                grid = incremental.layout(psize, ptile)
+            if grid:
+                ordered  = frames
+                flags    = base_cmd[1:]
+                manifest = incremental.manifest_path(first_dir, stem)
+                previous = incremental.load(manifest)
+                job.stage("fingerprint")
+                fresh    = incremental.fingerprint(ordered, previous)
+                dirty    = incremental.changed(previous, flags, targets, grid, fresh)
+                convert_bin = tools.find("magick", loc) or tools.find("convert", loc)
+                if dirty is not None and convert_bin:
+                    job.stage("patch")
+                    errors = []
+                    if dirty:
+                        tile_cmd = ([montage_bin, "-background", "none"] + scale_flag
+                                    + ["-tile", "1x1"] + geometry_flag)
+                        mem_mb   = governor.decoded_mb([ordered[i] for i in dirty], 8) * 2
+                        with governor.acquire(cpu=1, mem_mb=mem_mb) as lease:
+                            errors = incremental.patch(job, tile_cmd, convert_bin, targets,
+                                                       grid, ordered, dirty, lease)
+                    if errors:
+                        return {
+                            "ok": False,
+                            "message": "ImageMagick reported errors:\n" + "\n".join(errors),
+                            "commands": [],
+                        }
+                    incremental.save(manifest, flags, targets, grid, fresh)
+                    summary = (f"{len(dirty)} of {len(ordered)} frames changed, patched in place:"
+                               if dirty else "No frames changed; sheets are up to date:")
+                    return {
+                        "ok": True,
+                        "message": summary + "\n" + "\n".join(os.path.basename(t[1])
+                                                                for t in targets),
+                        "commands": [],
+                        "patched": len(dirty),
+                        "sheets": sheets,
+                    }
 
             # ── Execute ───────────────────────────────────────────────────────
+            job.stage("run")
             cmd_strings = [" ".join(c) for c in commands]
             errors = []
+
+            # montage keeps every frame and the sheet in memory (16-bit RGBA);
+            # it gets up to half the CPU slots, within its own thread limit
+            mem_mb  = governor.decoded_mb(frames, bytes_per_pixel=8) * 2
+            threads = max(1, governor.cpu_slots() // 2)
+            limit   = tools.info("montage", loc)["features"].get("threads")
+            if limit:
+                threads = min(threads, limit)
+
             for cmd in commands:
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=120,
-                )
+                with governor.acquire(cpu=threads, mem_mb=mem_mb) as lease:
+                    result = job.run(cmd, inputs=frames, outputs=[cmd[-1]], timeout=120,
+                                     lease=lease)
                 if result.returncode != 0:
                     errors.append(result.stderr.strip() or f"Exit {result.returncode}")
 
@@ -280,8 +380,11 @@ class SheetsAPI:
                     "message": "ImageMagick reported errors:\n" + "\n".join(errors),
                     "commands": cmd_strings,
                 }
+            if grid:
+                incremental.save(manifest, flags, targets, grid, fresh)
 
             # ── Build a human-readable summary ───────────────────────────────
+            job.stage("assemble")
             outputs = []
             if poutput in (0, 3):
                 outputs.append(os.path.basename(out_base_sprite))
@@ -296,13 +399,141 @@ class SheetsAPI:
                 + "\n".join(outputs)
             )
 
-            return {"ok": True, "message": summary, "commands": cmd_strings}
+            return {"ok": True, "message": summary, "commands": cmd_strings, "sheets": sheets}
 
         except subprocess.TimeoutExpired:
             return {"ok": False, "message": "ImageMagick timed out (>120 s).", "commands": []}
         except Exception as ex:
             return {"ok": False, "message": f"Unexpected error: {ex}", "commands": []}
 
+    def _video_sheets(self, videos: list, prefs: dict, job) -> dict:
+        """
+        One sheet (or run of sheets) per clip, from frames ffmpeg pipes
+        straight into the compositor in video.py; montage is not used.
+        """
+        import video
+
+        ptype   = int(prefs.get("type", 0))
+        psize   = prefs.get("size", "128x128").strip()
+        ptile   = prefs.get("tile", "4x4").strip()
+        loc     = prefs.get("loc", "/opt/homebrew/bin/").rstrip("/") + "/"
+        pscale  = int(prefs.get("scale", 3))
+        poutput = int(prefs.get("output", 0))
+        fps     = max(0.0, float(prefs.get("videoFps", 0) or 0))
+        stride  = max(1, int(prefs.get("videoStride", 1) or 1))
+        name_sprite = prefs.get("nameSprite", "Sheet-%d")
+
+        if ptype == 6:
+            return {
+                "ok": False,
+                "message": "Contact sheets need image files.\n"
+                           "Choose another mode for video clips.",
+                "commands": [],
+            }
+
+        job.stage("lookup")
+        ffmpeg_bin  = tools.find("ffmpeg", loc)
+        ffprobe_bin = tools.find("ffprobe", loc)
+        if not ffmpeg_bin or not ffprobe_bin:
+            return {
+                "ok": False,
+                "message": (
+                    "FFmpeg (ffmpeg and ffprobe) not found.\n"
+                    f"Configured path: {loc}\n"
+                    "Install via: brew install ffmpeg"
+                ),
+                "commands": [],
+            }
+
+        job.stage("run")
+        sws      = video.SWS_FLAGS[pscale] if pscale < len(video.SWS_FLAGS) else "bicubic"
+        threads  = max(1, governor.cpu_slots() // 2)
+        commands = []
+        written  = []
+        sheets   = []
+        errors   = []
+        for path in videos:
+            clip = video.probe(ffprobe_bin, path)
+            if not clip:
+                errors.append(f"{os.path.basename(path)}: no readable video stream")
+                continue
+            native = (clip["width"], clip["height"])
+            size   = video.fit(*native, psize) if ptype in (3, 5) else native
+            count  = video.sampled(clip, fps, stride)
+            cmd    = video.command(ffmpeg_bin, path, size, native, fps, stride, sws, threads)
+            commands.append(" ".join(cmd))
+
+            base = os.path.join(os.path.dirname(path),
+                                os.path.splitext(os.path.basename(path))[0] + name_sprite)
+            outputs = {}
+            if poutput in (0, 3):
+                outputs["rgba"] = base + ".png"
+            if poutput in (1, 3):
+                outputs["rgb"] = base + ".rgb.png"
+            if poutput in (2, 3):
+                outputs["alpha"] = base + ".a.png"
+            if not outputs:
+                return {"ok": False, "message": "No output mode selected.", "commands": []}
+
+            # One sheet being filled and one being written (or, without a
+            # fixed grid, every frame gathered and the sheet); ffprobe's
+            # frame count is only an estimate, used for memory here
+            cols, rows = video.grid(ptype, count, ptile)
+            sheet_mb   = cols * rows * size[0] * size[1] * 4 / 2 ** 20
+            with governor.acquire(cpu=threads, mem_mb=sheet_mb * 2) as lease:
+                paths, placed, error = video.build(job, cmd, path, size, ptype,
+                                                   ptile, outputs, lease)
+            written += paths
+            sheets  += [[channel, pattern] for channel, pattern in outputs.items()]
+            if error or not placed:
+                errors.append(f"{os.path.basename(path)}: {error or 'no frames decoded'}")
+
+        job.stage("assemble")
+        if errors and not written:
+            return {"ok": False, "message": "\n".join(errors), "commands": commands}
+        summary = (
+            f"{len(written)} file{'s' if len(written) != 1 else ''} written:\n"
+            + "\n".join(os.path.basename(p) for p in written)
+        )
+        if errors:
+            summary += "\n\nWarnings:\n" + "\n".join(errors)
+        return {"ok": True, "message": summary, "commands": commands, "sheets": sheets}
+
+    def _textures(self, result: dict, prefs: dict, job) -> dict:
+        """Add a KTX2 texture of every new or changed sheet (see texture.py)."""
+        import texture
+
+        encoding = texture.ENCODINGS[int(prefs.get("texture", 0))]
+        loc      = prefs.get("loc", "/opt/homebrew/bin/").rstrip("/") + "/"
+        job.stage("texture")
+        try:
+            written, errors = texture.encode(job, tools.find("toktx", loc), encoding,
+                                             result.get("sheets", []))
+        except Exception as ex:
+            written, errors = [], [str(ex)]
+
+        message = result["message"]
+        if written:
+            message += (f"\n\n{len(written)} {encoding.upper()} texture"
+                        f"{'s' if len(written) != 1 else ''}:\n"
+                        + "\n".join(os.path.basename(p) for p in written))
+        if errors:
+            message += "\n\nTexture errors:\n" + "\n".join(errors)
+        return {**result, "message": message, "textures": len(written)}
+
+
+# ── Output names ──────────────────────────────────────────────────────────────
+def is_output(path: str, prefs: dict) -> bool:
+    """True for a sheet Sheets wrote itself (…Sheet-%d[.rgb|.a].png, Files-…)."""
+    base   = os.path.basename(path)
+    sprite = str(prefs.get("nameSprite", "Sheet-%d"))
+    if sprite:
+        pattern = re.escape(sprite).replace("%d", r"(?:%d|\d+)")
+        if re.search(pattern + r"(?:\.rgb|\.a)?\.\w{2,5}$", base):
+            return True
+    name_file = str(prefs.get("nameFile", "Files-"))
+    return bool(name_file) and base.startswith(name_file)
+
 
 # ── Alphanumeric sort (mirrors original sortAlphaNum) ─────────────────────────
 def _alphanum_key(path: str):
@@ -313,8 +544,11 @@ def _alphanum_key(path: str):
 
 # ── Window ────────────────────────────────────────────────────────────────────
 def main():
+    import webview
+    from common.startup import probe
+
     api = SheetsAPI()
-    html_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "index.html")
+    html_path = os.path.join(APP_DIR, "app", "index.html")
 
     window = webview.create_window(
         title="Sheets",
@@ -327,8 +561,26 @@ def main():
         min_size=(310, 220),
     )
 
+    probe(window)
     webview.start(debug=False)
+    _prefs.flush()
+
+
+# ── Headless ──────────────────────────────────────────────────────────────────
+def cli(argv: list) -> int:
+    from common.cli import run_cli
+    return run_cli(
+        SheetsAPI(), argv,
+        tool="Sheets",
+        extensions=IMAGE_EXTS | VIDEO_EXTS,
+        per_argument=True,
+        ignore=is_output,
+        description="Build one sheet per argument (file sequence, glob or directory) "
+                    "with ImageMagick montage.",
+    )
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(cli(sys.argv[1:]))
     main()
@@ -0,0 +1,123 @@
+"""
+GPU-ready copies of finished sheets: KTX2 textures with Basis Universal
+data and a full mip chain (needs toktx, from KTX-Software).
+
+Basis Universal is a supercompressed format.  At load time the engine
+transcodes it, block for block, to whatever the GPU samples natively:
+BC7 or BC1/3 on desktops, ETC2 or ASTC on mobiles.  Two encodings:
+
+    uastc   high quality, transcodes to BC7 / ASTC almost losslessly;
+            zstd on top keeps the file small
+    etc1s   much smaller files, at a visible cost in quality
+
+Each sheet is encoded next to itself (frameSheet-0.png → frameSheet-0.ktx2),
+RGBA, RGB or single-channel like the sheet, with the alpha sheet kept
+linear.  Sheets are encoded side by side, each encoder spreading its
+blocks over its share of the CPU slots.  A texture newer than its sheet is
+left alone, so after an incremental rebuild only the patched pages are
+encoded again.
+"""
+
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from common import governor
+from common.atomic import discard, partial_path
+
+# pref index → toktx --encode ("" : no textures)
+ENCODINGS = ["", "uastc", "etc1s"]
+
+# Sheet channel (OUTPUT_MODES) → toktx options
+CHANNELS = {
+    "rgba":  ["--target_type", "RGBA"],
+    "rgb":   ["--target_type", "RGB"],
+    "alpha": ["--target_type", "R", "--assign_oetf", "linear"],
+}
+
+ENCODING_FLAGS = {
+    "uastc": ["--uastc_quality", "2", "--zcmp", "18"],
+    "etc1s": ["--clevel", "2", "--qlevel", "128"],
+}
+
+
+# ── Sheets ────────────────────────────────────────────────────────────────────
+
+def _numbered(head: str, tail: str) -> list:
+    found = glob.glob(glob.escape(head) + "*" + glob.escape(tail))
+    pages = {}
+    for path in found:
+        number = path[len(head):len(path) - len(tail)]
+        if number.isdigit():
+            pages[int(number)] = path
+    return [pages[n] for n in sorted(pages)]
+
+
+def pages(pattern: str) -> list:
+    """The sheets on disk for a montage output name (Sheet-%d.png, or -N added)."""
+    if "%d" in pattern:
+        head, _, tail = pattern.partition("%d")
+        return _numbered(head, tail)
+    stem, ext = os.path.splitext(pattern)
+    return ([pattern] if os.path.isfile(pattern) else []) + _numbered(stem + "-", ext)
+
+
+def texture_path(sheet: str) -> str:
+    return os.path.splitext(sheet)[0] + ".ktx2"
+
+
+def stale(sheet: str) -> bool:
+    try:
+        return os.path.getmtime(texture_path(sheet)) < os.path.getmtime(sheet)
+    except OSError:
+        return True
+
+
+# ── Encode ────────────────────────────────────────────────────────────────────
+
+def command(toktx_bin: str, encoding: str, channel: str, threads: int,
+            sheet: str, out: str) -> list:
+    return ([toktx_bin, "--t2", "--encode", encoding] + ENCODING_FLAGS[encoding]
+            + CHANNELS[channel] + ["--genmipmap", "--threads", str(threads), out, sheet])
+
+
+def _encode(job, toktx_bin: str, encoding: str, channel: str, sheet: str,
+            threads: int) -> str:
+    out     = texture_path(sheet)
+    partial = partial_path(out, keep_ext=True)
+    try:
+        # The encoder holds the image, its mip chain and its block data
+        with governor.acquire(cpu=threads, mem_mb=governor.decoded_mb([sheet]) * 4) as lease:
+            result = job.run(command(toktx_bin, encoding, channel, lease.threads, sheet, partial),
+                             inputs=[sheet], outputs=[partial], timeout=600, lease=lease)
+        if result.returncode != 0:
+            err = (result.stderr or result.stdout or "").strip()
+            raise RuntimeError(err or f"exit {result.returncode}")
+        os.replace(partial, out)
+        return out
+    finally:
+        discard(partial)
+
+
+def encode(job, toktx_bin: str, encoding: str, sheets: list) -> tuple:
+    """
+    Encode the pages of `sheets` ([channel, output name] pairs) that have no
+    up-to-date texture.  Returns (textures written, error messages).
+    """
+    todo = [(channel, page) for channel, pattern in sheets
+            for page in pages(pattern) if stale(page)]
+    if not todo:
+        return [], []
+
+    workers = min(len(todo), governor.cpu_slots())
+    threads = max(1, governor.cpu_slots() // workers)
+    written, errors = [], []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(page, pool.submit(_encode, job, toktx_bin, encoding, channel, page, threads))
+                   for channel, page in todo]
+        for page, future in futures:
+            try:
+                written.append(future.result())
+            except Exception as ex:
+                errors.append(f"{os.path.basename(page)}: {ex}")
+    return written, errors
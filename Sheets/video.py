@@ -0,0 +1,256 @@
+"""
+Sprite sheets straight from a video clip (needs ffmpeg and ffprobe).
+
+ffmpeg decodes the clip, samples it (every Nth frame, or a fixed frame
+rate), scales it and writes raw RGBA frames to a pipe.  Each frame is
+copied into its tile of an in-memory sheet, and full sheets are written
+as PNG (zlib) on a writer thread while decoding goes on.  No frame is
+ever written to disk.
+
+Layouts follow the montage modes:
+
+    auto, fixed size          roughly square grid
+    horizontal / vertical     one row / one column
+    fixed tile, sprite sheet  COLSxROWS per sheet, more sheets as needed
+
+Tiles touch (no spacing) and unused cells stay transparent.  The last
+sheet is cropped to the rows (for a single row, the columns) it uses.
+"""
+
+import json
+import math
+import os
+import struct
+import subprocess
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from common.atomic import replacing
+
+# ffmpeg scaler for each of Sheets' SCALE_FILTERS (montage's -filter names)
+SWS_FLAGS = ["neighbor", "area", "bicubic", "bilinear", "gauss", "bicubic", "bicubic", "lanczos"]
+
+
+# ── Clip and layout ───────────────────────────────────────────────────────────
+
+def probe(ffprobe_bin: str, path: str) -> dict | None:
+    """{ width, height, fps, duration, frames } of the first video stream."""
+    try:
+        p = subprocess.run(
+            [ffprobe_bin, "-v", "error", "-select_streams", "v:0", "-of", "json",
+             "-show_entries", "stream=width,height,avg_frame_rate,nb_frames,duration"
+             ":format=duration", path],
+            capture_output=True, text=True, timeout=30,
+        )
+        data = json.loads(p.stdout or "{}")
+        stream = (data.get("streams") or [None])[0]
+        if not stream:
+            return None
+        num, _, den = (stream.get("avg_frame_rate") or "0/1").partition("/")
+        fps = float(num) / float(den or 1) if float(den or 1) else 0.0
+        duration = float(stream.get("duration") or (data.get("format") or {}).get("duration") or 0)
+        frames = int(stream.get("nb_frames") or 0) or int(round(duration * fps))
+        return {"width": int(stream["width"]), "height": int(stream["height"]),
+                "fps": fps, "duration": duration, "frames": frames}
+    except (OSError, subprocess.SubprocessError, ValueError, KeyError, ZeroDivisionError):
+        return None
+
+
+def fit(width: int, height: int, geometry: str) -> tuple:
+    """Scale to fit WxH (either may be blank), keeping the aspect ratio."""
+    w, _, h = geometry.lower().partition("x")
+    w, h = int(w or 0), int(h or 0)
+    if not w and not h:
+        return width, height
+    scale = min(w / width if w else math.inf, h / height if h else math.inf)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def sampled(clip: dict, fps: float, stride: int) -> int:
+    """Frames ffmpeg will deliver (0 when unknown)."""
+    if fps > 0:
+        return math.ceil(clip["duration"] * fps)
+    return math.ceil(clip["frames"] / stride)
+
+
+def paged(ptype: int, tile: str) -> bool:
+    """True when the grid is fixed (COLSxROWS in the tile modes) and frames run onto more sheets."""
+    c, _, r = tile.lower().partition("x")
+    return ptype in (4, 5) and bool(c.strip()) and bool(r.strip())
+
+
+def grid(ptype: int, count: int, tile: str) -> tuple:
+    """(columns, rows) of one sheet for `count` frames in layout `ptype`."""
+    count = max(1, count)
+    if ptype == 1:
+        return count, 1
+    if ptype == 2:
+        return 1, count
+    if ptype in (4, 5):
+        c, _, r = tile.lower().partition("x")
+        c, r = int(c or 0), int(r or 0)
+        if c and r:
+            return c, r
+        if c:
+            return c, math.ceil(count / c)
+        if r:
+            return math.ceil(count / r), r
+    cols = math.ceil(math.sqrt(count))
+    return cols, math.ceil(count / cols)
+
+
+# ── Sheets ────────────────────────────────────────────────────────────────────
+
+class Sheet:
+    """One page of tiles, RGBA, transparent where no frame has gone."""
+
+    def __init__(self, tile_w: int, tile_h: int, cols: int, rows: int):
+        self.tile_w, self.tile_h = tile_w, tile_h
+        self.cols, self.rows     = cols, rows
+        self.stride = cols * tile_w * 4
+        self.pixels = bytearray(self.stride * rows * tile_h)
+        self.used   = 0
+
+    @property
+    def full(self) -> bool:
+        return self.used >= self.cols * self.rows
+
+    def place(self, frame: bytes):
+        row, col = divmod(self.used, self.cols)
+        line = self.tile_w * 4
+        at   = row * self.tile_h * self.stride + col * line
+        for y in range(self.tile_h):
+            self.pixels[at:at + line] = frame[y * line:(y + 1) * line]
+            at += self.stride
+        self.used += 1
+
+    def rows_rgba(self):
+        """The used area, one RGBA scanline at a time."""
+        rows  = math.ceil(self.used / self.cols)
+        width = (self.cols if rows > 1 else self.used) * self.tile_w * 4
+        for y in range(rows * self.tile_h):
+            yield self.pixels[y * self.stride:y * self.stride + width]
+
+    @property
+    def size(self) -> tuple:
+        rows = math.ceil(self.used / self.cols)
+        return (self.cols if rows > 1 else self.used) * self.tile_w, rows * self.tile_h
+
+
+def _rgb(row: bytearray) -> bytearray:
+    out = bytearray(len(row) // 4 * 3)
+    out[0::3], out[1::3], out[2::3] = row[0::4], row[1::4], row[2::4]
+    return out
+
+
+# Output channel → (PNG colour type, scanline conversion)
+CHANNELS = {
+    "rgba":  (6, bytes),
+    "rgb":   (2, _rgb),
+    "alpha": (0, lambda row: row[3::4]),
+}
+
+
+def write_png(path: str, size: tuple, rows, channel: str = "rgba", level: int = 6):
+    """Write 8-bit scanlines as a PNG (filter 0), replacing `path` atomically."""
+    colour, convert = CHANNELS[channel]
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return (struct.pack(">I", len(body)) + kind + body
+                + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF))
+
+    deflate = zlib.compressobj(level)
+    with replacing(path) as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", size[0], size[1], 8, colour, 0, 0, 0)))
+        for row in rows:
+            data = deflate.compress(b"\x00" + convert(row))
+            if data:
+                f.write(chunk(b"IDAT", data))
+        f.write(chunk(b"IDAT", deflate.flush()))
+        f.write(chunk(b"IEND", b""))
+
+
+def page_path(pattern: str, page: int) -> str:
+    """Sheet-%d.png → Sheet-0.png …; without %d, later pages get -1, -2 …"""
+    if "%d" in pattern:
+        return pattern.replace("%d", str(page))
+    if page == 0:
+        return pattern
+    stem, ext = os.path.splitext(pattern)
+    return f"{stem}-{page}{ext}"
+
+
+# ── Build ─────────────────────────────────────────────────────────────────────
+
+def command(ffmpeg_bin: str, src: str, size: tuple, native: tuple, fps: float, stride: int,
+            sws: str, threads: int) -> list:
+    filters = []
+    if fps > 0:
+        filters.append(f"fps={fps:g}")
+    elif stride > 1:
+        filters.append(f"select=not(mod(n\\,{stride}))")
+    if size != native:
+        filters.append(f"scale={size[0]}:{size[1]}:flags={sws}")
+    cmd = [ffmpeg_bin, "-v", "error", "-nostdin", "-threads", str(threads), "-i", src, "-an"]
+    if filters:
+        cmd += ["-vf", ",".join(filters)]
+    return cmd + ["-vsync", "0", "-f", "rawvideo", "-pix_fmt", "rgba", "-"]
+
+
+def build(job, cmd: list, src: str, size: tuple, ptype: int, tile: str,
+          outputs: dict, lease=None) -> tuple:
+    """
+    Read frames of `size` from ffmpeg (`cmd`) into sheets and write each
+    sheet to outputs {channel: path pattern}.  With a fixed grid (see
+    paged) frames go straight into sheets as they arrive; otherwise the
+    layout depends on how many frames there are, so they are gathered
+    first and laid out on one sheet.  Returns (paths written, frames
+    placed, ffmpeg error or "").
+    """
+    frame_bytes = size[0] * size[1] * 4
+    written     = []
+    placed      = 0
+    writer      = ThreadPoolExecutor(max_workers=1)
+    pending     = []
+
+    def flush(sheet: Sheet, page: int):
+        # One sheet in memory while the previous one is written
+        for future in pending:
+            future.result()
+        pending.clear()
+        for channel, pattern in outputs.items():
+            path = page_path(pattern, page)
+            pending.append(writer.submit(write_png, path, sheet.size, sheet.rows_rgba(), channel))
+            written.append(path)
+
+    try:
+        with job.stream(cmd, inputs=[src], outputs=[], lease=lease) as proc:
+            read = proc.stdout.read
+            if paged(ptype, tile):
+                count  = 0
+                frames = iter(lambda: read(frame_bytes), b"")
+            else:
+                frames = [f for f in iter(lambda: read(frame_bytes), b"")
+                          if len(f) == frame_bytes]
+                count  = len(frames)
+            cols, rows = grid(ptype, count, tile)
+            sheet, page = None, 0
+            for frame in frames:
+                if len(frame) < frame_bytes:
+                    break   # a torn last frame
+                if sheet is None:
+                    sheet = Sheet(size[0], size[1], cols, rows)
+                sheet.place(frame)
+                placed += 1
+                if sheet.full:
+                    flush(sheet, page)
+                    sheet, page = None, page + 1
+            if sheet is not None:
+                flush(sheet, page)
+        for future in pending:
+            future.result()
+    finally:
+        writer.shutdown()
+    error = proc.stderr_text.strip() if proc.returncode else ""
+    return written, placed, error
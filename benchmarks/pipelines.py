@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the process_files pipelines of Crusher, Sheets and
+Alchemist.
+
+Synthetic inputs (PNGs written with zlib, frame sequences, video files) are
+generated in a temp directory, then each pipeline runs against
+    standin  shell scripts named like the real tools that sleep for
+             --latency ms and write a placeholder output, so what is left is
+             the wrappers' own orchestration and process-spawn cost
+    real     the installed tools (skipped when a tool is missing)
+
+Each app runs in a fresh interpreter.  Reported per app and tool set:
+throughput (inputs/s), p50/p99 latency per unit (one PNG, one sheet or one
+video), tool spawns per unit, wrapper overhead per unit (mean latency
+minus the mean stand-in latency of its spawns; this still includes the
+stand-ins' own shell work), peak RSS of the interpreter and of the largest tool process,
+plus the bare cost of spawning a no-op stand-in.
+
+Run:  python benchmarks/pipelines.py [--count 20] [--frames 16]
+                                     [--size 256x256] [--latency 20]
+                                     [--latency ffmpeg=200] [--tools standin,real]
+                                     [--json out.json] [--compare old.json]
+                                     [crusher sheets alchemist]
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+APPS = {
+    # name: (directory, API class, tools it drives)
+    "crusher":   ("Crusher",   "CrusherAPI",   ("pngquant",)),
+    "sheets":    ("Sheets",    "SheetsAPI",    ("montage",)),
+    "alchemist": ("Alchemist", "AlchemistAPI", ("ffmpeg", "ffmpeg2theora", "qt_export")),
+}
+
+# Stand-in bodies: each finds its output argument the way the wrapper passes it
+_STANDIN_OUTPUT = {
+    # pngquant … --ext SUFFIX COLORS INPUT  →  INPUT minus .png plus SUFFIX
+    "pngquant": 'ext=""; prev=""; for a in "$@"; do [ "$prev" = "--ext" ] && ext="$a"; '
+                'prev="$a"; last="$a"; done; cp "$last" "${last%.png}$ext"',
+    # montage … OUTPUT
+    "montage": 'for a in "$@"; do last="$a"; done; printf sheet > "$last"',
+    # ffmpeg -i IN … OUTPUT -y
+    "ffmpeg": 'prev=""; out=""; for a in "$@"; do [ "$a" = "-y" ] && out="$prev"; prev="$a"; done; '
+              '[ -n "$out" ] && printf video > "$out"',
+    # ffmpeg2theora … -o OUTPUT INPUT
+    "ffmpeg2theora": 'prev=""; for a in "$@"; do [ "$prev" = "-o" ] && out="$a"; prev="$a"; done; '
+                     'printf video > "$out"',
+    # qt_export --loadsettings=… INPUT OUTPUT
+    "qt_export": 'for a in "$@"; do last="$a"; done; printf video > "$last"',
+}
+
+
+# ── Synthetic inputs ──────────────────────────────────────────────────────────
+
+def write_png(path: str, width: int, height: int, seed: int = 0):
+    """An RGBA gradient PNG, written with zlib only (no Pillow needed)."""
+    base = bytearray()
+    for x in range(width):
+        base += bytes(((x * 255) // max(1, width - 1), (x * 7 + seed * 31) & 255,
+                       (seed * 37) & 255, 255))
+    base = bytes(base)
+    rows = []
+    stride = len(base)
+    for y in range(height):
+        # Rotating the row by whole pixels varies the colours cheaply
+        k = (y * 12) % stride
+        rows.append(b"\x00" + base[k:] + base[:k])
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(b"".join(rows), 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def write_video(path: str, kb: int, ffmpeg: str | None = None,
+                size: str = "320x240", seconds: float = 2.0):
+    """A real test clip when `ffmpeg` is given, otherwise `kb` KiB of noise."""
+    if ffmpeg:
+        subprocess.run(
+            [ffmpeg, "-v", "error", "-f", "lavfi",
+             "-i", f"testsrc=size={size}:rate=25:duration={seconds}",
+             "-pix_fmt", "yuv420p", path, "-y"],
+            check=True, capture_output=True,
+        )
+    else:
+        with open(path, "wb") as f:
+            f.write(os.urandom(kb * 1024))
+
+
+def make_inputs(app: str, root: str, args, ffmpeg: str | None) -> list:
+    """Units of work for `app`: lists of paths handed to one process_files call."""
+    w, h = (int(v) for v in args.size.lower().split("x"))
+    os.makedirs(root, exist_ok=True)
+    units = []
+    if app == "crusher":
+        for i in range(args.count):
+            p = os.path.join(root, f"image_{i:04d}.png")
+            write_png(p, w, h, i)
+            units.append([p])
+    elif app == "sheets":
+        for i in range(args.count):
+            d = os.path.join(root, f"seq_{i:04d}")
+            os.makedirs(d)
+            frames = []
+            for j in range(args.frames):
+                p = os.path.join(d, f"frame_{j + 1:04d}.png")
+                write_png(p, w, h, i * 1000 + j)
+                frames.append(p)
+            units.append(frames)
+    else:
+        first = None
+        for i in range(args.count):
+            p = os.path.join(root, f"clip_{i:04d}.mov")
+            if first:
+                shutil.copyfile(first, p)
+            else:
+                write_video(p, args.video_kb, ffmpeg, args.size, args.video_seconds)
+                first = p
+            units.append([p])
+    return units
+
+
+def make_standins(directory: str, latency: dict, counter: str):
+    """One shell script per tool, sleeping for its latency and logging each call."""
+    os.makedirs(directory, exist_ok=True)
+    for name, body in _STANDIN_OUTPUT.items():
+        seconds = latency.get(name, latency.get("*", 0.0)) / 1000
+        path = os.path.join(directory, name)
+        with open(path, "w") as f:
+            f.write("#!/bin/sh\n")
+            f.write(f'echo "{name}" >> "{counter}"\n')
+            if seconds > 0:
+                f.write(f"sleep {seconds:.4f}\n")
+            f.write(body + "\n")
+        os.chmod(path, 0o755)
+    noop = os.path.join(directory, "noop")
+    with open(noop, "w") as f:
+        f.write("#!/bin/sh\n:\n")
+    os.chmod(noop, 0o755)
+
+
+# ── Worker (runs inside a fresh interpreter) ──────────────────────────────────
+
+def _percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1))]
+
+
+def _rss_mb(kb_or_bytes: int) -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(kb_or_bytes * scale / 2 ** 20, 1)
+
+
+def worker(spec_path: str) -> int:
+    import resource
+
+    with open(spec_path) as f:
+        spec = json.load(f)
+    directory, api_class, _ = APPS[spec["app"]]
+    sys.path.insert(0, os.path.join(ROOT, directory))
+    import main
+
+    api   = getattr(main, api_class)()
+    prefs = {**main.DEFAULT_PREFS, **spec["prefs"]}
+    if spec["app"] == "alchemist":
+        def process(paths):
+            return api.process_files(paths, prefs, wait=True)
+    else:
+        def process(paths):
+            return api.process_files(paths, prefs)
+
+    latencies, failures = [], []
+    start = time.perf_counter()
+    for paths in spec["units"]:
+        t = time.perf_counter()
+        result = process(paths)
+        latencies.append((time.perf_counter() - t) * 1000)
+        if not result.get("ok"):
+            failures.append(result.get("message", "")[:200])
+    total = time.perf_counter() - start
+
+    me   = resource.getrusage(resource.RUSAGE_SELF)
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN)
+    inputs = sum(len(u) for u in spec["units"])
+    print(json.dumps({
+        "units":          len(latencies),
+        "inputs":         inputs,
+        "seconds":        round(total, 4),
+        "throughput":     round(inputs / total, 2) if total else None,
+        "p50_ms":         round(_percentile(latencies, 0.50), 2),
+        "p99_ms":         round(_percentile(latencies, 0.99), 2),
+        "mean_ms":        round(statistics.fmean(latencies), 2),
+        "cpu_self_s":     round(me.ru_utime + me.ru_stime, 3),
+        "cpu_tools_s":    round(kids.ru_utime + kids.ru_stime, 3),
+        "rss_self_mb":    _rss_mb(me.ru_maxrss),
+        "rss_tools_mb":   _rss_mb(kids.ru_maxrss),
+        "failures":       len(failures),
+        "first_failure":  failures[0] if failures else None,
+    }))
+    return 0
+
+
+# ── Harness ───────────────────────────────────────────────────────────────────
+
+def spawn_overhead(noop: str, runs: int = 50) -> float:
+    """Median ms for subprocess.run of a no-op script, captured like the apps do."""
+    times = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        subprocess.run([noop], capture_output=True, text=True)
+        times.append((time.perf_counter() - t) * 1000)
+    return round(statistics.median(times), 3)
+
+
+def _prefs_for(app: str, bin_dir: str, args) -> dict:
+    loc = bin_dir.rstrip("/") + "/"
+    if app == "alchemist":
+        return {"type": args.alchemist_type, "location": loc, "location2": loc, "location3": loc}
+    return {"loc": loc}
+
+
+def run_case(app: str, toolset: str, work: str, args, latency: dict) -> dict:
+    from common import tools
+
+    case_dir = os.path.join(work, f"{app}-{toolset}")
+    counter  = os.path.join(case_dir, "calls")
+    bin_dir  = os.path.join(case_dir, "bin")
+    ffmpeg   = None
+
+    if toolset == "standin":
+        make_standins(bin_dir, latency, counter)
+    else:
+        needed = APPS[app][2][:1] if app != "alchemist" else ("ffmpeg",)
+        found  = {name: tools.find(name) for name in needed}
+        missing = [n for n, p in found.items() if not p]
+        if missing:
+            return {"skipped": f"{', '.join(missing)} not installed"}
+        bin_dir = os.path.dirname(next(iter(found.values())))
+        ffmpeg  = found.get("ffmpeg")
+
+    units = make_inputs(app, os.path.join(case_dir, "in"), args, ffmpeg)
+    spec  = os.path.join(case_dir, "spec.json")
+    with open(spec, "w") as f:
+        json.dump({"app": app, "units": units, "prefs": _prefs_for(app, bin_dir, args)}, f)
+
+    p = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", spec],
+                       capture_output=True, text=True)
+    if p.returncode != 0:
+        return {"error": (p.stderr.strip().splitlines() or ["worker failed"])[-1]}
+    result = json.loads(p.stdout.strip().splitlines()[-1])
+
+    if toolset == "standin" and os.path.exists(counter):
+        with open(counter) as f:
+            calls = [line.strip() for line in f if line.strip()]
+        per_unit = len(calls) / max(1, result["units"])
+        # Mean sleep per unit, so it comes off the mean latency (not the p50)
+        slept = sum(latency.get(c, latency.get("*", 0.0)) for c in calls) / max(1, result["units"])
+        result["spawns_per_unit"] = round(per_unit, 2)
+        result["overhead_ms"]     = round(result["mean_ms"] - slept, 2)
+    return result
+
+
+def _parse_latency(items: list) -> dict:
+    latency = {"*": 0.0}
+    for item in items:
+        name, sep, value = item.rpartition("=")
+        latency[name if sep else "*"] = float(value)
+    return latency
+
+
+def _fmt(value, spec: str = ".1f") -> str:
+    return "–" if value is None else format(value, spec)
+
+
+def compare(results: dict, old_path: str):
+    with open(old_path) as f:
+        old = json.load(f).get("results", {})
+    print(f"\nvs {old_path}")
+    for key, new in results.items():
+        before = old.get(key)
+        if not before or "throughput" not in before or "throughput" not in new:
+            continue
+        d_thr = (new["throughput"] / before["throughput"] - 1) * 100 if before["throughput"] else 0
+        d_p50 = (new["p50_ms"] / before["p50_ms"] - 1) * 100 if before["p50_ms"] else 0
+        print(f"{key:<20} throughput {d_thr:+6.1f}%   p50 {d_p50:+6.1f}%")
+
+
+def main(argv: list) -> int:
+    if argv[:1] == ["--worker"]:
+        return worker(argv[1])
+
+    parser = argparse.ArgumentParser(description="Benchmark the process_files pipelines.")
+    parser.add_argument("apps", nargs="*", metavar="app",
+                        help=f"pipelines to run (default: {', '.join(APPS)})")
+    parser.add_argument("--count", type=int, default=20,
+                        help="units per app: PNGs, sheets or videos (default 20)")
+    parser.add_argument("--frames", type=int, default=16, help="frames per sheet (default 16)")
+    parser.add_argument("--size", default="256x256", help="image / video size (default 256x256)")
+    parser.add_argument("--video-kb", type=int, default=1024,
+                        help="size of each stand-in video input (default 1024)")
+    parser.add_argument("--video-seconds", type=float, default=2.0,
+                        help="length of the real test clip (default 2)")
+    parser.add_argument("--latency", action="append", default=[], metavar="[TOOL=]MS",
+                        help="stand-in latency, for every tool or one (repeatable)")
+    parser.add_argument("--tools", default="standin,real",
+                        help="tool sets to run: standin, real or both (default both)")
+    parser.add_argument("--alchemist-type", type=int, default=6,
+                        help="Alchemist conversion mode (default 6, two-pass MP4)")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="show changes against an earlier --json")
+    parser.add_argument("--keep", action="store_true", help="keep the generated files")
+    args = parser.parse_args(argv)
+
+    apps = [a.lower() for a in args.apps] or list(APPS)
+    unknown = [a for a in apps if a not in APPS]
+    if unknown:
+        parser.error(f"unknown app: {', '.join(unknown)}")
+    toolsets = [t.strip() for t in args.tools.split(",") if t.strip()]
+    latency  = _parse_latency(args.latency)
+    args.count = max(1, args.count)
+
+    work = tempfile.mkdtemp(prefix="utilityapps-bench-")
+    try:
+        make_standins(os.path.join(work, "probe"), {}, os.devnull)
+        spawn_ms = spawn_overhead(os.path.join(work, "probe", "noop"))
+        print(f"spawn overhead (no-op script): {spawn_ms:.2f} ms\n")
+        print(f"{'case':<20} {'inputs/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'spawns':>7} "
+              f"{'overhead':>9} {'rss MB':>7} {'tool MB':>8}  notes")
+
+        results = {}
+        failed  = False
+        for app in apps:
+            for toolset in toolsets:
+                key = f"{app}/{toolset}"
+                r = run_case(app, toolset, work, args, latency)
+                results[key] = r
+                note = r.get("skipped") or r.get("error") or (
+                    f"{r['failures']} failed: {r['first_failure']}" if r.get("failures") else "")
+                if r.get("error") or r.get("failures"):
+                    failed = True
+                print(f"{key:<20} {_fmt(r.get('throughput')):>9} {_fmt(r.get('p50_ms')):>9} "
+                      f"{_fmt(r.get('p99_ms')):>9} {_fmt(r.get('spawns_per_unit'), '.0f'):>7} "
+                      f"{_fmt(r.get('overhead_ms')):>9} {_fmt(r.get('rss_self_mb')):>7} "
+                      f"{_fmt(r.get('rss_tools_mb')):>8}  {note.splitlines()[0] if note else ''}")
+    finally:
+        if args.keep:
+            print(f"\nfiles kept in {work}")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+    report = {
+        "created":  time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python":   sys.version.split()[0],
+        "platform": platform.platform(),
+        "commit":   _git_commit(),
+        "config":   {**vars(args), "latency": latency},
+        "spawn_ms": spawn_ms,
+        "results":  results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+    return 1 if failed else 0
+
+
+def _git_commit() -> str | None:
+    try:
+        p = subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"],
+                           capture_output=True, text=True, timeout=5)
+        return p.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
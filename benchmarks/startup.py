@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for every app.
+
+For each app, in fresh interpreters:
+    import   time to `import main` and construct the API class, plus the
+             whole process (interpreter start → exit); also checks that
+             webview was not imported along the way
+    paint    spawn → page loaded, using the probe in common/startup.py
+             (needs pywebview and a display; skipped otherwise)
+
+Reports medians over --runs and exits 1 if a median is over its budget.
+
+Run:  python benchmarks/startup.py [--runs 5] [--budget-ms 150]
+                                   [--paint-budget-ms 1500] [--no-paint]
+                                   [--json startup.json] [apps ...]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common.startup import PROBE_ENV  # noqa: E402
+
+APPS = {
+    "Alchemist": "AlchemistAPI",
+    "Chroma":    "ChromaAPI",
+    "Crusher":   "CrusherAPI",
+    "Ratio":     "RatioAPI",
+    "Sheets":    "SheetsAPI",
+}
+
+# Runs in the app directory; sys.path[0] is "" so `import main` finds its main.py
+_IMPORT_PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+getattr(main, sys.argv[1])()
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "api_ms":    (t2 - t1) * 1000,
+    "webview":   "webview" in sys.modules,
+}))
+"""
+
+
+def _median(values: list):
+    return round(statistics.median(values), 2) if values else None
+
+
+def measure_import(app: str, api_class: str, runs: int) -> dict:
+    imports, apis, process = [], [], []
+    webview = False
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        p = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE, api_class],
+            cwd=os.path.join(ROOT, app), capture_output=True, text=True, timeout=60,
+        )
+        wall = (time.perf_counter() - t0) * 1000
+        if p.returncode != 0:
+            return {"ok": False, "error": p.stderr.strip().splitlines()[-1:]}
+        r = json.loads(p.stdout.strip().splitlines()[-1])
+        imports.append(r["import_ms"])
+        apis.append(r["api_ms"])
+        process.append(wall)
+        webview = webview or r["webview"]
+    return {
+        "ok":         True,
+        "import_ms":  _median(imports),
+        "api_ms":     _median(apis),
+        "process_ms": _median(process),
+        "webview":    webview,
+    }
+
+
+def measure_paint(app: str, runs: int, timeout: float) -> dict:
+    if importlib.util.find_spec("webview") is None:
+        return {"ok": False, "error": "pywebview not installed"}
+    env = dict(os.environ, **{PROBE_ENV: "1"})
+    times = []
+    for _ in range(runs):
+        start = time.time()
+        proc = subprocess.Popen(
+            [sys.executable, "main.py"],
+            cwd=os.path.join(ROOT, app), env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        # A window that never loads is killed, which ends the read loop below
+        watchdog = threading.Timer(timeout, proc.kill)
+        watchdog.start()
+        loaded = None
+        try:
+            for line in proc.stdout:
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(msg, dict) and msg.get("event") == "loaded":
+                    loaded = msg["time"]
+                    break
+            proc.wait()
+        finally:
+            watchdog.cancel()
+        if loaded is None:
+            return {"ok": False, "error": "no page-loaded event (no display?)"}
+        times.append((loaded - start) * 1000)
+    return {"ok": True, "paint_ms": _median(times)}
+
+
+def _fmt(value) -> str:
+    return "–" if value is None else f"{value:.1f}"
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold-start time of every app.")
+    parser.add_argument("apps", nargs="*", metavar="app",
+                        help=f"apps to measure (default: all of {', '.join(APPS)})")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail if import + API construction is slower than this")
+    parser.add_argument("--paint-budget-ms", type=float, default=None,
+                        help="fail if first paint is slower than this")
+    parser.add_argument("--no-paint", action="store_true", help="skip the first-paint run")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="seconds to wait for each window to load")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+    unknown = [a for a in args.apps if a not in APPS]
+    if unknown:
+        parser.error(f"unknown app: {', '.join(unknown)}")
+
+    runs = max(1, args.runs)
+    results = {}
+    failed = False
+    print(f"{'app':<10} {'import':>8} {'api':>8} {'process':>9} {'paint':>8}  notes")
+    for app in args.apps or APPS:
+        r = {"import": measure_import(app, APPS[app], runs)}
+        if not args.no_paint:
+            r["paint"] = measure_paint(app, runs, args.timeout)
+        results[app] = r
+
+        notes = []
+        imp, paint = r["import"], r.get("paint", {})
+        if not imp["ok"]:
+            notes.append(f"import failed: {' '.join(imp['error'])}")
+            failed = True
+        else:
+            if imp["webview"]:
+                notes.append("webview imported eagerly")
+                failed = True
+            if args.budget_ms is not None and imp["import_ms"] + imp["api_ms"] > args.budget_ms:
+                notes.append(f"over {args.budget_ms:g} ms budget")
+                failed = True
+        if paint and not paint["ok"]:
+            notes.append(f"paint skipped: {paint['error']}")
+        elif paint and args.paint_budget_ms is not None and paint["paint_ms"] > args.paint_budget_ms:
+            notes.append(f"paint over {args.paint_budget_ms:g} ms budget")
+            failed = True
+
+        print(f"{app:<10} {_fmt(imp.get('import_ms')):>8} {_fmt(imp.get('api_ms')):>8} "
+              f"{_fmt(imp.get('process_ms')):>9} {_fmt(paint.get('paint_ms')):>8}  "
+              f"{'; '.join(notes)}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"runs": runs, "python": sys.version.split()[0], "apps": results},
+                      f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
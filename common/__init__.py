@@ -0,0 +1,6 @@
+"""
+Shared helpers for the Python-UtilityApps wrappers.
+
+Each app's main.py puts the repository root on sys.path so it can import
+from here; nothing in this package imports webview.
+"""
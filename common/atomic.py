@@ -0,0 +1,75 @@
+"""
+Atomic file replacement shared by the apps.
+
+Whatever an app writes under a name someone may be reading (prefs,
+manifests, sheets, recompressed PNGs, textures, published encodes) goes to
+a hidden sibling first, `.name.partial`, and is moved over the real name
+with os.replace once complete.  A crash or a failing tool leaves the old
+file, never a torn one; the partial file is removed on failure.
+"""
+
+import contextlib
+import os
+import shutil
+
+
+def partial_path(path: str, keep_ext: bool = False) -> str:
+    """
+    The hidden sibling to write `path` into first: .name.partial, or
+    .stem.partial.ext (keep_ext) for tools that pick the format from the
+    extension.
+    """
+    directory, name = os.path.split(path)
+    if keep_ext:
+        stem, ext = os.path.splitext(name)
+        return os.path.join(directory, f".{stem}.partial{ext}")
+    return os.path.join(directory, f".{name}.partial")
+
+
+def discard(partial: str):
+    """Remove a partial file if it was left behind."""
+    try:
+        os.remove(partial)
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def replacing(path: str, mode: str = "wb", *, sync: bool = False, **kwargs):
+    """
+    open() the partial file for `path`; when the block ends cleanly it
+    replaces `path` (flushed to disk first with `sync`), otherwise it is
+    removed.  The open file's .name is the partial path.
+    """
+    partial = partial_path(path)
+    try:
+        with open(partial, mode, **kwargs) as f:
+            yield f
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(partial, path)
+    except BaseException:
+        discard(partial)
+        raise
+
+
+def atomic_write(path: str, data):
+    """Replace `path` with `data` (str is written as UTF-8)."""
+    if isinstance(data, str):
+        with replacing(path, "w", encoding="utf-8") as f:
+            f.write(data)
+    else:
+        with replacing(path) as f:
+            f.write(data)
+
+
+def atomic_copy(src: str, path: str):
+    """Replace `path` with a copy of `src` (which may be on another filesystem)."""
+    partial = partial_path(path)
+    try:
+        shutil.copyfile(src, partial)
+        os.replace(partial, path)
+    except BaseException:
+        discard(partial)
+        raise
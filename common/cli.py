@@ -0,0 +1,265 @@
+"""
+Headless batch front-end shared by Crusher, Sheets and Alchemist.
+
+Reuses an app's API class and saved prefs without opening a window (and
+without importing webview), so tools can be driven from scripts and render
+farms:
+
+    python main.py [--prefs JSON|FILE] [--set KEY=VALUE …] [-r] PATH|GLOB|DIR …
+
+Each unit of work prints one JSON line:
+    {"tool", "inputs", "ok", "message", "commands", "seconds"}
+and the exit status is 0 if every unit succeeded, 1 if any failed, and 2
+if nothing matched the given paths.
+
+With --watch the paths are hot folders: new files are processed as they
+arrive (see common/watch.py) until the process is interrupted.  With
+--metrics-log FILE each job's stage and subprocess timings are appended to
+FILE (see common/metrics.py).
+"""
+
+import argparse
+import glob
+import json
+import os
+import queue
+import re
+import signal
+import threading
+import time
+
+from common.metrics import LOG_ENV
+
+
+def _alphanum_key(path: str):
+    basename = os.path.basename(path)
+    parts = re.split(r"(\d+)", basename)
+    return [int(p) if p.isdigit() else p.lower() for p in parts]
+
+
+def _parse_value(raw: str):
+    """--set values are JSON when they parse as JSON, plain strings otherwise."""
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def load_overrides(prefs_arg: str | None, set_args: list) -> dict:
+    """Merge a --prefs JSON object (inline or a file path) with --set pairs."""
+    overrides = {}
+    if prefs_arg:
+        if os.path.isfile(prefs_arg):
+            with open(prefs_arg) as f:
+                overrides.update(json.load(f))
+        else:
+            overrides.update(json.loads(prefs_arg))
+    for item in set_args or []:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"--set expects KEY=VALUE, got {item!r}")
+        overrides[key.strip()] = _parse_value(value)
+    return overrides
+
+
+def expand(arg: str, extensions: set, recursive: bool = False, ignore=None) -> list:
+    """
+    One command-line argument → sorted list of matching files.  Directory
+    and glob matches for which ignore(path) is true (the app's own outputs)
+    are skipped; a file named explicitly is always kept.
+    """
+    if os.path.isdir(arg):
+        if recursive:
+            found = [os.path.join(d, f) for d, _, files in os.walk(arg) for f in files]
+        else:
+            found = [os.path.join(arg, f) for f in os.listdir(arg)]
+        found = [
+            p for p in found
+            if os.path.isfile(p) and os.path.splitext(p)[1].lower() in extensions
+        ]
+    elif glob.has_magic(arg):
+        found = [p for p in glob.glob(arg, recursive=recursive) if os.path.isfile(p)]
+    else:
+        found = [arg]
+        ignore = None
+    if ignore:
+        found = [p for p in found if not ignore(p)]
+    return sorted((os.path.abspath(p) for p in found), key=_alphanum_key)
+
+
+def build_parser(tool: str, description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog=f"{tool} (headless)", description=description)
+    parser.add_argument("paths", nargs="+", metavar="PATH",
+                        help="files, glob patterns or directories")
+    parser.add_argument("--prefs", metavar="JSON|FILE",
+                        help="prefs overrides as a JSON object or a JSON file")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="override a single pref (repeatable; VALUE may be JSON)")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="descend into subdirectories")
+    parser.add_argument("--metrics-log", metavar="FILE",
+                        help="append per-job stage and subprocess timings to FILE as JSON lines")
+
+    hot = parser.add_argument_group("watch mode")
+    hot.add_argument("--watch", action="store_true",
+                     help="treat PATHs as hot folders and process new files as they arrive")
+    hot.add_argument("--existing", action="store_true",
+                     help="also process files already in the folders")
+    hot.add_argument("--settle", type=float, default=2.0, metavar="SECONDS",
+                     help="how long size and mtime must hold before a file is used (default 2)")
+    hot.add_argument("--batch-window", type=float, default=1.0, metavar="SECONDS",
+                     help="gather files that settle within this gap into one batch (default 1)")
+    hot.add_argument("--batch-max", type=int, default=256, metavar="N",
+                     help="largest batch (default 256)")
+    hot.add_argument("--workers", type=int, default=1, metavar="N",
+                     help="units processed in parallel (default 1)")
+    hot.add_argument("--queue", type=int, default=8, metavar="N",
+                     help="units waiting before the watcher stalls (default 8)")
+    hot.add_argument("--poll", action="store_true",
+                     help="poll the folders instead of using inotify")
+    hot.add_argument("--interval", type=float, default=1.0, metavar="SECONDS",
+                     help="polling interval (default 1)")
+    return parser
+
+
+def _run_unit(tool: str, process, paths: list, prefs: dict) -> dict:
+    start = time.perf_counter()
+    try:
+        result = process(paths, prefs)
+    except Exception as ex:
+        result = {"ok": False, "message": f"Unexpected error:\n{ex}", "commands": []}
+    return {
+        "tool":     tool,
+        "inputs":   paths,
+        "ok":       bool(result.get("ok")),
+        "message":  result.get("message", ""),
+        "commands": result.get("commands", []),
+        "seconds":  round(time.perf_counter() - start, 3),
+    }
+
+
+def run_cli(api, argv: list, *, tool: str, extensions: set, process=None,
+            per_argument: bool = False, ignore=None, description: str = "") -> int:
+    """
+    Run `process(paths, prefs)` (default: api.process_files) headlessly.
+
+    per_argument=False: one unit per file (Crusher, Alchemist).
+    per_argument=True:  one unit per command-line argument, so a directory
+                        or glob becomes a single job (Sheets).  In watch
+                        mode, one unit per frame sequence in each batch.
+
+    ignore(path, prefs) recognises the app's own output files.
+    """
+    parser = build_parser(tool, description)
+    args = parser.parse_args(argv)
+    process = process or api.process_files
+    if args.metrics_log:
+        os.environ[LOG_ENV] = os.path.abspath(args.metrics_log)
+
+    try:
+        prefs = {**api.load_prefs(), **load_overrides(args.prefs, args.set)}
+    except (ValueError, OSError) as ex:
+        parser.error(str(ex))
+
+    skip = (lambda p: ignore(p, prefs)) if ignore else None
+    if args.watch:
+        missing = [p for p in args.paths if not os.path.isdir(p)]
+        if missing:
+            parser.error(f"--watch needs directories: {', '.join(missing)}")
+        return _watch(args, tool, extensions, process, prefs, per_argument, skip)
+
+    units = []
+    for arg in args.paths:
+        files = expand(arg, extensions, args.recursive, skip)
+        if per_argument:
+            if files:
+                units.append(files)
+        else:
+            units += [[f] for f in files]
+
+    if not units:
+        print(json.dumps({"tool": tool, "inputs": args.paths, "ok": False,
+                          "message": "No matching files.", "commands": [], "seconds": 0}),
+              flush=True)
+        return 2
+
+    failed = 0
+    for paths in units:
+        line = _run_unit(tool, process, paths, prefs)
+        print(json.dumps(line), flush=True)
+        if not line["ok"]:
+            failed += 1
+
+    return 1 if failed else 0
+
+
+# ── Watch mode ────────────────────────────────────────────────────────────────
+
+def _watch(args, tool: str, extensions: set, process, prefs: dict,
+           per_argument: bool, skip) -> int:
+    """
+    Feed settled batches through a bounded queue to `args.workers` threads.
+    When the workers fall behind the queue fills and the watcher waits,
+    rather than buffering without limit.  Runs until SIGINT / SIGTERM.
+    """
+    from common.watch import batches, make_watcher, sequences
+
+    def accept(path: str) -> bool:
+        name = os.path.basename(path)
+        return (
+            not name.startswith(".")
+            and os.path.splitext(name)[1].lower() in extensions
+            and not (skip and skip(path))
+        )
+
+    dirs    = [os.path.abspath(p) for p in args.paths]
+    watcher = make_watcher(dirs, args.recursive, args.poll, args.interval)
+    units   = queue.Queue(maxsize=max(1, args.queue))
+    lock    = threading.Lock()
+    failed  = []
+
+    def worker():
+        while True:
+            paths = units.get()
+            if paths is None:
+                return
+            line = _run_unit(tool, process, paths, prefs)
+            with lock:
+                print(json.dumps(line), flush=True)
+                if not line["ok"]:
+                    failed.append(paths)
+
+    # First signal: stop watching, hand on files that already settled and
+    # finish the queue.  A second one aborts.
+    halt = threading.Event()
+
+    def stop(*_):
+        if halt.is_set():
+            raise KeyboardInterrupt
+        halt.set()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, args.workers))]
+    for t in threads:
+        t.start()
+
+    with lock:
+        print(json.dumps({"tool": tool, "watching": dirs, "watcher": watcher.name}), flush=True)
+    try:
+        for batch in batches(watcher, accept, settle=args.settle,
+                             batch_window=args.batch_window,
+                             batch_max=max(1, args.batch_max), existing=args.existing,
+                             stop=halt):
+            for paths in (sequences(batch) if per_argument else [[p] for p in batch]):
+                units.put(paths)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        for _ in threads:
+            units.put(None)
+        for t in threads:
+            t.join()
+
+    return 1 if failed else 0
@@ -0,0 +1,199 @@
+"""
+Machine-wide CPU and memory slots for the external tools.
+
+Without coordination, an Alchemist encode, a Sheets montage and a batch of
+pngquant runs each size themselves to the whole machine (ffmpeg and
+ImageMagick start one thread per core) and throughput collapses.  Every
+tool run now takes a lease first:
+
+    with governor.acquire(cpu=4, mem_mb=600) as lease:
+        job.run(cmd, …, lease=lease)
+
+Slots are lock files in a per-user temp directory, one per CPU slot and one
+per 256 MB of memory, held with flock(2).  Any process on the machine (GUI
+or headless, any app) sees the same pool, and a crashed process drops its
+locks with it.  Requests queue on a gate lock in arrival order.  A CPU
+request is elastic: it is granted as soon as `min_cpu` slots are free and
+takes up to `cpu` of them; lease.threads is what it got.
+
+The lease carries the limits for the child: MAGICK_THREAD_LIMIT and
+OMP_NUM_THREADS in lease.env(), ffmpeg's -threads via lease.threads, and a
+nice level applied once the process has started.
+
+Environment:
+    UTILITYAPPS_GOVERNOR=off   disable (leases are granted at once, no locks)
+    UTILITYAPPS_CPU_SLOTS=N    CPU slots (default: the number of cores)
+    UTILITYAPPS_MEM_MB=N       memory pool (default: 3/4 of physical memory)
+    UTILITYAPPS_NICE=N         niceness added to tool runs (default 10)
+
+Where fcntl is unavailable (Windows) every lease is granted at once.
+"""
+
+import math
+import os
+import struct
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+
+MEM_UNIT_MB = 256
+_RETRY      = 0.05    # seconds between attempts while waiting at the gate
+
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def enabled() -> bool:
+    return fcntl is not None and os.environ.get("UTILITYAPPS_GOVERNOR", "").lower() not in (
+        "0", "off", "false", "no"
+    )
+
+
+def cpu_slots() -> int:
+    return max(1, _env_int("UTILITYAPPS_CPU_SLOTS", os.cpu_count() or 1))
+
+
+def mem_slots() -> int:
+    try:
+        total = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 2 ** 20
+    except (AttributeError, ValueError, OSError):
+        total = 8192
+    pool = _env_int("UTILITYAPPS_MEM_MB", total * 3 // 4)
+    return max(1, pool // MEM_UNIT_MB)
+
+
+def _directory() -> str:
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    path = os.path.join(tempfile.gettempdir(), f"utilityapps-slots-{uid}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+# ── Estimates ─────────────────────────────────────────────────────────────────
+
+def decoded_mb(paths, bytes_per_pixel: int = 4) -> float:
+    """
+    Rough decoded size of images in MB: PNG dimensions from the IHDR chunk,
+    anything else at four times its file size.
+    """
+    total = 0
+    for p in paths:
+        try:
+            with open(p, "rb") as f:
+                head = f.read(24)
+            if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+                w, h = struct.unpack(">II", head[16:24])
+                total += w * h * bytes_per_pixel
+            else:
+                total += os.path.getsize(p) * 4
+        except OSError:
+            continue
+    return total / 2 ** 20
+
+
+# ── Leases ────────────────────────────────────────────────────────────────────
+
+class Lease:
+    def __init__(self, threads: int, nice: int, fds: list = (), wait_ms: float = 0.0):
+        self.threads = threads
+        self.nice    = nice
+        self.wait_ms = wait_ms
+        self._fds    = list(fds)
+
+    def env(self, base: dict | None = None) -> dict:
+        """Environment for the child with the thread limits set."""
+        env = dict(os.environ if base is None else base)
+        env["MAGICK_THREAD_LIMIT"] = str(self.threads)
+        env["OMP_NUM_THREADS"]     = str(self.threads)
+        return env
+
+    def prioritise(self, pid: int):
+        """Lower the started child's priority by `nice` (best effort)."""
+        if not self.nice or not hasattr(os, "setpriority"):
+            return
+        try:
+            current = os.getpriority(os.PRIO_PROCESS, 0)
+            os.setpriority(os.PRIO_PROCESS, pid, min(19, current + self.nice))
+        except OSError:
+            pass
+
+    def release(self):
+        fds, self._fds = self._fds, []
+        for fd in fds:
+            os.close(fd)   # closing drops the flock
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def _try_lock(path: str):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return fd
+    except OSError:
+        os.close(fd)
+        return None
+
+
+def _grab(directory: str, prefix: str, count: int, want: int) -> list:
+    fds = []
+    for i in range(count):
+        if len(fds) >= want:
+            break
+        fd = _try_lock(os.path.join(directory, f"{prefix}-{i}"))
+        if fd is not None:
+            fds.append(fd)
+    return fds
+
+
+def acquire(cpu: int = 1, mem_mb: float = 0, *, min_cpu: int = 1,
+            nice: int | None = None) -> Lease:
+    """
+    Wait for at least `min_cpu` (up to `cpu`) CPU slots and enough memory
+    slots for `mem_mb`, and return the Lease holding them.  Requests larger
+    than the pool are clamped to it.
+    """
+    nice = _env_int("UTILITYAPPS_NICE", 10) if nice is None else nice
+    n_cpu, n_mem = cpu_slots(), mem_slots()
+    want    = max(1, min(cpu, n_cpu))
+    need    = max(1, min(min_cpu, want))
+    need_mm = min(n_mem, math.ceil(max(0.0, mem_mb) / MEM_UNIT_MB))
+
+    if not enabled():
+        return Lease(want, nice)
+    try:
+        directory = _directory()
+        gate = os.open(os.path.join(directory, "gate"), os.O_RDWR | os.O_CREAT, 0o600)
+    except OSError:
+        return Lease(want, nice)
+
+    t0 = time.perf_counter()
+    try:
+        fcntl.flock(gate, fcntl.LOCK_EX)   # first come, first served
+        while True:
+            mem = _grab(directory, "mem", n_mem, need_mm)
+            if len(mem) == need_mm:
+                cpus = _grab(directory, "cpu", n_cpu, want)
+                if len(cpus) >= need:
+                    wait_ms = round((time.perf_counter() - t0) * 1000, 3)
+                    return Lease(len(cpus), nice, cpus + mem, wait_ms)
+                mem += cpus
+            for fd in mem:
+                os.close(fd)
+            time.sleep(_RETRY)
+    finally:
+        os.close(gate)
@@ -0,0 +1,285 @@
+"""
+Per-job timing telemetry for the process_files pipelines.
+
+Each process_files call is one job.  The pipeline marks its stages as it
+goes (job.stage("validate"), job.stage("lookup") …; a stage ends where the
+next begins) and runs its tools through job.run(), which records one exec
+span per subprocess:
+
+    stage spans  wall_ms, cpu_ms (this process)
+    exec spans   (job.run, or job.stream for output read as it comes)
+                 spawn_ms (fork/exec until Popen returns), wall_ms,
+                 cpu_ms and maxrss_mb of that child, bytes_in / bytes_out
+                 of the files it read and wrote, returncode, and with a
+                 governor lease its threads and slot_wait_ms
+
+Child usage comes from os.wait4, which returns the same rusage that
+resource.getrusage(RUSAGE_CHILDREN) aggregates, but scoped to the one
+child, so concurrent workers do not blur each other.
+
+The last jobs are kept in memory for each app's get_metrics() API method.
+When UTILITYAPPS_METRICS_LOG names a file (the headless CLI sets it from
+--metrics-log), every finished job is also appended to it as one JSON line.
+"""
+
+import collections
+import contextlib
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+LOG_ENV = "UTILITYAPPS_METRICS_LOG"
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _rss_mb(maxrss: int) -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(maxrss * scale / 2 ** 20, 2)
+
+
+def _size(paths) -> int:
+    total = 0
+    for p in paths or ():
+        try:
+            total += os.path.getsize(p)
+        except OSError:
+            pass
+    return total
+
+
+def _wait4(proc: subprocess.Popen, timeout: float | None) -> tuple:
+    """Collect stdout/stderr, then reap `proc` with wait4 for its own rusage."""
+    err_chunks = []
+    reader = threading.Thread(target=lambda: err_chunks.append(proc.stderr.read()), daemon=True)
+    reader.start()
+
+    killed = threading.Event()
+
+    def kill():
+        killed.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, kill) if timeout else None
+    if timer:
+        timer.daemon = True
+        timer.start()
+    try:
+        out = proc.stdout.read()
+        reader.join()
+        _, status, usage = os.wait4(proc.pid, 0)
+    finally:
+        if timer:
+            timer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    proc.stdout.close()
+    proc.stderr.close()
+    err = err_chunks[0] if err_chunks else ""
+    if killed.is_set():
+        raise subprocess.TimeoutExpired(proc.args, timeout, output=out, stderr=err)
+    return out, err, usage
+
+
+class Job:
+    def __init__(self, metrics: "Metrics", name: str, attrs: dict):
+        self._metrics = metrics
+        self._lock    = threading.Lock()
+        self._stage   = None      # (name, wall start, cpu start)
+        self._ended   = False
+        self._t0      = time.perf_counter()
+        self._c0      = time.process_time()
+        self.record   = {
+            "id":      next(metrics._ids),
+            "tool":    metrics.tool,
+            "name":    name,
+            "started": round(time.time(), 3),
+            **attrs,
+            "spans":   [],
+        }
+
+    @property
+    def current(self) -> str | None:
+        return self._stage[0] if self._stage else None
+
+    def _close_stage(self, now: float, cpu: float):
+        if self._stage:
+            name, t, c = self._stage
+            self.record["spans"].append(
+                {"stage": name, "kind": "stage", "wall_ms": _ms(now - t), "cpu_ms": _ms(cpu - c)}
+            )
+            self._stage = None
+
+    def stage(self, name: str):
+        """End the current stage (if any) and start `name`."""
+        now, cpu = time.perf_counter(), time.process_time()
+        with self._lock:
+            self._close_stage(now, cpu)
+            self._stage = (name, now, cpu)
+
+    def run(self, cmd: list, *, inputs=(), outputs=(), timeout: float | None = None,
+            lease=None, **kwargs) -> subprocess.CompletedProcess:
+        """
+        subprocess.run(cmd, capture_output=True, text=True, timeout=…) that
+        also records an exec span.  `inputs` / `outputs` are the files the
+        tool reads and writes, for bytes_in / bytes_out.  A governor lease
+        sets the child's thread limits and nice level.
+        """
+        bytes_in = _size(inputs)
+        if lease:
+            kwargs["env"] = lease.env(kwargs.get("env"))
+        t0 = time.perf_counter()
+        if hasattr(os, "wait4"):
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    text=True, **kwargs)
+            spawned = time.perf_counter()
+            if lease:
+                lease.prioritise(proc.pid)
+            try:
+                out, err, usage = _wait4(proc, timeout)
+            except subprocess.TimeoutExpired:
+                self._exec_span(cmd, t0, spawned, None, -9, bytes_in, outputs, lease)
+                raise
+            result = subprocess.CompletedProcess(cmd, proc.returncode, out, err)
+        else:
+            # No wait4 (Windows): timings only
+            result  = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, **kwargs)
+            spawned = None
+            usage   = None
+        self._exec_span(cmd, t0, spawned, usage, result.returncode, bytes_in, outputs, lease)
+        return result
+
+    @contextlib.contextmanager
+    def stream(self, cmd: list, *, inputs=(), outputs=(), lease=None, **kwargs):
+        """
+        Popen(cmd) with stdout as a binary pipe, for tools whose output is
+        consumed as it is produced.  When the block ends the child is reaped
+        (killed first if the block raised) and its exec span recorded;
+        proc.returncode and proc.stderr_text are then set.
+        """
+        bytes_in = _size(inputs)
+        if lease:
+            kwargs["env"] = lease.env(kwargs.get("env"))
+        t0   = time.perf_counter()
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+        spawned = time.perf_counter()
+        if lease:
+            lease.prioritise(proc.pid)
+        err_chunks = []
+        reader = threading.Thread(target=lambda: err_chunks.append(proc.stderr.read()),
+                                  daemon=True)
+        reader.start()
+        try:
+            yield proc
+        except BaseException:
+            proc.kill()
+            raise
+        finally:
+            proc.stdout.close()
+            reader.join()
+            proc.stderr.close()
+            proc.stderr_text = (err_chunks[0] if err_chunks else b"").decode(errors="replace")
+            usage = None
+            if hasattr(os, "wait4"):
+                _, status, usage = os.wait4(proc.pid, 0)
+                proc.returncode = os.waitstatus_to_exitcode(status)
+            else:
+                proc.wait()
+            self._exec_span(cmd, t0, spawned, usage, proc.returncode, bytes_in, outputs, lease)
+
+    def _exec_span(self, cmd, t0, spawned, usage, returncode, bytes_in, outputs, lease):
+        span = {
+            "stage":      self.current or "exec",
+            "kind":       "exec",
+            "cmd":        os.path.basename(str(cmd[0])),
+            "spawn_ms":   _ms(spawned - t0) if spawned else None,
+            "wall_ms":    _ms(time.perf_counter() - t0),
+            "cpu_ms":     _ms(usage.ru_utime + usage.ru_stime) if usage else None,
+            "maxrss_mb":  _rss_mb(usage.ru_maxrss) if usage else None,
+            "bytes_in":   bytes_in,
+            "bytes_out":  _size(outputs),
+            "returncode": returncode,
+        }
+        if lease:
+            span["threads"]      = lease.threads
+            span["slot_wait_ms"] = lease.wait_ms
+        with self._lock:
+            self.record["spans"].append(span)
+
+    def extend(self, spans: list, **tags):
+        """Add spans recorded in another process (a worker), tagged with `tags`."""
+        with self._lock:
+            self.record["spans"] += [{**span, **tags} for span in spans]
+
+    def end(self, result: dict | None = None):
+        """Close the job (only the first call counts) and hand it to its Metrics."""
+        now, cpu = time.perf_counter(), time.process_time()
+        with self._lock:
+            if self._ended:
+                return
+            self._ended = True
+            self._close_stage(now, cpu)
+            self.record["wall_ms"] = _ms(now - self._t0)
+            self.record["cpu_ms"]  = _ms(cpu - self._c0)
+            self.record["ok"]      = bool(result.get("ok")) if isinstance(result, dict) else None
+        self._metrics._finish(self.record)
+
+
+class Metrics:
+    """The recent jobs of one app, plus the optional JSON-lines log."""
+
+    def __init__(self, tool: str, keep: int = 200):
+        self.tool  = tool
+        self._jobs = collections.deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._ids  = itertools.count(1)
+
+    def start(self, name: str = "process_files", **attrs) -> Job:
+        return Job(self, name, attrs)
+
+    def _finish(self, record: dict):
+        with self._lock:
+            self._jobs.append(record)
+            path = os.environ.get(LOG_ENV)
+            if path:
+                try:
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record) + "\n")
+                except OSError:
+                    pass
+
+    def snapshot(self, limit: int = 50) -> dict:
+        """
+        { ok, tool, jobs, totals }: the last `limit` jobs, and totals over
+        every kept job per stage and per tool ("exec:ffmpeg" …).
+        """
+        with self._lock:
+            jobs = list(self._jobs)
+        totals = {}
+        for job in jobs:
+            for span in job["spans"]:
+                key = span["stage"] if span["kind"] == "stage" else f"exec:{span['cmd']}"
+                t = totals.setdefault(key, {"count": 0, "wall_ms": 0.0, "cpu_ms": 0.0})
+                t["count"]   += 1
+                t["wall_ms"] += span["wall_ms"]
+                t["cpu_ms"]  += span["cpu_ms"] or 0.0
+                if span["kind"] == "exec":
+                    t["bytes_in"]  = t.get("bytes_in", 0) + span["bytes_in"]
+                    t["bytes_out"] = t.get("bytes_out", 0) + span["bytes_out"]
+                    t["maxrss_mb"] = max(t.get("maxrss_mb", 0.0), span["maxrss_mb"] or 0.0)
+        for t in totals.values():
+            t["wall_ms"] = round(t["wall_ms"], 3)
+            t["cpu_ms"]  = round(t["cpu_ms"], 3)
+        return {"ok": True, "tool": self.tool, "jobs": jobs[-max(0, limit):] if limit else [],
+                "totals": totals}
+
+    def clear(self) -> bool:
+        with self._lock:
+            self._jobs.clear()
+        return True
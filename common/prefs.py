@@ -0,0 +1,112 @@
+"""
+Coalesced, atomic prefs storage shared by every app's load/save/erase_prefs.
+
+The saved prefs are read from disk once and then answered from memory.
+save() only updates memory and schedules a write; however fast the UI calls
+it (slider drags, keystrokes), the file is rewritten at most once per
+`delay` seconds, always with the newest prefs.  Each write goes through
+common/atomic.py (a partial file moved over the old one), so a crash never
+leaves a torn prefs file.  Pending writes are flushed at
+interpreter exit and by each app's main() once its window closes.
+"""
+
+import atexit
+import json
+import os
+import threading
+
+from .atomic import replacing
+
+
+class PrefsStore:
+    def __init__(self, path: str, defaults: dict, delay: float = 0.5,
+                 merge_defaults: bool = False):
+        self.path           = path
+        self.defaults       = defaults
+        self.delay          = delay
+        self.merge_defaults = merge_defaults   # Chroma saves defaults along with the prefs
+
+        self._lock       = threading.Lock()    # guards the fields below
+        self._write_lock = threading.Lock()    # one write at a time
+        self._saved      = None                # what the file holds (or will), loaded lazily
+        self._dirty      = False
+        self._timer      = None
+        self._error      = None
+        atexit.register(self.flush)
+
+    # ── Reading ───────────────────────────────────────────────────────────────
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+            return saved if isinstance(saved, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def load(self) -> dict:
+        """Defaults overlaid with the saved prefs (a fresh copy each call)."""
+        with self._lock:
+            if self._saved is None:
+                self._saved = self._read()
+            return {**self.defaults, **self._saved}
+
+    # ── Writing ───────────────────────────────────────────────────────────────
+
+    def save(self, prefs: dict):
+        """
+        Remember `prefs` and schedule a write.  Returns True, or the error
+        message of the last write if that one failed.
+        """
+        prefs = {**self.defaults, **prefs} if self.merge_defaults else dict(prefs)
+        with self._lock:
+            self._saved = prefs
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            error = self._error
+        return error or True
+
+    def flush(self):
+        """Write pending prefs now.  Returns True, or an error message."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return True
+                snapshot, self._dirty = self._saved, False
+            try:
+                self._write(snapshot)
+                error = None
+            except Exception as ex:
+                error = str(ex)
+            with self._lock:
+                self._error = error
+            return error or True
+
+    def _write(self, prefs: dict):
+        try:
+            mode = os.stat(self.path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        with replacing(self.path, "w", sync=True) as f:
+            json.dump(prefs, f, indent=2)
+            os.chmod(f.name, mode)
+
+    def erase(self) -> bool:
+        """Drop pending writes and delete the prefs file."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                self._saved = {}
+                self._dirty = False
+                self._error = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        return True
@@ -0,0 +1,24 @@
+"""
+Startup probe for benchmarks/startup.py.
+
+With UTILITYAPPS_STARTUP_PROBE set, an app prints one JSON line when its
+page has loaded and then closes itself, so the benchmark can time a cold
+start from process spawn to first paint.  Without it, probe() does nothing.
+"""
+
+import json
+import os
+import time
+
+PROBE_ENV = "UTILITYAPPS_STARTUP_PROBE"
+
+
+def probe(window):
+    if not os.environ.get(PROBE_ENV):
+        return
+
+    def loaded():
+        print(json.dumps({"event": "loaded", "time": time.time()}), flush=True)
+        window.destroy()
+
+    window.events.loaded += loaded
@@ -0,0 +1,185 @@
+"""
+Cached discovery and capability probing for the external tools the apps
+drive (ffmpeg, ffmpeg2theora, qt_export, pngquant, ImageMagick montage …).
+
+find(name, loc) looks in the configured directory first and then on PATH,
+as each app did on every call before, but remembers the answer: a repeat
+lookup costs one stat() of the binary.  info(name, loc) also runs the tool
+once to record its version and features (ffmpeg encoders, ImageMagick
+delegates and resource limits such as the thread count).  Both are
+invalidated when the binary's mtime or size changes.
+
+Nothing here imports webview; the dicts returned are shared between
+callers, so treat them as read-only.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+_lock   = threading.Lock()
+_found  = {}   # (name, loc, PATH) → (path, signature, loc-dir signature or False)
+_probed = {}   # path → (signature, info)
+
+
+def _signature(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _candidate(name: str, loc: str | None) -> str | None:
+    return os.path.join(loc.rstrip("/"), name) if loc else None
+
+
+def _executable(path: str | None) -> bool:
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+# ── Lookup ────────────────────────────────────────────────────────────────────
+
+def find(name: str, loc: str | None = None) -> str | None:
+    """Path of `name` in `loc`, else on PATH, else None."""
+    key       = (name, loc or "", os.environ.get("PATH", ""))
+    candidate = _candidate(name, loc)
+    with _lock:
+        hit = _found.get(key)
+    if hit:
+        path, sig, loc_sig = hit
+        # A PATH hit also watches the configured directory, in case the
+        # tool is installed there later
+        if _signature(path) == sig and (
+            loc_sig is False or _signature(os.path.dirname(candidate)) == loc_sig
+        ):
+            return path
+
+    if _executable(candidate):
+        path, loc_sig = candidate, False
+    else:
+        path    = shutil.which(name)
+        loc_sig = _signature(os.path.dirname(candidate)) if candidate else False
+
+    with _lock:
+        if path:
+            _found[key] = (path, _signature(path), loc_sig)
+        else:
+            _found.pop(key, None)
+    return path
+
+
+# ── Probes ────────────────────────────────────────────────────────────────────
+
+def _run(path: str, *args: str) -> str:
+    p = subprocess.run([path, *args], capture_output=True, text=True,
+                       errors="replace", timeout=10)
+    return (p.stdout or "") + (p.stderr or "")
+
+
+def _version_in(line: str) -> str | None:
+    m = re.search(r"(\d+(?:\.\d+)+[\w.+-]*)", line)
+    return m.group(1) if m else (line.strip() or None)
+
+
+def _probe_version(path: str) -> tuple:
+    for flag in ("--version", "-version"):
+        out = _run(path, flag).strip()
+        if out:
+            return _version_in(out.splitlines()[0]), {}
+    return None, {}
+
+
+def _probe_none(path: str) -> tuple:
+    # qt_export has no version flag and starts an export when given unknown arguments
+    return None, {}
+
+
+def _probe_ffmpeg(path: str) -> tuple:
+    lines = _run(path, "-hide_banner", "-version").splitlines()
+    m = re.search(r"version (\S+)", lines[0]) if lines else None
+    version = m.group(1) if m else None
+
+    encoders = []
+    for line in _run(path, "-hide_banner", "-encoders").splitlines():
+        # " V....D libx264   libx264 H.264 …" – skip the legend (" V..... = Video")
+        m = re.match(r"\s*[VAS][F.][S.][X.][B.][D.]\s+(\S+)", line)
+        if m and m.group(1) != "=":
+            encoders.append(m.group(1))
+    return version, {"encoders": sorted(encoders)}
+
+
+def _probe_imagemagick(path: str) -> tuple:
+    out = _run(path, "-version")
+    m = re.search(r"ImageMagick (\S+)", out)
+    version = m.group(1) if m else None
+
+    def listed(label: str) -> list:
+        found = re.search(rf"^{label}[^:]*:\s*(.*)$", out, re.MULTILINE)
+        return found.group(1).split() if found else []
+
+    limits = {}
+    for line in _run(path, "-list", "resource").splitlines():
+        m = re.match(r"\s*([A-Za-z][A-Za-z ]*):\s*(\S.*)$", line)
+        if m and m.group(1) != "Resource limits":
+            limits[m.group(1).strip().lower().replace(" ", "_")] = m.group(2).strip()
+
+    thread = limits.get("thread", "")
+    return version, {
+        "delegates": listed("Delegates"),
+        "features":  listed("Features"),
+        "limits":    limits,
+        "threads":   int(thread) if thread.isdigit() else None,
+    }
+
+
+_PROBES = {
+    "ffmpeg":    _probe_ffmpeg,
+    "ffprobe":   _probe_ffmpeg,
+    "montage":   _probe_imagemagick,
+    "magick":    _probe_imagemagick,
+    "convert":   _probe_imagemagick,
+    "composite": _probe_imagemagick,
+    "qt_export": _probe_none,
+}
+
+
+def info(name: str, loc: str | None = None) -> dict:
+    """
+    { ok, name, path, version, features } for `name`, probing the binary
+    only the first time (or after it changes).  `path` is where the tool
+    was expected when it is not found.
+    """
+    path = find(name, loc)
+    if not path:
+        return {"ok": False, "name": name, "path": _candidate(name, loc) or name,
+                "version": None, "features": {}}
+
+    sig = _signature(path)
+    with _lock:
+        hit = _probed.get(path)
+    if hit and hit[0] == sig:
+        return hit[1]
+
+    try:
+        version, features = _PROBES.get(name, _probe_version)(path)
+    except (OSError, subprocess.SubprocessError):
+        version, features = None, {}
+    result = {"ok": True, "name": name, "path": path, "version": version, "features": features}
+    with _lock:
+        _probed[path] = (sig, result)
+    return result
+
+
+def has(name: str, feature: str, value: str, loc: str | None = None) -> bool:
+    """e.g. has("ffmpeg", "encoders", "libx264") or has("montage", "delegates", "png")."""
+    return value in info(name, loc)["features"].get(feature, ())
+
+
+def clear():
+    """Forget every lookup and probe."""
+    with _lock:
+        _found.clear()
+        _probed.clear()
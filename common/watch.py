@@ -0,0 +1,261 @@
+"""
+Hot-folder watching for the headless CLI (`--watch`).
+
+New files are noticed through inotify on Linux (via ctypes, no extra
+packages) or by polling the directories anywhere else.  A file is only
+handed on once its size and mtime have stopped changing for `settle`
+seconds, so renders and copies that are still being written are left alone.
+Files that settle close together are gathered into one batch.
+
+The caller decides what counts: `accept(path)` filters out other file types
+and each app's own outputs (`*.256.png`, `*.720p.mp4`, …), so results
+written into a watched folder are never picked up again.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import stat
+import struct
+import sys
+import time
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_Q_OVERFLOW  = 0x00004000
+IN_IGNORED     = 0x00008000
+IN_ISDIR       = 0x40000000
+IN_CLOEXEC     = 0o2000000
+
+_MASK  = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT = struct.Struct("iIII")
+
+_TICK       = 0.25     # seconds between settle checks while files are pending
+_DONE_LIMIT = 100_000  # prune the already-processed table past this size
+
+
+def _alphanum_key(path: str):
+    basename = os.path.basename(path)
+    parts = re.split(r"(\d+)", basename)
+    return [int(p) if p.isdigit() else p.lower() for p in parts]
+
+
+def _walk(dirs: list, recursive: bool):
+    for d in dirs:
+        if recursive:
+            for root, _, files in os.walk(d):
+                for f in files:
+                    yield os.path.join(root, f)
+        else:
+            try:
+                with os.scandir(d) as it:
+                    for entry in it:
+                        if entry.is_file():
+                            yield entry.path
+            except OSError:
+                continue
+
+
+def _signature(path: str):
+    """(size, mtime) of a regular file, or None if it is gone."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+# ── Watchers ──────────────────────────────────────────────────────────────────
+
+class PollWatcher:
+    """Rescans the directories every `interval` seconds."""
+    name = "poll"
+
+    def __init__(self, dirs: list, recursive: bool = False, interval: float = 1.0):
+        self.dirs      = dirs
+        self.recursive = recursive
+        self.interval  = interval
+        self._seen     = self._scan()
+        self._last     = time.monotonic()
+
+    def _scan(self) -> dict:
+        return {p: _signature(p) for p in _walk(self.dirs, self.recursive)}
+
+    def existing(self) -> list:
+        return list(self._seen)
+
+    def poll(self, timeout: float) -> list:
+        """Paths that appeared or changed since the last scan."""
+        time.sleep(max(0.0, min(timeout, self._last + self.interval - time.monotonic())))
+        if time.monotonic() - self._last < self.interval:
+            return []
+        seen, self._seen = self._seen, self._scan()
+        self._last = time.monotonic()
+        return [p for p, sig in self._seen.items() if seen.get(p) != sig]
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify through libc; directories created later are added when recursive."""
+    name = "inotify"
+
+    def __init__(self, dirs: list, recursive: bool = False):
+        self.dirs      = dirs
+        self.recursive = recursive
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd   = self._libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._wds = {}
+        try:
+            for d in dirs:
+                self._add(d)
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def _add(self, directory: str) -> list:
+        """Watch `directory` (and its subdirectories when recursive); returns files in it."""
+        found = []
+        for root, _, files in os.walk(directory):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root), _MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, os.strerror(err), root)
+            self._wds[wd] = root
+            found += [os.path.join(root, f) for f in files]
+            if not self.recursive:
+                break
+        return found
+
+    def existing(self) -> list:
+        return list(_walk(self.dirs, self.recursive))
+
+    def poll(self, timeout: float) -> list:
+        """Paths created, moved in or closed after writing within `timeout` seconds."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        data  = os.read(self._fd, 64 * 1024)
+        paths = []
+        off   = 0
+        while off + _EVENT.size <= len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, off)
+            name = data[off + _EVENT.size:off + _EVENT.size + length].rstrip(b"\0")
+            off += _EVENT.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; a full rescan catches anything missed
+                paths += self.existing()
+                continue
+            if mask & IN_IGNORED:
+                self._wds.pop(wd, None)
+                continue
+            root = self._wds.get(wd)
+            if root is None or not name:
+                continue
+            path = os.path.join(root, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if self.recursive:
+                    try:
+                        paths += self._add(path)
+                    except OSError:
+                        pass
+                continue
+            paths.append(path)
+        return paths
+
+    def close(self):
+        os.close(self._fd)
+
+
+def make_watcher(dirs: list, recursive: bool = False, poll: bool = False,
+                 interval: float = 1.0):
+    """inotify where available (unless `poll`), directory polling otherwise."""
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(dirs, recursive)
+        except (OSError, AttributeError):
+            pass
+    return PollWatcher(dirs, recursive, interval)
+
+
+# ── Settling and batching ─────────────────────────────────────────────────────
+
+def _chunks(batch: list, size: int):
+    """`batch` sorted alphanumerically, in runs of at most `size` files."""
+    batch = sorted(batch, key=_alphanum_key)
+    size  = max(1, size)
+    for i in range(0, len(batch), size):
+        yield batch[i:i + size]
+
+
+def batches(watcher, accept, *, settle: float = 2.0, batch_window: float = 1.0,
+            batch_max: int = 256, existing: bool = False, stop=None):
+    """
+    Yield lists of settled, accepted files, sorted alphanumerically.
+
+    A file settles once its size and mtime have held for `settle` seconds.
+    A batch closes when nothing new has settled for `batch_window` seconds
+    or it reaches `batch_max` files; a batch is never longer than that,
+    however many files settle in the same tick.  Files already present when
+    watching starts are skipped unless `existing` is set; a file is yielded
+    again only if it changes afterwards.  Runs until `stop` (an Event) is set.
+    """
+    pending = {}   # path → (signature, time it was first seen with it) or None
+    done    = {}   # path → signature it was last yielded with
+    for p in watcher.existing():
+        if accept(p):
+            if existing:
+                pending[p] = None
+            else:
+                done[p] = _signature(p)
+
+    batch = []
+    last  = 0.0
+    while not (stop and stop.is_set()):
+        for p in watcher.poll(_TICK if pending or batch else 1.0):
+            if accept(p):
+                pending[p] = None
+
+        now = time.monotonic()
+        for p, state in list(pending.items()):
+            sig = _signature(p)
+            if sig is None:
+                del pending[p]
+            elif state is None or state[0] != sig:
+                pending[p] = (sig, now)
+            elif now - state[1] >= settle:
+                del pending[p]
+                if done.get(p) != sig:
+                    done[p] = sig
+                    batch.append(p)
+                    last = now
+
+        if batch and (now - last >= batch_window or len(batch) >= batch_max):
+            yield from _chunks(batch, batch_max)
+            batch = []
+
+        if len(done) > _DONE_LIMIT:
+            done = {p: s for p, s in done.items() if os.path.exists(p)}
+
+    if batch:
+        yield from _chunks(batch, batch_max)
+
+
+def sequences(paths: list) -> list:
+    """Split a batch into one list per directory and frame-sequence stem."""
+    groups = {}
+    for p in paths:
+        stem = re.sub(r"\d+(?=\.\w+$)", "", os.path.basename(p))
+        groups.setdefault((os.path.dirname(p), stem), []).append(p)
+    return list(groups.values())